@@ -3,6 +3,9 @@ from flask_jwt_extended import jwt_required
 from core.database import Database
 from core.technical_analysis import TechnicalAnalysis
 from core.gerenciar_sinais import GerenciadorSinais
+from core.weight_governor import get_weight_governor
+from core.http_transport import get_transport
+from core.indicator_cache import get_indicator_cache
 import pandas as pd
 
 dashboard_bp = Blueprint('dashboard', __name__)
@@ -45,7 +48,10 @@ def get_system_status():
         return jsonify({
             'database': db.check_connection(),
             'signals_file': gerenciador.verificar_integridade(),
-            'analyzer': True
+            'analyzer': True,
+            'binance_weight': get_weight_governor().snapshot(),
+            'http': get_transport().stats(),
+            'indicator_cache': get_indicator_cache().stats()
         }), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
\ No newline at end of file
@@ -1,9 +1,10 @@
 import websocket
 import json
-import requests
 import time
 from datetime import datetime, timedelta
 import os
+from core.weight_governor import get_weight_governor
+from core.http_transport import get_transport
 
 class BinanceMonitor:
     def __init__(self):
@@ -12,6 +13,20 @@ class BinanceMonitor:
         self.known_pairs_file = "known_pairs.json"
         self.known_pairs = self.load_known_pairs()
         self.ws = None  # Initialize websocket connection variable
+        self.weight_governor = get_weight_governor()
+        self.transport = get_transport()
+
+    def _get(self, endpoint, params=None):
+        """GET na API de futuros contabilizando o peso da requisição"""
+        cost = self.weight_governor.acquire(endpoint, params)
+        response = None
+        try:
+            response = self.transport.get(f"{self.base_url}/fapi/v1/{endpoint}", params=params)
+            if response.status_code in (418, 429):
+                self.weight_governor.backoff(float(response.headers.get('Retry-After', 60)))
+            return response
+        finally:
+            self.weight_governor.release(cost, response.headers if response is not None else None)
 
     def format_signal(self, symbol, signal_type, entry_price, tp3_price=None):
         """Formata o sinal no padrão esperado pelo sistema"""
@@ -43,8 +58,6 @@ class BinanceMonitor:
     def get_latest_data(self, symbol):
         try:
             clean_symbol = symbol.replace('.P', '')
-            endpoint = f"/fapi/v1/klines"
-            url = f"{self.base_url}{endpoint}"
             
             params = {
                 'symbol': clean_symbol,
@@ -52,7 +65,7 @@ class BinanceMonitor:
                 'limit': 100
             }
             
-            response = requests.get(url, params=params, timeout=10)
+            response = self._get('klines', params)
             if response.status_code == 200:
                 data = response.json()
                 if not data:
@@ -104,7 +117,7 @@ class BinanceMonitor:
         try:
             # --- Start Edit 1 ---
             # Fetch exchange info to get all USDT symbols
-            exchange_info_response = requests.get(self.base_url + "/fapi/v1/exchangeInfo")
+            exchange_info_response = self._get('exchangeInfo')
             if exchange_info_response.status_code != 200:
                 print(f"Error accessing Binance exchange info. Status code: {exchange_info_response.status_code}")
                 return set()
@@ -116,7 +129,7 @@ class BinanceMonitor:
             }
 
             # Fetch leverage brackets to get max leverage for each symbol
-            leverage_response = requests.get(self.base_url + "/fapi/v1/leverageBracket")
+            leverage_response = self._get('leverageBracket')
             if leverage_response.status_code != 200:
                 print(f"Error accessing Binance leverage info. Status code: {leverage_response.status_code}")
                 # If leverage info fails, return all USDT pairs found in exchange info as a fallback
@@ -35,7 +35,56 @@ server.config['TRADING'] = {
         'momentum': 1.0,
         'pattern': 1.5,
         'correlation': 0.5
-    }
+    },
+
+    # Seleção dos pares monitorados: 'ticker' (uma chamada a /ticker/24hr) ou 'klines' (candles de cada par)
+    'PAIR_SELECTION': {
+        'mode': 'ticker',
+        'top_pairs': 100,
+        'refine_margin': 20  # pares em torno do corte reavaliados com ATR de candles (0 = desativado)
+    },
+
+    # Indicadores da análise mantidos de forma incremental (estado salvo em data/indicator_state)
+    'STREAMING_INDICATORS': True
+}
+
+# Binance API Configuration
+server.config['BINANCE_API'] = {
+    'FUTURES_URL': 'https://fapi.binance.com',
+    'RATE_LIMIT': {'rate': 20, 'capacity': 40},  # requisições por segundo / rajada máxima
+    'MAX_CONCURRENCY': 10,
+    'REQUEST_TIMEOUT': 10,
+    'WEIGHT_LIMIT': 2400,  # peso máximo por minuto permitido pela Binance
+    'WEIGHT_CEILING': 2000,  # teto usado pelo bot, deixando margem para outros processos
+    'KLINE_MAX_AGE': 15,  # segundos em que os candles locais são considerados atualizados
+    'KLINE_STREAM': True,  # receber candles dos top pairs via WebSocket durante o monitoramento
+    'FUTURES_PAIRS_TTL': 6 * 3600  # validade do cache de pares (exchangeInfo + leverageBracket)
+}
+
+# Scan Configuration (estágios do pipeline de scan)
+server.config['SCAN'] = {
+    'BATCH_SIZE': 20,  # pares buscados e analisados juntos
+    'FETCH_WORKERS': 2,  # lotes buscados ao mesmo tempo
+    'ANALYSIS_WORKERS': 2,  # threads de análise
+    'QUEUE_SIZE': 4,  # lotes aguardando entre um estágio e outro
+    'CLOSE_GRACE': 3,  # segundos após o fechamento do candle de entrada antes de analisar o candle fechado (sem stream)
+    'INTRABAR_INTERVAL': 900,  # reavaliação de todos os pares com o candle em andamento (0 = desativado)
+    'PRIORITY_SCHEDULER': True,  # analisar primeiro os pares perto do gatilho, adiando os distantes
+    'CYCLE_BUDGET': 60,  # máximo de pares buscados e analisados por ciclo
+    'HOT_DISTANCE': 0.25,  # fração do limiar que ainda falta abaixo da qual o par entra em todo ciclo
+    'MAX_BACKOFF': 8,  # espera máxima (em ciclos) de um par distante do gatilho
+    # Rejeições mantidas até o fechamento do candle de que dependem (lista vazia = desativado).
+    # 'trend', 'target' e 'quality' dependem do candle em andamento (o de 4h muda a cada fechamento de 1h)
+    # e anulariam as reavaliações dentro dele.
+    'NEGATIVE_CACHE': ['history', 'data']
+}
+
+# HTTP Configuration (transporte compartilhado por Binance e Telegram)
+server.config['HTTP'] = {
+    'TIMEOUT': 10,
+    'MAX_RETRIES': 3,
+    'BACKOFF': 0.5,  # segundos, dobrando a cada tentativa (com jitter)
+    'POOL_SIZE': 20  # conexões keep-alive por host
 }
 
 login_manager = LoginManager()
@@ -0,0 +1,138 @@
+import asyncio
+import atexit
+import threading
+import time
+import aiohttp
+import numpy as np
+from typing import Any, Coroutine, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+from config import server
+from .rate_limiter import TokenBucket, get_rate_limiter
+from .weight_governor import get_weight_governor
+from .http_transport import get_transport
+from .candles import decode_klines
+
+# (symbol, interval, limit, start_time)
+KlineRequest = Tuple[str, str, int, Optional[int]]
+
+
+class AsyncSessionLoop:
+    """
+    Loop asyncio de longa duração numa thread própria, com uma única ClientSession (e connector)
+    para o processo: as conexões keep-alive são reaproveitadas entre scans.
+    """
+
+    def __init__(self, max_concurrency: int = 10, timeout: float = 10):
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.loop = asyncio.new_event_loop()
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._thread = threading.Thread(target=self.loop.run_forever, name='async-session-loop', daemon=True)
+        self._thread.start()
+
+    def session(self) -> Tuple[aiohttp.ClientSession, asyncio.Semaphore]:
+        """Sessão e semáforo compartilhados; só pode ser chamado de dentro do loop"""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.max_concurrency, ttl_dns_cache=300)
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                headers={'Accept-Encoding': 'gzip, deflate'}
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._session, self._semaphore
+
+    def run(self, coro: Coroutine[Any, Any, Any]) -> Any:
+        """Executa `coro` no loop e aguarda o resultado (chamado de qualquer outra thread)"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result()
+
+    async def _close_session(self) -> None:
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+
+    def close(self) -> None:
+        if not self.loop.is_running():
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self._close_session(), self.loop).result(timeout=5)
+        except Exception as e:
+            print(f"❌ Erro ao fechar sessão assíncrona: {e}")
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout=5)
+
+
+_session_loop: Optional[AsyncSessionLoop] = None
+_session_loop_lock = threading.Lock()
+
+
+def get_session_loop() -> AsyncSessionLoop:
+    """Retorna o loop assíncrono compartilhado por todo o processo (criado no primeiro uso)"""
+    global _session_loop
+    with _session_loop_lock:
+        if _session_loop is None:
+            config = server.config['BINANCE_API']
+            _session_loop = AsyncSessionLoop(config['MAX_CONCURRENCY'], config['REQUEST_TIMEOUT'])
+            atexit.register(_session_loop.close)
+        return _session_loop
+
+
+class AsyncKlineFetcher:
+    """Busca klines de vários símbolos/timeframes em paralelo, respeitando o limitador de requisições"""
+
+    def __init__(self, rate_limiter: Optional[TokenBucket] = None):
+        config = server.config['BINANCE_API']
+        self.base_url = config['FUTURES_URL']
+        self.host = urlparse(self.base_url).netloc
+        self.rate_limiter = rate_limiter or get_rate_limiter()
+        self.weight_governor = get_weight_governor()
+        self.transport = get_transport()
+        self.max_retries = 3
+
+    async def _fetch_one(self, session: aiohttp.ClientSession, semaphore: asyncio.Semaphore,
+                         request: KlineRequest) -> Optional[np.ndarray]:
+        symbol, interval, limit, start_time = request
+        params = {'symbol': symbol, 'interval': interval, 'limit': limit}
+        if start_time is not None:
+            params['startTime'] = start_time
+
+        async with semaphore:
+            for attempt in range(self.max_retries):
+                if attempt:
+                    self.transport.record(self.host, None, retry=True)
+                await self.rate_limiter.acquire_async()
+                cost = await self.weight_governor.acquire_async('klines', params)
+                headers = None
+                start = time.perf_counter()
+                try:
+                    async with session.get(f"{self.base_url}/fapi/v1/klines", params=params) as response:
+                        headers = response.headers
+                        body = await response.read()
+                        self.transport.record(self.host, time.perf_counter() - start, error=response.status >= 500)
+                        if response.status == 200:
+                            return decode_klines(body)
+                        if response.status in (418, 429):
+                            retry_after = float(response.headers.get('Retry-After', 2 ** attempt))
+                            self.weight_governor.backoff(retry_after)
+                            continue
+                        print(f"❌ Erro ao obter klines para {symbol} {interval}. Status code: {response.status}")
+                        return None
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    self.transport.record(self.host, None, error=True)
+                    print(f"❌ Erro ao obter klines para {symbol} {interval}: {e}")
+                    await asyncio.sleep(0.5 * (attempt + 1))
+                finally:
+                    self.weight_governor.release(cost, headers)
+            return None
+
+    async def _fetch_many(self, requests: List[KlineRequest], session_loop: AsyncSessionLoop) -> List[Optional[np.ndarray]]:
+        session, semaphore = session_loop.session()
+        return await asyncio.gather(*(self._fetch_one(session, semaphore, r) for r in requests))
+
+    def fetch_many(self, requests: List[KlineRequest]) -> Dict[Tuple[str, str], Optional[np.ndarray]]:
+        """Executa as requisições em paralelo e retorna {(symbol, interval): klines}"""
+        if not requests:
+            return {}
+        session_loop = get_session_loop()
+        results = session_loop.run(self._fetch_many(requests, session_loop))
+        return {(r[0], r[1]): klines for r, klines in zip(requests, results)}
@@ -0,0 +1,304 @@
+import numpy as np
+import pandas as pd
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+from . import kernels
+from . import signal_rules
+from .kline_store import INTERVAL_MS
+
+Arrays = Dict[str, np.ndarray]
+
+TRADE_COLUMNS = [
+    'symbol', 'type', 'entry_time', 'entry_price', 'target_price', 'exit_time', 'exit_price',
+    'status', 'result', 'variation', 'bars_held', 'quality_score', 'trend_score',
+    'alignment_score', 'market_score'
+]
+
+
+def _group_by_timeline(records_by_symbol: Dict[str, np.ndarray]) -> List[Tuple[List[str], np.ndarray]]:
+    """Agrupa os símbolos com exatamente os mesmos open_time em matrizes (símbolos × candles)"""
+    groups = defaultdict(list)
+    for symbol, records in records_by_symbol.items():
+        if records is not None and len(records):
+            groups[records['open_time'].tobytes()].append(symbol)
+    return [
+        (symbols, np.stack([records_by_symbol[s] for s in symbols]))
+        for symbols in groups.values()
+    ]
+
+
+def _take_bars(values: np.ndarray, index: np.ndarray, valid: np.ndarray) -> np.ndarray:
+    """values[:, index] com NaN onde `valid` é falso"""
+    if values.shape[1] == 0:
+        return np.full((values.shape[0], len(index)), np.nan)
+    return np.where(valid, values[:, np.clip(index, 0, values.shape[1] - 1)], np.nan)
+
+
+class Backtester:
+    """
+    Reexecuta as regras de entrada de analyze_universe em todos os candles de 1h do histórico, com alvo
+    em `target_atr_multiplier` ATR e expiração em 7 dias, uma operação aberta por par de cada vez.
+
+    Cada candle é avaliado no seu fechamento, como no scan ao vivo: o candle de 4h em andamento é
+    montado só com os candles de 1h já fechados, então não há informação do futuro. Os indicadores
+    correm sobre todo o histórico (ao vivo são os últimos 500 candles), o que só muda o resíduo do
+    aquecimento das EMAs/ATR.
+    """
+
+    def __init__(self, quality_score_minimum: float = signal_rules.QUALITY_SCORE_MINIMUM,
+                 target_atr_multiplier: float = signal_rules.TARGET_ATR_MULTIPLIER,
+                 min_target_percentage: float = signal_rules.MIN_TARGET_PERCENTAGE,
+                 min_volume: float = signal_rules.MIN_VOLUME,
+                 expiry_bars: int = 168, entry_timeframe: str = '1h', trend_timeframe: str = '4h',
+                 min_bars: int = signal_rules.MIN_BARS):
+        self.quality_score_minimum = quality_score_minimum
+        self.target_atr_multiplier = target_atr_multiplier
+        self.min_target_percentage = min_target_percentage
+        self.min_volume = min_volume
+        self.expiry_bars = expiry_bars
+        self.entry_timeframe = entry_timeframe
+        self.trend_timeframe = trend_timeframe
+        self.min_bars = min_bars
+
+    @classmethod
+    def from_analyzer(cls, analyzer: Any, **overrides: Any) -> 'Backtester':
+        """Backtester com os parâmetros atuais de um TechnicalAnalysis (sobrescritos por `overrides`)"""
+        params = {
+            'quality_score_minimum': analyzer.quality_score_minimum,
+            'target_atr_multiplier': analyzer.target_atr_multiplier,
+            'min_target_percentage': analyzer.min_target_percentage,
+            'min_volume': analyzer.min_volume,
+            'entry_timeframe': analyzer.entry_timeframe,
+            'trend_timeframe': analyzer.trend_timeframe,
+        }
+        params.update(overrides)
+        return cls(**params)
+
+    def _trend_series(self, close: np.ndarray, open_time: np.ndarray) -> Arrays:
+        """
+        Features de tendência (trend_features) em cada candle de entrada, com o candle do timeframe
+        maior em andamento terminando nesse candle
+        """
+        entry_ms = INTERVAL_MS[self.entry_timeframe]
+        trend_ms = INTERVAL_MS[self.trend_timeframe]
+        ratio = trend_ms // entry_ms
+        window = signal_rules.TREND_EMA
+        alpha = 2.0 / (window + 1)
+        lookback = signal_rules.LOOKBACK
+
+        bucket = open_time // trend_ms
+        new_bucket = np.r_[True, bucket[1:] != bucket[:-1]]
+        starts = np.flatnonzero(new_bucket)
+        ends = np.r_[starts[1:], len(open_time)] - 1
+        position = np.cumsum(new_bucket) - 1
+        # Como em resample_klines: o grupo inicial incompleto é descartado
+        if ends[0] - starts[0] + 1 < ratio:
+            ends = ends[1:]
+            position = position - 1
+
+        # Fechamentos dos candles maiores e a EMA sem o mínimo de observações
+        trend_close = close[:, ends]
+        ema_raw = kernels.ewm(trend_close, alpha, 0)
+
+        previous = position - 1
+        back = position - lookback
+        prev_ema = _take_bars(ema_raw, previous, previous >= 0)
+        ema20 = prev_ema + alpha * (close - prev_ema)
+        ema20[:, position < window - 1] = np.nan
+        past_ema = _take_bars(ema_raw, back, back >= window - 1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            slope = (ema20 - past_ema) / past_ema * 100
+        past_close = _take_bars(trend_close, back, back >= 0)
+        with np.errstate(invalid='ignore'):
+            direction = close > past_close
+
+        return {
+            'price': close,
+            'ema20': ema20,
+            'ema20_slope': slope,
+            'direction': direction,
+            'valid': np.broadcast_to(position + 1 >= self.min_bars, close.shape),
+        }
+
+    def _entry_series(self, matrix: np.ndarray) -> Arrays:
+        """Features de entrada (entry_features) em cada candle"""
+        high = np.ascontiguousarray(matrix['high'])
+        low = np.ascontiguousarray(matrix['low'])
+        close = np.ascontiguousarray(matrix['close'])
+        atr = kernels.atr(high, low, close, signal_rules.ATR_WINDOW)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            volatility = np.where(close != 0, atr / close * 100, 0.0)
+        lookback = signal_rules.LOOKBACK
+        direction = np.zeros(close.shape, dtype=bool)
+        direction[:, lookback:] = close[:, lookback:] > close[:, :-lookback]
+        return {
+            'price': close,
+            'atr': atr,
+            'volatility': volatility,
+            'quote_volume': matrix['volume'] * close,
+            'direction': direction,
+        }
+
+    def prepare(self, records_by_symbol: Dict[str, np.ndarray]) -> List[Dict[str, Any]]:
+        """Indicadores de todos os candles, por grupo de símbolos; não dependem dos parâmetros testados"""
+        prepared = []
+        for symbols, matrix in _group_by_timeline(records_by_symbol):
+            open_time = matrix['open_time'][0]
+            close = np.ascontiguousarray(matrix['close'])
+            prepared.append({
+                'symbols': symbols,
+                'matrix': matrix,
+                'trend': self._trend_series(close, open_time),
+                'entry': self._entry_series(matrix),
+            })
+        return prepared
+
+    def signals(self, group: Dict[str, Any]) -> Arrays:
+        """Regras de analyze_universe em todos os candles: tendência, alvo mínimo e quality_score"""
+        trend, entry = group['trend'], group['entry']
+        scores = signal_rules.score_universe(trend, entry, self.min_volume)
+        is_uptrend = scores['trend_strength'] > 0
+        target_variation = signal_rules.target_variation(entry['price'], entry['atr'], is_uptrend,
+                                                         self.target_atr_multiplier)
+        distance = entry['atr'] * self.target_atr_multiplier
+
+        valid = np.array(trend['valid'])
+        valid[:, :self.min_bars - 1] = False
+        entries = (
+            valid &
+            (scores['trend_strength'] != 0) &
+            (target_variation >= self.min_target_percentage) &
+            (scores['quality_score'] >= self.quality_score_minimum)
+        )
+        return {
+            'entries': entries,
+            'is_uptrend': is_uptrend,
+            'target': np.where(is_uptrend, entry['price'] + distance, entry['price'] - distance),
+            **scores,
+        }
+
+    def _simulate(self, group: Dict[str, Any], signals: Arrays) -> Dict[str, np.ndarray]:
+        """
+        Percorre as operações em rodadas: em cada rodada, a próxima entrada de cada par é resolvida
+        de uma vez (alvo nos próximos `expiry_bars` candles ou expiração) para todos os pares.
+        """
+        matrix = group['matrix']
+        rows, n = matrix.shape
+        expiry = self.expiry_bars
+        high = np.ascontiguousarray(matrix['high'])
+        low = np.ascontiguousarray(matrix['low'])
+        close = np.ascontiguousarray(matrix['close'])
+
+        # Janelas dos `expiry` candles seguintes a cada candle (NaN depois do fim do histórico)
+        pad = np.full((rows, expiry + 1), np.nan)
+        high_windows = np.lib.stride_tricks.sliding_window_view(np.hstack([high, pad]), expiry, axis=1)
+        low_windows = np.lib.stride_tricks.sliding_window_view(np.hstack([low, pad]), expiry, axis=1)
+
+        # Próximo candle com entrada a partir de cada posição (n = nenhum)
+        index = np.where(signals['entries'], np.arange(n), n)
+        next_entry = np.hstack([
+            np.minimum.accumulate(index[:, ::-1], axis=1)[:, ::-1],
+            np.full((rows, 1), n)
+        ])
+
+        trades = defaultdict(list)
+        row = np.arange(rows)
+        bar = next_entry[:, 0]
+        while True:
+            active = bar < n
+            if not active.any():
+                break
+            r, t = row[active], bar[active]
+            is_up = signals['is_uptrend'][r, t]
+            target = signals['target'][r, t]
+
+            with np.errstate(invalid='ignore'):
+                hit = np.where(is_up[:, None],
+                               high_windows[r, t + 1] >= target[:, None],
+                               low_windows[r, t + 1] <= target[:, None])
+            reached = hit.any(axis=1)
+            expired = ~reached & (t + expiry < n)
+            exit_bar = np.where(reached, t + 1 + hit.argmax(axis=1), np.minimum(t + expiry, n - 1))
+            exit_price = np.where(reached, target, close[r, exit_bar])
+
+            for name, values in (('row', r), ('bar', t), ('exit_bar', exit_bar), ('exit_price', exit_price),
+                                 ('status', np.where(reached, 'TARGET', np.where(expired, 'EXPIRED', 'OPEN')))):
+                trades[name].append(values)
+
+            # Uma operação por par: a próxima entrada só depois da saída
+            bar = np.full(rows, n)
+            closed = reached | expired
+            bar[r[closed]] = next_entry[r[closed], exit_bar[closed] + 1]
+        return {name: np.concatenate(parts) for name, parts in trades.items()}
+
+    def run(self, records_by_symbol: Optional[Dict[str, np.ndarray]] = None,
+            prepared: Optional[List[Dict[str, Any]]] = None) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+        """
+        Executa o backtest sobre candles de 1h por símbolo (ou sobre o resultado de `prepare`,
+        para testar vários parâmetros sem recalcular os indicadores). Retorna (operações, estatísticas).
+        """
+        if prepared is None:
+            prepared = self.prepare(records_by_symbol or {})
+
+        frames = []
+        for group in prepared:
+            signals = self.signals(group)
+            trades = self._simulate(group, signals)
+            if not len(trades.get('row', [])):
+                continue
+            r, t, exit_bar = trades['row'], trades['bar'], trades['exit_bar']
+            matrix = group['matrix']
+            entry_price = matrix['close'][r, t]
+            is_up = signals['is_uptrend'][r, t]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                variation = np.where(is_up, trades['exit_price'] - entry_price,
+                                     entry_price - trades['exit_price']) / entry_price * 100
+            frames.append(pd.DataFrame({
+                'symbol': np.array(group['symbols'])[r],
+                'type': np.where(is_up, 'LONG', 'SHORT'),
+                'entry_time': pd.to_datetime(matrix['close_time'][r, t] + 1, unit='ms'),
+                'entry_price': entry_price,
+                'target_price': signals['target'][r, t],
+                'exit_time': pd.to_datetime(matrix['close_time'][r, exit_bar] + 1, unit='ms'),
+                'exit_price': trades['exit_price'],
+                'status': trades['status'],
+                'result': np.where(variation > 0, 'WIN', 'LOSS'),
+                'variation': variation,
+                'bars_held': exit_bar - t,
+                'quality_score': signals['quality_score'][r, t],
+                'trend_score': signals['trend_score'][r, t],
+                'alignment_score': signals['alignment_score'][r, t],
+                'market_score': signals['market_score'][r, t],
+            }))
+
+        if frames:
+            trades = pd.concat(frames, ignore_index=True).sort_values(['entry_time', 'symbol'], ignore_index=True)
+        else:
+            trades = pd.DataFrame(columns=TRADE_COLUMNS)
+        return trades, self.summarize(trades)
+
+    @staticmethod
+    def summarize(trades: pd.DataFrame) -> Dict[str, Any]:
+        """Estatísticas das operações encerradas (alvo ou expiração)"""
+        closed = trades[trades['status'] != 'OPEN']
+        variation = closed['variation'].astype(float)
+        gains = variation[variation > 0].sum()
+        losses = -variation[variation <= 0].sum()
+        # Curva acumulada na ordem de saída, para o drawdown máximo (em pontos percentuais somados)
+        equity = variation.loc[closed.sort_values('exit_time').index].cumsum().to_numpy()
+        drawdown = float((np.maximum.accumulate(np.r_[0.0, equity]) - np.r_[0.0, equity]).max()) if len(equity) else 0.0
+        total = len(closed)
+        return {
+            'trades': total,
+            'open': int((trades['status'] == 'OPEN').sum()),
+            'symbols': int(closed['symbol'].nunique()),
+            'wins': int((variation > 0).sum()),
+            'losses': int((variation <= 0).sum()),
+            'win_rate': round(float((variation > 0).mean() * 100), 2) if total else 0.0,
+            'target_rate': round(float((closed['status'] == 'TARGET').mean() * 100), 2) if total else 0.0,
+            'avg_variation': round(float(variation.mean()), 4) if total else 0.0,
+            'total_variation': round(float(variation.sum()), 4),
+            'profit_factor': round(float(gains / losses), 4) if losses > 0 else float('inf') if gains > 0 else 0.0,
+            'avg_bars_held': round(float(closed['bars_held'].mean()), 2) if total else 0.0,
+            'max_drawdown': round(drawdown, 4),
+        }
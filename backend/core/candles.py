@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+import ujson
+from typing import Union
+from .kline_store import KLINE_DTYPE
+
+
+def decode_klines(payload: Union[bytes, str]) -> np.ndarray:
+    """Decodifica o JSON bruto de /fapi/v1/klines direto para um array KLINE_DTYPE, sem pandas"""
+    rows = ujson.loads(payload)
+    records = np.empty(len(rows), dtype=KLINE_DTYPE)
+    for i, name in enumerate(KLINE_DTYPE.names):
+        records[name] = np.array([row[i] for row in rows], dtype=KLINE_DTYPE[name])
+    return records
+
+
+class Candles:
+    """Candles em arrays numpy contíguos (int64/float64); o DataFrame só é montado quando pedido"""
+
+    __slots__ = ('open_time', 'open', 'high', 'low', 'close', 'volume', 'close_time')
+
+    def __init__(self, open_time: np.ndarray, open: np.ndarray, high: np.ndarray, low: np.ndarray,
+                 close: np.ndarray, volume: np.ndarray, close_time: np.ndarray):
+        self.open_time = open_time
+        self.open = open
+        self.high = high
+        self.low = low
+        self.close = close
+        self.volume = volume
+        self.close_time = close_time
+
+    @classmethod
+    def from_records(cls, records: np.ndarray) -> 'Candles':
+        return cls(*(np.ascontiguousarray(records[name]) for name in cls.__slots__))
+
+    @classmethod
+    def from_json(cls, payload: Union[bytes, str]) -> 'Candles':
+        return cls.from_records(decode_klines(payload))
+
+    def __len__(self) -> int:
+        return len(self.close)
+
+    def __getitem__(self, column: str) -> np.ndarray:
+        return getattr(self, column)
+
+    def tail(self, n: int) -> 'Candles':
+        return Candles(*(getattr(self, name)[-n:] for name in self.__slots__))
+
+    def to_frame(self) -> pd.DataFrame:
+        """Visão pandas com as mesmas colunas usadas pela análise"""
+        return pd.DataFrame({
+            'timestamp': pd.to_datetime(self.open_time, unit='ms'),
+            'open': self.open,
+            'high': self.high,
+            'low': self.low,
+            'close': self.close,
+            'volume': self.volume,
+            'close_time': self.close_time
+        })
@@ -3,6 +3,7 @@ from typing import Dict, Any, Optional, List
 import os
 from datetime import datetime
 import traceback  # Adicionar esta linha no início do arquivo
+from .open_signals import get_open_signal_index
 
 class Database:
     def __init__(self):
@@ -16,6 +17,7 @@ class Database:
             'strategy_info', 'trend_timeframe', 'entry_timeframe'
         ]
         self._initialize_files()
+        self.open_signals = get_open_signal_index(self.signals_file)
 
     def _initialize_files(self) -> None:
         if not os.path.exists(self.signals_file):
@@ -82,36 +84,50 @@ class Database:
             return "⭐⭐ (Básico)"
         return "❌ Score Insuficiente"
 
+    def _prepare_signal(self, signal: Dict[str, Any]) -> Dict[str, Any]:
+        """Normaliza tipo, quality_score e colunas de um sinal antes de gravar"""
+        # Converter o tipo do sinal para maiúsculo
+        if 'type' in signal:
+            if signal['type'].lower() == 'compra':
+                signal['type'] = 'LONG'
+            elif signal['type'].lower() == 'venda':
+                signal['type'] = 'SHORT'
+        
+        # Garantir que o quality_score seja numérico
+        if 'quality_score' in signal:
+            try:
+                quality_score = float(signal['quality_score'])
+                signal['quality_score'] = quality_score
+                signal['signal_class'] = self._get_signal_class(quality_score)
+            except (ValueError, TypeError):
+                print(f"❌ Erro ao converter quality_score: {signal['quality_score']}")
+                signal['quality_score'] = 0
+                signal['signal_class'] = "❌ Score Inválido"
+        
+        # Garantir que todas as colunas existam
+        for col in self.signal_columns:
+            if col not in signal:
+                signal[col] = ''
+        
+        # Remover colunas extras que não estão em signal_columns
+        return {k: v for k, v in signal.items() if k in self.signal_columns}
+
+    def _write_signals(self, df: pd.DataFrame) -> None:
+        """Grava o arquivo de sinais de forma atômica (arquivo temporário + os.replace)"""
+        tmp_file = self.signals_file + '.tmp'
+        df.to_csv(tmp_file, index=False)
+        os.replace(tmp_file, self.signals_file)
+
     def add_signal(self, signal: Dict[str, Any]) -> bool:
         try:
             print(f"Debug - Recebendo sinal: {signal}")
-            
-            # Converter o tipo do sinal para maiúsculo
-            if 'type' in signal:
-                if signal['type'].lower() == 'compra':
-                    signal['type'] = 'LONG'
-                elif signal['type'].lower() == 'venda':
-                    signal['type'] = 'SHORT'
-            
-            # Garantir que o quality_score seja numérico
-            if 'quality_score' in signal:
-                try:
-                    quality_score = float(signal['quality_score'])
-                    signal['quality_score'] = quality_score
-                    signal['signal_class'] = self._get_signal_class(quality_score)
-                except (ValueError, TypeError):
-                    print(f"❌ Erro ao converter quality_score: {signal['quality_score']}")
-                    signal['quality_score'] = 0
-                    signal['signal_class'] = "❌ Score Inválido"
-            
-            # Garantir que todas as colunas existam
-            for col in self.signal_columns:
-                if col not in signal:
-                    signal[col] = ''
-            
-            # Remover colunas extras que não estão em signal_columns
-            signal = {k: v for k, v in signal.items() if k in self.signal_columns}
-            
+            signal = self._prepare_signal(signal)
+
+            # Índice em memória: evita ler o CSV quando o par já tem sinal aberto
+            if self.open_signals.contains(signal['symbol']):
+                print(f"⚠️ Sinal já existe para {signal['symbol']}")
+                return False
+
             df = pd.read_csv(self.signals_file)
             
             # Verificar se o sinal já existe
@@ -126,7 +142,8 @@ class Database:
             
             # Adicionar novo sinal
             new_df = pd.concat([df, pd.DataFrame([signal])], ignore_index=True)
-            new_df.to_csv(self.signals_file, index=False)
+            self._write_signals(new_df)
+            self.open_signals.opened(signal['symbol'])
             print(f"✅ Sinal salvo com sucesso para {signal['symbol']}")
             return True
             
@@ -135,6 +152,41 @@ class Database:
             traceback.print_exc()
             return False
 
+    def add_signals(self, signals: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Grava vários sinais com uma única leitura e uma única escrita atômica do CSV.
+        Sinais de pares com sinal aberto (ou repetidos no lote) são descartados; retorna os gravados.
+        """
+        if not signals:
+            return []
+        try:
+            df = pd.read_csv(self.signals_file)
+            open_symbols = self.open_signals.symbols()
+            if not df.empty:
+                open_symbols.update(df.loc[df['status'] == 'OPEN', 'symbol'].astype(str))
+
+            accepted = []
+            for signal in signals:
+                signal = self._prepare_signal(dict(signal))
+                if signal['symbol'] in open_symbols:
+                    print(f"⚠️ Sinal já existe para {signal['symbol']}")
+                    continue
+                open_symbols.add(signal['symbol'])
+                accepted.append(signal)
+            if not accepted:
+                return []
+
+            self._write_signals(pd.concat([df, pd.DataFrame(accepted)], ignore_index=True))
+            for signal in accepted:
+                self.open_signals.opened(signal['symbol'])
+            print(f"✅ {len(accepted)} sinais salvos em lote")
+            return accepted
+
+        except Exception as e:
+            print(f"❌ Erro ao adicionar sinais em lote: {e}")
+            traceback.print_exc()
+            return []
+
     def set_config(self, key: str, value: str) -> bool:
         """
         Salva uma configuração no arquivo CSV
@@ -0,0 +1,43 @@
+import threading
+from typing import Dict, Iterable
+
+# Estágios da análise, do mais barato ao mais caro
+FILTER_STAGES = (
+    'history',   # histórico de entrada insuficiente (sem custo além da busca)
+    'data',      # sem candles suficientes do timeframe de tendência
+    'trend',     # sem tendência definida no timeframe maior (só features de tendência)
+    'target',    # alvo de 2 ATR abaixo da variação mínima (features de entrada)
+    'quality',   # quality_score abaixo do mínimo (pontuação completa)
+)
+
+
+class FilterStats:
+    """Contadores de candidatos avaliados e rejeitados por estágio, compartilhados entre threads"""
+
+    def __init__(self, stages: Iterable[str] = FILTER_STAGES):
+        self.stages = tuple(stages)
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.evaluated = 0
+            self.accepted = 0
+            self.rejected: Dict[str, int] = {stage: 0 for stage in self.stages}
+
+    def add(self, evaluated: int = 0, accepted: int = 0, **rejected: int) -> None:
+        with self._lock:
+            self.evaluated += evaluated
+            self.accepted += accepted
+            for stage, count in rejected.items():
+                self.rejected[stage] = self.rejected.get(stage, 0) + count
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            return {'evaluated': self.evaluated, 'accepted': self.accepted, 'rejected': dict(self.rejected)}
+
+    def summary(self) -> str:
+        """Ex.: '100 avaliados -> trend -62 -> target -20 -> quality -15 -> 3 sinais'"""
+        stats = self.stats()
+        steps = [f"{stage} -{count}" for stage, count in stats['rejected'].items() if count]
+        return ' -> '.join([f"{stats['evaluated']} avaliados"] + steps + [f"{stats['accepted']} sinais"])
@@ -32,42 +32,46 @@ class GerenciadorSinais:
             return "❌ Score Insuficiente"
         # --- Fim da Edição ---
 
+    def _format_signal(self, signal_data: Dict) -> Dict:
+        """Formata o sinal gerado pela análise no layout do arquivo de sinais"""
+        formatted_signal = {
+            'symbol': signal_data['symbol'],
+            'type': signal_data['type'],
+            'entry_price': float(signal_data['entry_price']),
+            'entry_time': signal_data['entry_time'],
+            'target_price': float(signal_data['target_price']),
+            'target_exit_time': signal_data['target_exit_time'],
+            'status': 'OPEN',
+            'exit_price': '',
+            'variation': '',
+            'result': '',
+            'quality_score': float(signal_data['quality_score']),
+            'signal_class': self._get_signal_class(float(signal_data['quality_score'])),
+            'trend_score': float(signal_data.get('trend_score', 0)),
+            'alignment_score': float(signal_data.get('alignment_score', 0)),
+            'market_score': float(signal_data.get('market_score', 0)),
+            'strategy_info': str(signal_data.get('strategy_info', '')),
+            'trend_timeframe': str(signal_data.get('trend_timeframe', '4h')),
+            'entry_timeframe': str(signal_data.get('entry_timeframe', '1h')),
+            'trend_strength': float(signal_data.get('trend_strength', 0)),
+            'confluence_count': float(signal_data.get('confluence_count', 0)),
+            'leverage': float(signal_data.get('leverage', 50.0)),
+            'max_exit_time': signal_data.get('max_exit_time', ''),
+            'expected_duration': signal_data.get('expected_duration', '1-3 dias (típico), até 7 dias (normal), máximo 15 dias')
+        }
+        
+        # Converter valores NaN para string vazia
+        for key in formatted_signal:
+            if pd.isna(formatted_signal[key]):
+                formatted_signal[key] = ''
+        return formatted_signal
+
     def save_signal(self, signal_data: Dict) -> bool:
         try:
             print(f"Tentando salvar sinal: {signal_data}")  # Debug
             
             # Formatar o sinal antes de salvar
-            formatted_signal = {
-                'symbol': signal_data['symbol'],
-                'type': signal_data['type'],
-                'entry_price': float(signal_data['entry_price']),
-                'entry_time': signal_data['entry_time'],
-                'target_price': float(signal_data['target_price']),
-                'target_exit_time': signal_data['target_exit_time'],
-                'status': 'OPEN',
-                'exit_price': '',
-                'variation': '',
-                'result': '',
-                'quality_score': float(signal_data['quality_score']),
-                'signal_class': self._get_signal_class(float(signal_data['quality_score'])),
-                'trend_score': float(signal_data.get('trend_score', 0)),
-                'alignment_score': float(signal_data.get('alignment_score', 0)),
-                'market_score': float(signal_data.get('market_score', 0)),
-                'strategy_info': str(signal_data.get('strategy_info', '')),
-                'trend_timeframe': str(signal_data.get('trend_timeframe', '4h')),
-                'entry_timeframe': str(signal_data.get('entry_timeframe', '1h')),
-                'trend_strength': float(signal_data.get('trend_strength', 0)),
-                'confluence_count': float(signal_data.get('confluence_count', 0)),
-                'leverage': float(signal_data.get('leverage', 50.0)),
-                'max_exit_time': signal_data.get('max_exit_time', ''),
-                'expected_duration': signal_data.get('expected_duration', '1-3 dias (típico), até 7 dias (normal), máximo 15 dias')
-            }
-            
-            # Converter valores NaN para string vazia
-            for key in formatted_signal:
-                if pd.isna(formatted_signal[key]):
-                    formatted_signal[key] = ''
-            
+            formatted_signal = self._format_signal(signal_data)
             print(f"Sinal formatado para salvar: {formatted_signal}")
             
             result = self.db.add_signal(formatted_signal)
@@ -82,6 +86,23 @@ class GerenciadorSinais:
             traceback.print_exc()
             return False
 
+    def batch(self) -> 'SignalBatch':
+        """Unidade de trabalho: acumula os sinais de um ciclo e grava todos de uma vez"""
+        return SignalBatch(self)
+
+    def save_signals(self, signals: List[Dict]) -> List[Dict]:
+        """Formata e grava vários sinais numa única escrita; retorna os sinais (originais) salvos"""
+        formatted = {}
+        for signal in signals:
+            if signal.get('symbol') in formatted:
+                continue
+            try:
+                formatted[signal['symbol']] = (signal, self._format_signal(signal))
+            except Exception as e:
+                print(f"❌ Erro ao formatar sinal {signal.get('symbol')}: {e}")
+        saved = self.db.add_signals([f for _, f in formatted.values()])
+        return [formatted[s['symbol']][0] for s in saved]
+
     def clean_scalping_signals(self):
         """Limpa todos os sinais de scalping à meia-noite"""
         try:
@@ -204,6 +225,7 @@ class GerenciadorSinais:
             df.loc[mask, 'exit_time'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
             
             df.to_csv(self.signals_file, index=False)
+            self.db.open_signals.closed(symbol)
             print(f"✅ Sinal atualizado: {symbol}")
             return True
             
@@ -334,4 +356,30 @@ class GerenciadorSinais:
             print(f"✅ Limpeza concluída. {cleaned_count} sinais removidos.")
 
         except Exception as e:
-            print(f"❌ Erro ao limpar sinais: {e}")
\ No newline at end of file
+            print(f"❌ Erro ao limpar sinais: {e}")
+
+
+class SignalBatch:
+    """
+    Sinais pendentes de um ciclo de scan. `commit` descarta os pares com sinal aberto
+    (pelo índice em memória) e grava o restante numa única escrita atômica.
+    Como gerenciador de contexto, grava ao sair do bloco sem exceção.
+    """
+
+    def __init__(self, gerenciador: GerenciadorSinais):
+        self.gerenciador = gerenciador
+        self.pending: List[Dict] = []
+
+    def add(self, signal: Dict) -> None:
+        self.pending.append(signal)
+
+    def commit(self) -> List[Dict]:
+        pending, self.pending = self.pending, []
+        return self.gerenciador.save_signals(pending)
+
+    def __enter__(self) -> 'SignalBatch':
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.commit()
@@ -0,0 +1,120 @@
+import random
+import threading
+import time
+from collections import defaultdict, deque
+from typing import Any, Deque, Dict, Optional
+from urllib.parse import urlparse
+import numpy as np
+import requests
+from requests.adapters import HTTPAdapter
+from config import server
+
+# Métodos que podem ser repetidos com segurança após timeout de leitura ou erro 5xx
+IDEMPOTENT_METHODS = {'GET', 'HEAD', 'OPTIONS', 'DELETE'}
+
+
+class HttpTransport:
+    """Sessão HTTP compartilhada: keep-alive por host, gzip, timeout padrão, retry e latência por host"""
+
+    def __init__(self, timeout: float = 10, max_retries: int = 3, backoff: float = 0.5, pool_size: int = 20):
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session = requests.Session()
+        self.session.headers.update({'Accept-Encoding': 'gzip, deflate'})
+        self.attach(self.session)
+        self._latencies: Dict[str, Deque[float]] = defaultdict(lambda: deque(maxlen=500))
+        self._counts: Dict[str, Dict[str, int]] = defaultdict(lambda: {'requests': 0, 'errors': 0, 'retries': 0})
+        self._stats_lock = threading.Lock()
+
+    def attach(self, session: requests.Session) -> None:
+        """Faz outra sessão (ex.: a do client da Binance) usar o mesmo pool de conexões e as estatísticas"""
+        session.mount('https://', self.adapter)
+        session.mount('http://', self.adapter)
+        if session is not self.session:
+            session.hooks['response'].append(self._on_response)
+
+    def _on_response(self, response: requests.Response, *args, **kwargs) -> None:
+        self.record(urlparse(response.url).netloc, response.elapsed.total_seconds())
+
+    def record(self, host: str, seconds: Optional[float], error: bool = False, retry: bool = False) -> None:
+        """Contabiliza uma requisição (ou retry) de `host`; usado também por clientes fora da sessão requests"""
+        with self._stats_lock:
+            counts = self._counts[host]
+            if retry:
+                counts['retries'] += 1
+                return
+            counts['requests'] += 1
+            if error:
+                counts['errors'] += 1
+            if seconds is not None:
+                self._latencies[host].append(seconds * 1000)
+
+    def _sleep_before_retry(self, attempt: int) -> None:
+        # Backoff exponencial com jitter completo
+        time.sleep(random.uniform(0, self.backoff * (2 ** attempt)))
+
+    def request(self, method: str, url: str, **kwargs: Any) -> requests.Response:
+        method = method.upper()
+        host = urlparse(url).netloc
+        kwargs.setdefault('timeout', self.timeout)
+        for attempt in range(self.max_retries + 1):
+            start = time.perf_counter()
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                self.record(host, None, error=True)
+                # Sem resposta: só repetir POST se a conexão nem chegou a ser estabelecida
+                can_retry = method in IDEMPOTENT_METHODS or isinstance(e, requests.exceptions.ConnectTimeout)
+                if attempt < self.max_retries and can_retry:
+                    self.record(host, None, retry=True)
+                    self._sleep_before_retry(attempt)
+                    continue
+                raise
+            self.record(host, time.perf_counter() - start, error=response.status_code >= 500)
+            if response.status_code >= 500 and method in IDEMPOTENT_METHODS and attempt < self.max_retries:
+                self.record(host, None, retry=True)
+                self._sleep_before_retry(attempt)
+                continue
+            return response
+        raise RuntimeError('unreachable')
+
+    def get(self, url: str, **kwargs: Any) -> requests.Response:
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url: str, **kwargs: Any) -> requests.Response:
+        return self.request('POST', url, **kwargs)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Latência (ms) e contadores por host"""
+        with self._stats_lock:
+            result = {}
+            for host, counts in self._counts.items():
+                samples = np.array(self._latencies[host]) if self._latencies[host] else None
+                result[host] = {
+                    **counts,
+                    'avg_ms': round(float(samples.mean()), 1) if samples is not None else None,
+                    'p95_ms': round(float(np.percentile(samples, 95)), 1) if samples is not None else None,
+                    'max_ms': round(float(samples.max()), 1) if samples is not None else None,
+                }
+            return result
+
+
+_transport: Optional[HttpTransport] = None
+_transport_lock = threading.Lock()
+
+
+def get_transport() -> HttpTransport:
+    """Retorna o transporte HTTP compartilhado por todo o processo"""
+    global _transport
+    with _transport_lock:
+        if _transport is None:
+            config = server.config['HTTP']
+            _transport = HttpTransport(
+                timeout=config['TIMEOUT'],
+                max_retries=config['MAX_RETRIES'],
+                backoff=config['BACKOFF'],
+                pool_size=config['POOL_SIZE']
+            )
+        return _transport
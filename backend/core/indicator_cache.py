@@ -0,0 +1,84 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+import pandas as pd
+
+
+def candle_fingerprint(candles: Any) -> Tuple:
+    """
+    Identifica o histórico pelo último candle: quantidade de candles, close_time e OHLCV do último.
+    Os valores entram na chave porque o último candle pode estar em andamento.
+    """
+    n = len(candles)
+    if n == 0:
+        return (0,)
+    if isinstance(candles, pd.DataFrame):
+        last = candles.iloc[-1]
+    else:
+        last = candles[-1]
+    return (n, int(last['close_time']), float(last['high']), float(last['low']),
+            float(last['close']), float(last['volume']))
+
+
+class IndicatorCache:
+    """Cache LRU de resultados de indicadores por (símbolo, timeframe, indicador, parâmetros, último candle)"""
+
+    def __init__(self, max_entries: int = 4096):
+        self.max_entries = max_entries
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_or_compute(self, symbol: str, interval: str, indicator: str, params: Tuple,
+                       candles: Any, compute: Callable[[], Any]) -> Any:
+        key = (symbol, interval, indicator, params, candle_fingerprint(candles))
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / total, 3) if total else None
+            }
+
+
+_cache: Optional[IndicatorCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_indicator_cache() -> IndicatorCache:
+    """Retorna o cache de indicadores compartilhado por todo o processo"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = IndicatorCache()
+        return _cache
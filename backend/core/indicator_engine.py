@@ -0,0 +1,118 @@
+import numpy as np
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from . import kernels
+from .signal_rules import (ATR_WINDOW, ENTRY_EMA_FAST, ENTRY_EMA_SLOW, LOOKBACK, RSI_WINDOW,
+                           TREND_EMA, TREND_EMA_LONG, TREND_EMA_SLOW)
+from .indicator_cache import IndicatorCache, candle_fingerprint
+
+Features = Dict[str, np.ndarray]
+
+
+def stack_records(records_by_symbol: Dict[str, np.ndarray]) -> List[Tuple[List[str], np.ndarray]]:
+    """
+    Agrupa os símbolos com a mesma quantidade de candles em matrizes (símbolos × candles).
+    Normalmente todos têm o mesmo histórico e sai um único grupo.
+    """
+    groups = defaultdict(list)
+    for symbol, records in records_by_symbol.items():
+        if records is not None and len(records):
+            groups[len(records)].append(symbol)
+    return [
+        (symbols, np.stack([records_by_symbol[s] for s in symbols]))
+        for symbols in groups.values()
+    ]
+
+
+def _slope(values: np.ndarray, lookback: int = LOOKBACK) -> np.ndarray:
+    """Variação percentual entre o último valor e o de `lookback` candles atrás"""
+    if values.shape[-1] <= lookback:
+        return np.full(values.shape[:-1], np.nan)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return (values[..., -1] - values[..., -1 - lookback]) / values[..., -1 - lookback] * 100
+
+
+def _direction(close: np.ndarray, lookback: int = LOOKBACK) -> np.ndarray:
+    """Fechamento atual acima do de `lookback` candles atrás"""
+    if close.shape[-1] <= lookback:
+        return np.zeros(close.shape[:-1], dtype=bool)
+    return close[..., -1] > close[..., -1 - lookback]
+
+
+def trend_features(matrix: np.ndarray) -> Features:
+    """Features do timeframe de tendência (EMA20/50/200 e inclinações) para cada linha"""
+    close = np.ascontiguousarray(matrix['close'])
+    ema20 = kernels.ema(close, TREND_EMA)
+    ema50 = kernels.ema(close, TREND_EMA_SLOW)
+    ema200 = kernels.ema(close, TREND_EMA_LONG)
+    return {
+        'price': close[..., -1],
+        'ema20': ema20[..., -1],
+        'ema50': ema50[..., -1],
+        'ema200': ema200[..., -1],
+        'ema20_slope': _slope(ema20),
+        'ema50_slope': _slope(ema50),
+        'direction': _direction(close),
+    }
+
+
+def entry_features(matrix: np.ndarray) -> Features:
+    """Features do timeframe de entrada (EMA8/21, RSI14, ATR14, volume) para cada linha"""
+    high = np.ascontiguousarray(matrix['high'])
+    low = np.ascontiguousarray(matrix['low'])
+    close = np.ascontiguousarray(matrix['close'])
+    price = close[..., -1]
+    atr = kernels.atr(high, low, close, ATR_WINDOW)[..., -1]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        volatility = np.where(price != 0, atr / price * 100, 0.0)
+    return {
+        'price': price,
+        'ema8': kernels.ema(close, ENTRY_EMA_FAST)[..., -1],
+        'ema21': kernels.ema(close, ENTRY_EMA_SLOW)[..., -1],
+        'rsi': kernels.rsi(close, RSI_WINDOW)[..., -1],
+        'atr': atr,
+        'volatility': volatility,
+        'quote_volume': matrix['volume'][..., -1] * price,
+        'direction': _direction(close),
+    }
+
+
+def compute_universe(records_by_symbol: Dict[str, np.ndarray], features: Callable[[np.ndarray], Features],
+                     interval: Optional[str] = None,
+                     cache: Optional[IndicatorCache] = None) -> Tuple[List[str], Features]:
+    """
+    Calcula as features de todos os símbolos de uma vez; os arrays seguem a ordem da lista retornada.
+    Com `cache`, símbolos cujo último candle não mudou reaproveitam as features já calculadas.
+    """
+    symbols: List[str] = []
+    rows: List[Dict[str, Any]] = []
+    pending = {}
+    for symbol, records in records_by_symbol.items():
+        if records is None or len(records) == 0:
+            continue
+        row = None
+        if cache is not None:
+            row = cache.get((symbol, interval, features.__name__, (), candle_fingerprint(records)))
+        if row is None:
+            pending[symbol] = records
+        else:
+            symbols.append(symbol)
+            rows.append(row)
+
+    parts: Dict[str, List[np.ndarray]] = defaultdict(list)
+    for group_symbols, matrix in stack_records(pending):
+        computed = features(matrix)
+        for name, values in computed.items():
+            parts[name].append(values)
+        if cache is not None:
+            for i, symbol in enumerate(group_symbols):
+                key = (symbol, interval, features.__name__, (), candle_fingerprint(pending[symbol]))
+                cache.put(key, {name: values[i] for name, values in computed.items()})
+        symbols.extend(group_symbols)
+
+    # Os símbolos em cache vêm primeiro, seguidos dos calculados agora
+    result = {}
+    for name in (rows[0] if rows else parts):
+        cached = [np.array([row[name] for row in rows])] if rows else []
+        result[name] = np.concatenate(cached + parts[name])
+    return symbols, result
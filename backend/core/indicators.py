@@ -1,32 +1,144 @@
+import numpy as np
 import pandas as pd
-from ta.trend import EMAIndicator, MACD
-from ta.momentum import RSIIndicator, StochasticOscillator
-from ta.volatility import BollingerBands
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
 from config import server
+from . import kernels
+
+# Colunas de candle disponíveis como entrada das features
+BASE_COLUMNS = ('open', 'high', 'low', 'close', 'volume')
+
+# Nomes de coluna usados historicamente por calculate_all
+LEGACY_COLUMNS = {
+    'ema_fast': 'ema_9',
+    'ema_slow': 'ema_21',
+    'rsi': 'rsi',
+    'macd': 'macd',
+    'macd_signal': 'macd_signal',
+    'bb_upper': 'bb_upper',
+    'bb_lower': 'bb_lower',
+}
+
+
+class Feature:
+    """
+    Indicador nomeado: entradas (colunas de candle ou outras features) e a função que o calcula.
+    Features com a mesma `key` são calculadas uma única vez por execução.
+    """
+
+    __slots__ = ('name', 'inputs', 'compute', 'key')
+
+    def __init__(self, name: str, inputs: Tuple[str, ...], compute: Callable[..., np.ndarray],
+                 key: Optional[Tuple] = None):
+        self.name = name
+        self.inputs = inputs
+        self.compute = compute
+        self.key = key or (name,)
+
+
+def default_features(config: Dict[str, Any]) -> Dict[str, Feature]:
+    """Catálogo de features a partir de server.config['TRADING']['INDICATORS']"""
+    ema, rsi, macd, bb = config['EMA'], config['RSI'], config['MACD'], config['BB']
+    atr_window = config.get('ATR', {}).get('window', 14)
+
+    def ema_feature(name: str, window: int, source: str = 'close') -> Feature:
+        return Feature(name, (source,), lambda x: kernels.ema(x, window), key=('ema', source, window))
+
+    features = [
+        ema_feature('ema_fast', ema['fast']),
+        ema_feature('ema_slow', ema['slow']),
+        Feature('rsi', ('close',), lambda close: kernels.rsi(close, rsi['window']), key=('rsi', rsi['window'])),
+        Feature('atr', ('high', 'low', 'close'), lambda high, low, close: kernels.atr(high, low, close, atr_window),
+                key=('atr', atr_window)),
+
+        # MACD: EMAs intermediárias compartilhadas com qualquer outra EMA de mesma janela
+        ema_feature('macd_ema_fast', macd['fast']),
+        ema_feature('macd_ema_slow', macd['slow']),
+        Feature('macd', ('macd_ema_fast', 'macd_ema_slow'), np.subtract),
+        ema_feature('macd_signal', macd['signal'], source='macd'),
+        Feature('macd_diff', ('macd', 'macd_signal'), np.subtract),
+
+        # Bandas de Bollinger
+        Feature('bb_mavg', ('close',), lambda close: kernels.rolling_mean(close, bb['window']),
+                key=('sma', bb['window'])),
+        Feature('bb_std', ('close',), lambda close: kernels.rolling_std(close, bb['window']),
+                key=('std', bb['window'])),
+        Feature('bb_upper', ('bb_mavg', 'bb_std'), lambda mavg, std: mavg + bb['std'] * std),
+        Feature('bb_lower', ('bb_mavg', 'bb_std'), lambda mavg, std: mavg - bb['std'] * std),
+        Feature('bb_width', ('bb_upper', 'bb_lower', 'bb_mavg'), lambda upper, lower, mavg: (upper - lower) / mavg),
+    ]
+    return {feature.name: feature for feature in features}
+
 
 class TechnicalIndicators:
-    def __init__(self):
-        self.config = server.config['TRADING']['INDICATORS']
+    def __init__(self, config: Optional[Dict[str, Any]] = None, dtype: Any = np.float64):
+        self.config = config or server.config['TRADING']['INDICATORS']
+        self.dtype = dtype
+        self.features = default_features(self.config)
+
+    def resolve(self, names: Iterable[str]) -> List[str]:
+        """Ordena as features pedidas e suas dependências (cada uma depois das que ela usa)"""
+        order: List[str] = []
+        visiting = set()
+
+        def visit(name: str) -> None:
+            if name in order or name in BASE_COLUMNS:
+                return
+            if name not in self.features:
+                raise ValueError(f"Indicador desconhecido: {name}")
+            if name in visiting:
+                raise ValueError(f"Dependência circular em {name}")
+            visiting.add(name)
+            for dependency in self.features[name].inputs:
+                visit(dependency)
+            visiting.discard(name)
+            order.append(name)
+
+        for name in names:
+            visit(name)
+        return order
+
+    def compute_arrays(self, data: Any, names: Iterable[str]) -> Dict[str, np.ndarray]:
+        """
+        Calcula apenas as features pedidas (e o que elas exigem) a partir de um DataFrame,
+        Candles ou array de candles; aceita também matrizes (símbolos × candles).
+        """
+        names = list(names)
+        values: Dict[str, np.ndarray] = {}
+        by_key: Dict[Tuple, np.ndarray] = {}
+        for name in self.resolve(names):
+            feature = self.features[name]
+            if feature.key not in by_key:
+                inputs = [values[i] if i in values else self._column(data, i) for i in feature.inputs]
+                by_key[feature.key] = feature.compute(*inputs)
+            values[name] = by_key[feature.key]
+        return {name: values[name] for name in names}
+
+    def compute(self, data: Any, names: Iterable[str], dtype: Any = None,
+                out: Optional[np.ndarray] = None) -> pd.DataFrame:
+        """
+        Grava as features pedidas num bloco (candles × features) pré-alocado e o retorna como DataFrame.
+        `out` permite reaproveitar o mesmo bloco entre chamadas; `dtype` pode ser np.float32.
+        """
+        names = list(names)
+        n = len(data)
+        if out is None:
+            out = np.empty((n, len(names)), dtype=dtype or self.dtype, order='F')
+        elif out.shape != (n, len(names)):
+            raise ValueError(f"Bloco de saída com formato {out.shape}, esperado {(n, len(names))}")
+
+        for j, values in enumerate(self.compute_arrays(data, names).values()):
+            out[:, j] = values
+
+        index = data.index if isinstance(data, pd.DataFrame) else None
+        return pd.DataFrame(out, columns=names, index=index, copy=False)
+
+    @staticmethod
+    def _column(data: Any, name: str) -> np.ndarray:
+        return np.asarray(data[name], dtype=np.float64)
 
     def calculate_all(self, df: pd.DataFrame) -> pd.DataFrame:
         """Calcula todos os indicadores técnicos"""
-        close_series = pd.Series(df['close'])
-        
-        # EMAs
-        df['ema_9'] = EMAIndicator(close_series, window=self.config['EMA']['fast']).ema_indicator()
-        df['ema_21'] = EMAIndicator(close_series, window=self.config['EMA']['slow']).ema_indicator()
-        
-        # RSI
-        df['rsi'] = RSIIndicator(close_series, window=self.config['RSI']['window']).rsi()
-        
-        # MACD
-        macd = MACD(close_series)
-        df['macd'] = macd.macd()
-        df['macd_signal'] = macd.macd_signal()
-        
-        # Bollinger Bands
-        bb = BollingerBands(close_series, window=self.config['BB']['window'])
-        df['bb_upper'] = bb.bollinger_hband()
-        df['bb_lower'] = bb.bollinger_lband()
-        
-        return df
\ No newline at end of file
+        result = self.compute_arrays(df, LEGACY_COLUMNS)
+        for name, column in LEGACY_COLUMNS.items():
+            df[column] = result[name]
+        return df
@@ -0,0 +1,154 @@
+import numpy as np
+from typing import Tuple
+
+# Kernels numpy dos indicadores usados na análise.
+# Operam sobre o último eixo: aceitam uma série (candles) ou uma matriz (símbolos × candles)
+# e reproduzem os valores da biblioteca `ta` (fillna=False).
+
+
+def _first_valid(x: np.ndarray) -> np.ndarray:
+    """Índice do primeiro valor não-NaN de cada linha (n se a linha for toda NaN)"""
+    valid = ~np.isnan(x)
+    return np.where(valid.any(axis=-1), valid.argmax(axis=-1), x.shape[-1])
+
+
+def ewm(values: np.ndarray, alpha: float, min_periods: int) -> np.ndarray:
+    """
+    Média móvel exponencial equivalente a pandas `ewm(alpha=..., adjust=False)`.
+    NaNs iniciais são ignorados (a média começa no primeiro valor válido de cada linha).
+    """
+    x = np.asarray(values, dtype=np.float64)
+    out = np.full(x.shape, np.nan)
+    n = x.shape[-1]
+    if n == 0:
+        return out
+
+    start = _first_valid(x)
+    first = int(start.min())
+    if first >= n:
+        return out
+    if x.ndim == 1:
+        out[first:] = _ewm_series(x[first:].tolist(), alpha)
+    else:
+        _ewm_matrix(x, out, start, first, alpha)
+
+    # Respeitar o mínimo de observações válidas de cada linha
+    out[np.arange(n) < (start + min_periods - 1)[..., None]] = np.nan
+    return out
+
+
+def _ewm_series(values: list, alpha: float) -> list:
+    # Uma única série: laço em floats do Python é mais rápido que operações numpy por candle
+    prev = values[0]
+    result = [prev]
+    append = result.append
+    for x in values[1:]:
+        if x == x:  # ignora NaN
+            prev += alpha * (x - prev)
+        append(prev)
+    return result
+
+
+def _ewm_matrix(x: np.ndarray, out: np.ndarray, start: np.ndarray, first: int, alpha: float) -> None:
+    # Várias séries: um passo vetorizado por candle, para todas as linhas ao mesmo tempo
+    n = x.shape[-1]
+    lagging = bool((start != first).any())
+    prev = x[..., first].copy()
+    out[..., first] = prev
+    for i in range(first + 1, n):
+        xi = x[..., i]
+        prev += alpha * (xi - prev)
+        if lagging:
+            prev = np.where(start == i, xi, prev)
+        out[..., i] = prev
+
+
+def ema(close: np.ndarray, window: int) -> np.ndarray:
+    """EMA igual a `ta.trend.EMAIndicator(close, window).ema_indicator()`"""
+    return ewm(close, 2.0 / (window + 1), window)
+
+
+def rsi(close: np.ndarray, window: int = 14) -> np.ndarray:
+    """RSI (Wilder) igual a `ta.momentum.RSIIndicator(close, window).rsi()`"""
+    close = np.asarray(close, dtype=np.float64)
+    diff = np.zeros(close.shape)
+    diff[..., 1:] = np.diff(close, axis=-1)
+    up = np.where(diff > 0, diff, 0.0)
+    down = np.where(diff < 0, -diff, 0.0)
+    emaup = ewm(up, 1.0 / window, window)
+    emadn = ewm(down, 1.0 / window, window)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(emadn == 0, 100.0, 100 - (100 / (1 + emaup / emadn)))
+
+
+def true_range(high: np.ndarray, low: np.ndarray, close: np.ndarray) -> np.ndarray:
+    """True range; no primeiro candle (sem fechamento anterior) é apenas máxima - mínima"""
+    high = np.asarray(high, dtype=np.float64)
+    low = np.asarray(low, dtype=np.float64)
+    close = np.asarray(close, dtype=np.float64)
+    tr = high - low
+    prev_close = close[..., :-1]
+    tr[..., 1:] = np.maximum(tr[..., 1:], np.maximum(
+        np.abs(high[..., 1:] - prev_close),
+        np.abs(low[..., 1:] - prev_close)
+    ))
+    return tr
+
+
+def atr(high: np.ndarray, low: np.ndarray, close: np.ndarray, window: int = 14) -> np.ndarray:
+    """ATR (Wilder) igual a `ta.volatility.AverageTrueRange(...).average_true_range()`"""
+    tr = true_range(high, low, close)
+    out = np.zeros(tr.shape)
+    n = tr.shape[-1]
+    if n < window:
+        return out
+    prev = tr[..., :window].mean(axis=-1)
+    out[..., window - 1] = prev
+    if tr.ndim == 1:
+        prev = float(prev)
+        result = []
+        for value in tr[window:].tolist():
+            prev = (prev * (window - 1) + value) / window
+            result.append(prev)
+        out[window:] = result
+        return out
+    for i in range(window, n):
+        prev = (prev * (window - 1) + tr[..., i]) / float(window)
+        out[..., i] = prev
+    return out
+
+
+def _windows(values: np.ndarray, window: int) -> np.ndarray:
+    return np.lib.stride_tricks.sliding_window_view(np.asarray(values, dtype=np.float64), window, axis=-1)
+
+
+def rolling_mean(values: np.ndarray, window: int) -> np.ndarray:
+    """Média móvel simples (NaN até a janela encher), como pandas `rolling(window).mean()`"""
+    values = np.asarray(values, dtype=np.float64)
+    out = np.full(values.shape, np.nan)
+    if values.shape[-1] >= window:
+        out[..., window - 1:] = _windows(values, window).mean(axis=-1)
+    return out
+
+
+def rolling_std(values: np.ndarray, window: int) -> np.ndarray:
+    """Desvio padrão móvel populacional (ddof=0), como em `ta.volatility.BollingerBands`"""
+    values = np.asarray(values, dtype=np.float64)
+    out = np.full(values.shape, np.nan)
+    if values.shape[-1] >= window:
+        out[..., window - 1:] = _windows(values, window).std(axis=-1)
+    return out
+
+
+def bollinger(close: np.ndarray, window: int = 20, window_dev: float = 2) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(média, banda superior, banda inferior) iguais a `ta.volatility.BollingerBands`"""
+    mavg = rolling_mean(close, window)
+    std = rolling_std(close, window)
+    return mavg, mavg + window_dev * std, mavg - window_dev * std
+
+
+def macd(close: np.ndarray, fast: int = 12, slow: int = 26, signal: int = 9) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(macd, sinal, histograma) iguais a `ta.trend.MACD`"""
+    line = ema(close, fast) - ema(close, slow)
+    signal_line = ema(line, signal)
+    return line, signal_line, line - signal_line
@@ -0,0 +1,197 @@
+import os
+import time
+import threading
+import numpy as np
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+# Layout de cada candle no disco: as 7 primeiras colunas de /fapi/v1/klines (as únicas usadas na análise)
+KLINE_DTYPE = np.dtype([
+    ('open_time', '<i8'),
+    ('open', '<f8'),
+    ('high', '<f8'),
+    ('low', '<f8'),
+    ('close', '<f8'),
+    ('volume', '<f8'),
+    ('close_time', '<i8'),
+])
+
+INTERVAL_MS = {
+    '1m': 60_000,
+    '3m': 3 * 60_000,
+    '5m': 5 * 60_000,
+    '15m': 15 * 60_000,
+    '30m': 30 * 60_000,
+    '1h': 3_600_000,
+    '2h': 2 * 3_600_000,
+    '4h': 4 * 3_600_000,
+    '6h': 6 * 3_600_000,
+    '8h': 8 * 3_600_000,
+    '12h': 12 * 3_600_000,
+    '1d': 86_400_000,
+    '3d': 3 * 86_400_000,
+    '1w': 7 * 86_400_000,
+}
+
+# Limite máximo de candles por requisição em /fapi/v1/klines
+MAX_FETCH_LIMIT = 1500
+
+# Assinatura: fetch(start_time, limit) -> klines (lista no formato da Binance ou array KLINE_DTYPE)
+KlineFetcher = Callable[[Optional[int], int], Optional[Union[List[Sequence], np.ndarray]]]
+
+
+def klines_to_records(klines: Union[List[Sequence], np.ndarray]) -> np.ndarray:
+    """Converte a resposta de klines da Binance em um array estruturado"""
+    if isinstance(klines, np.ndarray):
+        return klines
+    records = np.empty(len(klines), dtype=KLINE_DTYPE)
+    for i, name in enumerate(KLINE_DTYPE.names):
+        records[name] = np.array([k[i] for k in klines], dtype=KLINE_DTYPE[name])
+    return records
+
+
+def closed_klines(records: np.ndarray, now_ms: Optional[int] = None) -> np.ndarray:
+    """Sem o candle em andamento (close_time ainda no futuro), se houver"""
+    if now_ms is None:
+        now_ms = int(time.time() * 1000)
+    if len(records) and records['close_time'][-1] >= now_ms:
+        return records[:-1]
+    return records
+
+
+class KlineStore:
+    """Armazena candles OHLCV por (símbolo, intervalo) em arquivos memory-mapped no disco"""
+
+    def __init__(self, base_dir: Optional[str] = None, max_candles: int = MAX_FETCH_LIMIT):
+        if base_dir is None:
+            base_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'klines')
+        self.base_dir = base_dir
+        self.max_candles = max_candles
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+        self._synced_at: Dict[str, float] = {}
+        os.makedirs(self.base_dir, exist_ok=True)
+
+    def _path(self, symbol: str, interval: str) -> str:
+        return os.path.join(self.base_dir, f"{symbol}_{interval}.ohlcv")
+
+    def _lock(self, symbol: str, interval: str) -> threading.Lock:
+        key = f"{symbol}_{interval}"
+        with self._locks_guard:
+            if key not in self._locks:
+                self._locks[key] = threading.Lock()
+            return self._locks[key]
+
+    def _count(self, path: str) -> int:
+        if not os.path.exists(path):
+            return 0
+        return os.path.getsize(path) // KLINE_DTYPE.itemsize
+
+    def _read(self, path: str, start: int = 0) -> np.ndarray:
+        """Lê os registros a partir de `start` e devolve uma cópia (o mapa é fechado logo em seguida)"""
+        count = self._count(path)
+        if count <= start:
+            return np.empty(0, dtype=KLINE_DTYPE)
+        mapped = np.memmap(path, dtype=KLINE_DTYPE, mode='r', shape=(count,))
+        records = np.array(mapped[start:])
+        del mapped
+        return records
+
+    def load(self, symbol: str, interval: str, limit: Optional[int] = None) -> np.ndarray:
+        """Retorna os últimos `limit` candles armazenados (todos se limit for None)"""
+        path = self._path(symbol, interval)
+        with self._lock(symbol, interval):
+            start = 0
+            if limit is not None:
+                start = max(0, self._count(path) - limit)
+            return self._read(path, start)
+
+    def last_candle(self, symbol: str, interval: str) -> Optional[np.void]:
+        records = self.load(symbol, interval, limit=1)
+        return records[0] if len(records) else None
+
+    def _merge(self, path: str, records: np.ndarray) -> None:
+        """Substitui os candles a partir do primeiro open_time recebido e anexa o restante"""
+        count = self._count(path)
+        keep = count
+        if count:
+            mapped = np.memmap(path, dtype=KLINE_DTYPE, mode='r', shape=(count,))
+            keep = int(np.searchsorted(mapped['open_time'], records['open_time'][0], side='left'))
+            del mapped
+
+        if keep + len(records) > self.max_candles * 2:
+            # Compactar: reescrever apenas os candles mais recentes
+            existing = self._read(path)[:keep]
+            merged = np.concatenate([existing, records])[-self.max_candles:]
+            tmp_path = path + '.tmp'
+            merged.tofile(tmp_path)
+            os.replace(tmp_path, path)
+            return
+
+        if count:
+            os.truncate(path, keep * KLINE_DTYPE.itemsize)
+        with open(path, 'ab') as f:
+            f.write(records.tobytes())
+
+    def _replace(self, path: str, records: np.ndarray) -> None:
+        tmp_path = path + '.tmp'
+        records.tofile(tmp_path)
+        os.replace(tmp_path, path)
+
+    def is_fresh(self, symbol: str, interval: str, max_age: float) -> bool:
+        """Indica se o par foi sincronizado com a API há menos de `max_age` segundos"""
+        synced_at = self._synced_at.get(f"{symbol}_{interval}")
+        return synced_at is not None and time.time() - synced_at < max_age
+
+    def plan(self, symbol: str, interval: str, limit: int) -> Tuple[Optional[int], int]:
+        """
+        Calcula (start_time, limit) da próxima requisição: apenas candles mais novos que o
+        último close_time salvo, ou o histórico completo se não houver dados suficientes.
+        """
+        interval_ms = INTERVAL_MS[interval]
+        path = self._path(symbol, interval)
+        with self._lock(symbol, interval):
+            stored = self._count(path)
+            last = self._read(path, stored - 1) if stored else None
+
+        fetch_limit = min(limit, MAX_FETCH_LIMIT)
+        if last is None or stored < limit:
+            return None, fetch_limit
+
+        now_ms = int(time.time() * 1000)
+        last_open = int(last['open_time'][0])
+        last_close = int(last['close_time'][0])
+        # Candle em andamento precisa ser atualizado; fechado, buscar só os seguintes
+        start_time = last_open if last_close >= now_ms else last_close + 1
+        missing = (now_ms - start_time) // interval_ms + 1
+        if missing >= MAX_FETCH_LIMIT:
+            # Lacuna maior que uma requisição: recomeçar do zero
+            return None, fetch_limit
+        return start_time, int(missing) + 1
+
+    def apply(self, symbol: str, interval: str, limit: int, start_time: Optional[int],
+              klines: Union[List[Sequence], np.ndarray]) -> np.ndarray:
+        """Grava os klines recebidos para a requisição planejada e retorna os últimos `limit` candles"""
+        path = self._path(symbol, interval)
+        with self._lock(symbol, interval):
+            if len(klines):
+                records = klines_to_records(klines)
+                if start_time is None:
+                    self._replace(path, records)
+                else:
+                    self._merge(path, records)
+            self._synced_at[f"{symbol}_{interval}"] = time.time()
+            return self._read(path, max(0, self._count(path) - limit))
+
+    def sync(self, symbol: str, interval: str, limit: int, fetch: KlineFetcher,
+             max_age: float = 0) -> Optional[np.ndarray]:
+        """Atualiza o armazenamento com os candles novos e retorna os últimos `limit` candles"""
+        if max_age and self.is_fresh(symbol, interval, max_age):
+            records = self.load(symbol, interval, limit)
+            if len(records) >= limit:
+                return records
+
+        start_time, fetch_limit = self.plan(symbol, interval, limit)
+        klines = fetch(start_time, fetch_limit)
+        if klines is None:
+            return None
+        return self.apply(symbol, interval, limit, start_time, klines)
@@ -0,0 +1,205 @@
+import json
+import threading
+import time
+import websocket
+import numpy as np
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from .kline_store import KLINE_DTYPE, INTERVAL_MS
+
+
+class KlineRingBuffer:
+    """Buffer circular de candles (fechados e em andamento) de um par/intervalo"""
+
+    def __init__(self, interval: str, capacity: int = 1000):
+        self.interval_ms = INTERVAL_MS[interval]
+        self.capacity = capacity
+        self._data = np.zeros(capacity, dtype=KLINE_DTYPE)
+        self._head = 0  # posição do próximo candle
+        self._count = 0
+        self._lock = threading.Lock()
+        self.seeded = False
+        self.updated_at = 0.0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def seed(self, records: np.ndarray) -> None:
+        """Carrega o histórico inicial (ex.: vindo do KlineStore)"""
+        with self._lock:
+            records = records[-self.capacity:]
+            self._data[:len(records)] = records
+            self._count = len(records)
+            self._head = len(records) % self.capacity
+            self.seeded = len(records) > 0
+            self.updated_at = time.time()
+
+    def update(self, record: Tuple) -> None:
+        """Atualiza o candle em andamento ou anexa um novo candle"""
+        with self._lock:
+            if not self.seeded:
+                return
+            last_idx = (self._head - 1) % self.capacity
+            last_open = int(self._data['open_time'][last_idx])
+            open_time = record[0]
+            if open_time == last_open:
+                self._data[last_idx] = record
+            elif open_time == last_open + self.interval_ms:
+                self._data[self._head] = record
+                self._head = (self._head + 1) % self.capacity
+                self._count = min(self._count + 1, self.capacity)
+            elif open_time > last_open:
+                # Candles perdidos (ex.: reconexão): exigir nova carga via REST
+                self.seeded = False
+                return
+            else:
+                return
+            self.updated_at = time.time()
+
+    def snapshot(self, limit: int) -> Optional[np.ndarray]:
+        """Retorna uma cópia ordenada dos últimos `limit` candles, ou None se não houver o suficiente"""
+        with self._lock:
+            if not self.seeded or self._count < limit:
+                return None
+            start = (self._head - limit) % self.capacity
+            if start < self._head:
+                return self._data[start:self._head].copy()
+            return np.concatenate([self._data[start:], self._data[:self._head]])
+
+
+class KlineStreamIngester:
+    """Recebe klines de todos os pares via combined streams da Binance Futures"""
+
+    STREAM_URL = 'wss://fstream.binance.com/stream?streams='
+    MAX_STREAMS_PER_CONNECTION = 200
+
+    def __init__(self, intervals: Iterable[str] = ('1h', '4h'), capacity: int = 1000, max_silence: float = 90):
+        self.intervals = list(intervals)
+        self.capacity = capacity
+        self.max_silence = max_silence
+        self.buffers: Dict[Tuple[str, str], KlineRingBuffer] = {}
+        self._connections: List[websocket.WebSocketApp] = []
+        self._threads: List[threading.Thread] = []
+        self._running = False
+        self._generation = 0
+        # Cada conexão (shard) tem a sua última mensagem: uma conexão caída não passa por viva
+        self._shard_of: Dict[Tuple[str, str], int] = {}
+        self._shard_last_message: Dict[int, float] = {}
+        self._close_listeners: List[Callable[[str, str, int], None]] = []
+
+    def add_close_listener(self, callback: Callable[[str, str, int], None]) -> None:
+        """Registra `callback(symbol, interval, close_time)`, chamado quando um candle fecha"""
+        self._close_listeners.append(callback)
+
+    @staticmethod
+    def _stream_name(symbol: str, interval: str) -> str:
+        return f"{symbol.lower()}@kline_{interval}"
+
+    def start(self, symbols: Iterable[str]) -> None:
+        """Inicia (ou reinicia) as conexões para a lista de símbolos"""
+        symbols = list(symbols)
+        self.stop()
+        for symbol in symbols:
+            for interval in self.intervals:
+                if (symbol, interval) not in self.buffers:
+                    self.buffers[(symbol, interval)] = KlineRingBuffer(interval, self.capacity)
+
+        keys = [(symbol, interval) for symbol in symbols for interval in self.intervals]
+        streams = [self._stream_name(*key) for key in keys]
+        shards = [
+            streams[i:i + self.MAX_STREAMS_PER_CONNECTION]
+            for i in range(0, len(streams), self.MAX_STREAMS_PER_CONNECTION)
+        ]
+        self._shard_of = {key: i // self.MAX_STREAMS_PER_CONNECTION for i, key in enumerate(keys)}
+        self._shard_last_message = {}
+        self._running = True
+        self._generation += 1
+        for shard in shards:
+            thread = threading.Thread(target=self._run_shard, args=(shard, self._generation), daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        print(f"📡 Stream de klines iniciado: {len(streams)} streams em {len(shards)} conexões")
+
+    def _run_shard(self, streams: List[str], generation: int) -> None:
+        url = self.STREAM_URL + '/'.join(streams)
+        while self._running and generation == self._generation:
+            ws = websocket.WebSocketApp(
+                url,
+                on_message=self._on_message,
+                on_error=self._on_error
+            )
+            self._connections.append(ws)
+            try:
+                ws.run_forever(ping_interval=60, ping_timeout=20)
+            except Exception as e:
+                print(f"❌ Erro no stream de klines: {e}")
+            finally:
+                if ws in self._connections:
+                    self._connections.remove(ws)
+            if self._running and generation == self._generation:
+                time.sleep(5)
+
+    def stop(self) -> None:
+        self._running = False
+        for ws in list(self._connections):
+            try:
+                ws.close()
+            except Exception:
+                pass
+        self._connections = []
+        self._threads = []
+
+    def _on_message(self, ws, message) -> None:
+        try:
+            kline = json.loads(message)['data']['k']
+            key = (kline['s'], kline['i'])
+            buffer = self.buffers.get(key)
+            if buffer is None:
+                return
+            shard = self._shard_of.get(key)
+            if shard is not None:
+                self._shard_last_message[shard] = time.time()
+            buffer.update((
+                int(kline['t']), float(kline['o']), float(kline['h']), float(kline['l']),
+                float(kline['c']), float(kline['v']), int(kline['T'])
+            ))
+            # 'x' indica que este é o candle fechado (última mensagem do intervalo)
+            if kline.get('x'):
+                for callback in self._close_listeners:
+                    callback(kline['s'], kline['i'], int(kline['T']))
+        except Exception as e:
+            print(f"❌ Erro ao processar mensagem do stream: {e}")
+
+    def _on_error(self, ws, error) -> None:
+        print(f"❌ Erro no stream de klines: {error}")
+
+    def is_live(self, symbol: Optional[str] = None, interval: Optional[str] = None) -> bool:
+        """
+        Conexão de `symbol`/`interval` recebendo mensagens nos últimos `max_silence` segundos
+        (sem par: alguma conexão viva)
+        """
+        if not self._running:
+            return False
+        now = time.time()
+        if symbol is None:
+            return any(now - last < self.max_silence for last in self._shard_last_message.values())
+        shard = self._shard_of.get((symbol, interval))
+        if shard is None:
+            return False
+        return now - self._shard_last_message.get(shard, 0.0) < self.max_silence
+
+    def seed(self, symbol: str, interval: str, records: np.ndarray) -> None:
+        buffer = self.buffers.get((symbol, interval))
+        if buffer is not None and len(records):
+            buffer.seed(records)
+
+    def get(self, symbol: str, interval: str, limit: int) -> Optional[np.ndarray]:
+        """
+        Candles do buffer em memória, ou None se o stream não puder atender o pedido
+        (inclusive se a conexão do par estiver em silêncio: o chamador cai para o REST/armazenamento)
+        """
+        if not self.is_live(symbol, interval):
+            return None
+        buffer = self.buffers.get((symbol, interval))
+        if buffer is None:
+            return None
+        return buffer.snapshot(limit)
@@ -0,0 +1,51 @@
+import json
+import os
+import threading
+import time
+from typing import Any, Optional
+
+
+class MetadataCache:
+    """Cache em disco (JSON) de metadados da exchange, com horário de atualização por chave"""
+
+    _lock = threading.Lock()
+
+    def __init__(self, file_path: Optional[str] = None):
+        if file_path is None:
+            file_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'exchange_metadata.json')
+        self.file_path = file_path
+
+    def _read(self) -> dict:
+        try:
+            with open(self.file_path, 'r') as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def get(self, key: str, max_age: Optional[float] = None) -> Optional[Any]:
+        """Retorna o valor salvo (None se não existir ou tiver mais de `max_age` segundos)"""
+        entry = self._read().get(key)
+        if entry is None:
+            return None
+        if max_age is not None and time.time() - entry['updated_at'] > max_age:
+            return None
+        return entry['value']
+
+    def updated_at(self, key: str) -> float:
+        entry = self._read().get(key)
+        return entry['updated_at'] if entry else 0.0
+
+    def set(self, key: str, value: Any) -> bool:
+        try:
+            with self._lock:
+                data = self._read()
+                data[key] = {'value': value, 'updated_at': time.time()}
+                os.makedirs(os.path.dirname(self.file_path), exist_ok=True)
+                tmp_path = self.file_path + '.tmp'
+                with open(tmp_path, 'w') as f:
+                    json.dump(data, f)
+                os.replace(tmp_path, self.file_path)
+            return True
+        except Exception as e:
+            print(f"❌ Erro ao salvar cache de metadados: {e}")
+            return False
@@ -12,8 +12,13 @@ from .database import Database
 from .technical_analysis import TechnicalAnalysis
 from .telegram_notifier import TelegramNotifier
 from .gerenciar_sinais import GerenciadorSinais
+from .weight_governor import get_weight_governor
+from .price_snapshot import PriceSnapshot
+from .http_transport import get_transport
+from .scan_scheduler import ScanScheduler
 from threading import Thread
 import pandas as pd  # Adicione esta linha no topo do arquivo junto com os outros imports
+import numpy as np
 
 # Initialize colorama
 init()
@@ -33,7 +38,16 @@ class Monitor(Thread):
         self.gerenciador = GerenciadorSinais()
         self.analyzer = TechnicalAnalysis()
         self.binance = Client()
+        get_transport().attach(self.binance.session)
+        self.weight_governor = get_weight_governor()
+        self.price_snapshot = PriceSnapshot(self.binance)
         self.check_interval = 60
+        self.scheduler = ScanScheduler(
+            self.analyzer.entry_timeframe,
+            close_grace=server.config['SCAN']['CLOSE_GRACE'],
+            intrabar_interval=server.config['SCAN']['INTRABAR_INTERVAL']
+        )
+        self.analyzer.scan_scheduler = self.scheduler
         self._monitor_running = True
         self._is_running = False
         self.daemon = True
@@ -58,12 +72,21 @@ class Monitor(Thread):
 
     def get_current_price(self, symbol: str) -> Optional[float]:
         """Obtém o preço atual de um par"""
+        preco = self.price_snapshot.get(symbol)
+        if preco is not None:
+            return preco
+        cost = self.weight_governor.acquire('ticker/price', {'symbol': symbol})
         try:
             ticker = self.binance.futures_symbol_ticker(symbol=symbol)
             return float(ticker['price'])
         except Exception as e:
+            if getattr(e, 'status_code', None) in (418, 429):
+                self.weight_governor.backoff(60)
             print(f"❌ Erro ao buscar preço de {symbol}: {e}")
             return None
+        finally:
+            response = getattr(self.binance, 'response', None)
+            self.weight_governor.release(cost, response.headers if response is not None else None)
 
     def calcular_variacao(self, entrada: float, atual: float, tipo: str) -> float:
         """Calcula a variação percentual do preço"""
@@ -78,34 +101,41 @@ class Monitor(Thread):
             if not sinais_abertos.empty:
                 print("\n[MONITOR] 📊 MONITORAMENTO DE SINAIS ATIVOS")
                 print("="*50)
-                table_data = []
-                for _, sinal in sinais_abertos.iterrows():
-                    try:
-                        symbol = str(sinal['symbol'])
-                        preco_atual = self.get_current_price(symbol)
-                        if not preco_atual:
-                            continue
-
-                        entry_time = pd.to_datetime(sinal['entry_time'])
-                        horas_ativas = (datetime.now() - entry_time).total_seconds() / 3600
+                # Um único snapshot de preços para todos os sinais abertos
+                precos = self.price_snapshot.get_prices()
+                sinais = sinais_abertos.assign(
+                    preco_atual=sinais_abertos['symbol'].astype(str).map(precos)
+                )
+                sinais = sinais[sinais['preco_atual'].notna()]
+                # Uma linha com data inválida não pode derrubar o monitoramento das demais
+                entry_time = pd.to_datetime(sinais['entry_time'], errors='coerce')
+                invalidos = entry_time.isna()
+                if invalidos.any():
+                    print(f"[WARN] ⚠️ {int(invalidos.sum())} sinais com entry_time inválido ignorados: "
+                          f"{', '.join(sinais.loc[invalidos, 'symbol'].astype(str))}")
+                    sinais = sinais[~invalidos]
+                    entry_time = entry_time[~invalidos]
 
-                        variacao = self.calcular_variacao(
-                            float(sinal['entry_price']),
-                            preco_atual,
-                            str(sinal['type'])
-                        )
+                entrada = pd.to_numeric(sinais['entry_price'], errors='coerce').to_numpy(dtype=float)
+                atual = sinais['preco_atual'].to_numpy(dtype=float)
+                is_long = sinais['type'].astype(str).str.upper().to_numpy() == 'LONG'
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    variacoes = np.where(is_long, atual - entrada, entrada - atual) / entrada * 100
+                horas_ativas = (
+                    (pd.Timestamp(datetime.now()) - entry_time).dt.total_seconds() / 3600
+                ).to_numpy()
 
-                        cor = Fore.GREEN if variacao > 0 else Fore.RED
-                        table_data.append([
-                            f"{Fore.CYAN}{symbol}{Style.RESET_ALL}",
-                            f"{Fore.YELLOW}{sinal['type']}{Style.RESET_ALL}",
-                            f"{cor}{variacao:+.2f}%{Style.RESET_ALL}",
-                            f"{Fore.WHITE}{horas_ativas:.1f}h{Style.RESET_ALL}"
-                        ])
-
-                    except Exception as e:
-                        print(f"❌ Erro ao processar sinal: {e}")
+                table_data = []
+                for symbol, tipo, variacao, horas in zip(sinais['symbol'], sinais['type'], variacoes, horas_ativas):
+                    if not np.isfinite(variacao):
                         continue
+                    cor = Fore.GREEN if variacao > 0 else Fore.RED
+                    table_data.append([
+                        f"{Fore.CYAN}{symbol}{Style.RESET_ALL}",
+                        f"{Fore.YELLOW}{tipo}{Style.RESET_ALL}",
+                        f"{cor}{variacao:+.2f}%{Style.RESET_ALL}",
+                        f"{Fore.WHITE}{horas:.1f}h{Style.RESET_ALL}"
+                    ])
 
                 if table_data:
                     print(tabulate(
@@ -122,12 +152,13 @@ class Monitor(Thread):
             else:
                 print("[INFO] Nenhum sinal ativo para monitorar")
             
-            time.sleep(self.check_interval)
+            # Um candle fechado interrompe a espera: o próximo scan não fica atrás do monitoramento
+            self.scheduler.wait(self.check_interval)
                 
         except Exception as e:
             print(f"[ERROR] ❌ Erro no loop de monitoramento: {e}")
             print(f"[TRACE] {traceback.format_exc()}")
-            time.sleep(30)
+            self.scheduler.wait(30)
 
     def run(self):
         """Método principal da thread"""
@@ -136,6 +167,13 @@ class Monitor(Thread):
         print("="*70)
         self._is_running = True
         
+        # Receber os candles dos pares monitorados via WebSocket
+        from config import server
+        if server.config['BINANCE_API'].get('KLINE_STREAM'):
+            self.analyzer.start_kline_stream()
+            # Cada candle de entrada fechado agenda a análise do par
+            self.analyzer.kline_stream.add_close_listener(self.scheduler.on_candle_close)
+        
         # --- Início da Edição ---
         # Variável para controlar se a limpeza diária já foi feita hoje
         self._last_cleanup_day = None
@@ -159,8 +197,18 @@ class Monitor(Thread):
                     print("[CLEANUP] ✅ Limpeza diária concluída.")
                 # --- Fim da Edição ---
 
-                print("\n[SCAN] 📡 Escaneando mercado...")  # Adicionado prefixo
-                novos_sinais = self.analyzer.scan_market(verbose=True)
+                # Analisar apenas os pares com candle fechado (ou na reavaliação intrabar)
+                due_symbols = self.scheduler.due(self.analyzer.top_pairs)
+                if due_symbols:
+                    print(f"\n[SCAN] 📡 Escaneando mercado ({len(due_symbols)} pares)...")  # Adicionado prefixo
+                    novos_sinais = self.analyzer.scan_market(
+                        verbose=True, symbols=due_symbols, new_cycle=self.scheduler.new_cycle,
+                        closed_only=self.scheduler.closed_only
+                    )
+                else:
+                    print(f"\n[SCAN] ⏭️ Nenhum candle {self.scheduler.interval} fechado; próximo em "
+                          f"{self.scheduler.seconds_to_next_close() / 60:.0f} min")
+                    novos_sinais = []
                 
                 if novos_sinais:
                     print(f"\n[ALERT] ✨ {len(novos_sinais)} NOVOS SINAIS ENCONTRADOS!")  # Adicionado prefixo
@@ -193,7 +241,9 @@ class Monitor(Thread):
                     if not self._monitor_running:
                         break
                     print(f"\r⌛ Aguardando: {i:3d}s", end="")
-                    time.sleep(1)
+                    # Candle fechado durante a espera: começar o próximo ciclo imediatamente
+                    if self.scheduler.wait(1):
+                        break
                 print("\r" + " "*50)
                 
             except Exception as e:
@@ -211,6 +261,7 @@ class Monitor(Thread):
         print("🛑 Parando monitoramento...")
         self._monitor_running = False
         self._is_running = False
+        self.analyzer.stop_kline_stream()
         if self.is_alive():
             self.join(timeout=2)  # Espera até 2 segundos pela thread terminar
 
@@ -0,0 +1,75 @@
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+from .kline_store import INTERVAL_MS
+
+
+class NegativeCache:
+    """
+    Rejeições recentes por par, válidas até o fechamento do candle de que dependem.
+    Enquanto o candle não fecha o veredito não muda, então o par nem é buscado.
+    Só as razões em `reasons` são guardadas.
+    """
+
+    def __init__(self, reasons: Iterable[str] = ('history', 'data')):
+        self.reasons = set(reasons)
+        self._entries: Dict[str, Tuple[str, int]] = {}  # symbol -> (razão, expira em ms)
+        self._stored: Dict[str, int] = {}
+        self._hits: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _now_ms() -> int:
+        return int(time.time() * 1000)
+
+    def reject(self, symbol: str, reason: str, interval: str, last_open_time: Optional[int] = None) -> None:
+        """
+        Guarda a rejeição até o fechamento do candle `interval` iniciado em `last_open_time`
+        (sem ele, até o próximo fechamento pelo relógio)
+        """
+        if reason not in self.reasons:
+            return
+        interval_ms = INTERVAL_MS[interval]
+        if last_open_time is None:
+            last_open_time = self._now_ms() // interval_ms * interval_ms
+        with self._lock:
+            self._entries[symbol] = (reason, int(last_open_time) + interval_ms)
+            self._stored[reason] = self._stored.get(reason, 0) + 1
+
+    def filter(self, symbols: List[str]) -> List[str]:
+        """Pares de `symbols` sem rejeição válida; as vencidas são descartadas"""
+        now_ms = self._now_ms()
+        result = []
+        with self._lock:
+            for symbol in symbols:
+                entry = self._entries.get(symbol)
+                if entry is None:
+                    result.append(symbol)
+                elif now_ms >= entry[1]:
+                    del self._entries[symbol]
+                    result.append(symbol)
+                else:
+                    self._hits[entry[0]] = self._hits.get(entry[0], 0) + 1
+        return result
+
+    def invalidate(self, symbol: str) -> None:
+        with self._lock:
+            self._entries.pop(symbol, None)
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """
+        Por razão: rejeições guardadas, avaliações evitadas (hits) e a fração
+        das avaliações com esse resultado que o cache poupou
+        """
+        with self._lock:
+            result = {}
+            for reason in sorted(set(self._stored) | set(self._hits)):
+                stored = self._stored.get(reason, 0)
+                hits = self._hits.get(reason, 0)
+                result[reason] = {
+                    'stored': stored,
+                    'hits': hits,
+                    'hit_rate': hits / (hits + stored) if hits + stored else 0.0,
+                    'active': sum(1 for r, _ in self._entries.values() if r == reason),
+                }
+            return result
@@ -0,0 +1,77 @@
+import os
+import threading
+import pandas as pd
+from typing import Dict, Optional, Set, Tuple
+
+
+class OpenSignalIndex:
+    """
+    Conjunto em memória dos pares com sinal OPEN no arquivo de sinais.
+    As gravações feitas por este processo atualizam o índice diretamente; alterações de outros
+    processos são detectadas pelo mtime/tamanho do arquivo, e só então o CSV é relido.
+    """
+
+    def __init__(self, signals_file: str = 'sinais_lista.csv'):
+        self.signals_file = signals_file
+        self._symbols: Set[str] = set()
+        self._stamp: Optional[Tuple[int, int]] = None
+        self._lock = threading.Lock()
+
+    def _file_stamp(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(self.signals_file)
+            return stat.st_mtime_ns, stat.st_size
+        except OSError:
+            return None
+
+    def _refresh(self) -> None:
+        stamp = self._file_stamp()
+        if stamp == self._stamp:
+            return
+        try:
+            df = pd.read_csv(self.signals_file, usecols=['symbol', 'status'])
+            self._symbols = set(df.loc[df['status'] == 'OPEN', 'symbol'].astype(str))
+        except FileNotFoundError:
+            self._symbols = set()
+        except Exception as e:
+            print(f"❌ Erro ao carregar sinais abertos: {e}")
+            return
+        self._stamp = stamp
+
+    def symbols(self) -> Set[str]:
+        with self._lock:
+            self._refresh()
+            return set(self._symbols)
+
+    def contains(self, symbol: str) -> bool:
+        with self._lock:
+            self._refresh()
+            return symbol in self._symbols
+
+    def _written(self, symbol: str, is_open: bool) -> None:
+        """Registra uma gravação deste processo sem reler o arquivo"""
+        with self._lock:
+            if is_open:
+                self._symbols.add(symbol)
+            else:
+                self._symbols.discard(symbol)
+            self._stamp = self._file_stamp()
+
+    def opened(self, symbol: str) -> None:
+        self._written(symbol, True)
+
+    def closed(self, symbol: str) -> None:
+        self._written(symbol, False)
+
+
+_indexes: Dict[str, OpenSignalIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_open_signal_index(signals_file: str = 'sinais_lista.csv') -> OpenSignalIndex:
+    """Índice compartilhado por todo o processo para cada arquivo de sinais"""
+    path = os.path.abspath(signals_file)
+    with _indexes_lock:
+        if path not in _indexes:
+            _indexes[path] = OpenSignalIndex(path)
+        return _indexes[path]
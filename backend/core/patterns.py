@@ -1,22 +1,83 @@
+import numpy as np
 import pandas as pd
+from typing import Any, Dict
+
+# Proporções usadas na classificação dos candles
+DOJI_BODY_RATIO = 0.1       # corpo até 10% da amplitude
+SHADOW_BODY_RATIO = 2.0     # sombra principal de pelo menos 2x o corpo (martelo / estrela cadente)
+OPPOSITE_SHADOW_RATIO = 0.25  # sombra oposta de no máximo 25% da amplitude
+
+# Pontos de cada padrão a favor da direção do sinal
+PATTERN_WEIGHTS = {
+    'LONG': {'bullish_engulfing': 2.0, 'hammer': 1.5, 'outside_bar': 0.5, 'bearish_engulfing': -2.0, 'shooting_star': -1.5},
+    'SHORT': {'bearish_engulfing': 2.0, 'shooting_star': 1.5, 'outside_bar': 0.5, 'bullish_engulfing': -2.0, 'hammer': -1.5},
+}
+
+
+def _previous(values: np.ndarray) -> np.ndarray:
+    """Valor do candle anterior (NaN no primeiro)"""
+    out = np.full(values.shape, np.nan)
+    out[..., 1:] = values[..., :-1]
+    return out
+
+
+def scan_patterns(open_: np.ndarray, high: np.ndarray, low: np.ndarray, close: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Avalia os padrões em todos os candles de uma vez. Aceita uma série ou uma matriz
+    (símbolos × candles) e retorna um array booleano por padrão, do mesmo formato das entradas.
+    """
+    open_ = np.asarray(open_, dtype=np.float64)
+    high = np.asarray(high, dtype=np.float64)
+    low = np.asarray(low, dtype=np.float64)
+    close = np.asarray(close, dtype=np.float64)
+
+    body = np.abs(close - open_)
+    candle_range = high - low
+    upper_shadow = high - np.maximum(open_, close)
+    lower_shadow = np.minimum(open_, close) - low
+    has_range = candle_range > 0
+
+    prev_open = _previous(open_)
+    prev_close = _previous(close)
+    prev_high = _previous(high)
+    prev_low = _previous(low)
+
+    with np.errstate(invalid='ignore'):
+        return {
+            # Mesma definição usada por PricePatterns.check_engulfing
+            'bullish_engulfing': (close > prev_open) & (open_ < prev_open) & (close > prev_close),
+            'bearish_engulfing': (close < prev_open) & (open_ > prev_open) & (close < prev_close),
+            'hammer': has_range & (body > 0) & (lower_shadow >= SHADOW_BODY_RATIO * body) &
+                      (upper_shadow <= OPPOSITE_SHADOW_RATIO * candle_range),
+            'shooting_star': has_range & (body > 0) & (upper_shadow >= SHADOW_BODY_RATIO * body) &
+                             (lower_shadow <= OPPOSITE_SHADOW_RATIO * candle_range),
+            'doji': has_range & (body <= DOJI_BODY_RATIO * candle_range),
+            'inside_bar': (high < prev_high) & (low > prev_low),
+            'outside_bar': (high > prev_high) & (low < prev_low),
+        }
+
+
+def pattern_score(patterns: Dict[str, np.ndarray], signal_type: str) -> np.ndarray:
+    """Pontuação por candle: soma dos pesos dos padrões presentes para a direção do sinal"""
+    score = np.zeros(next(iter(patterns.values())).shape)
+    for name, weight in PATTERN_WEIGHTS[signal_type].items():
+        score += np.where(patterns[name], weight, 0.0)
+    return score
+
+
+def scan_frame(df: Any) -> Dict[str, np.ndarray]:
+    """scan_patterns sobre um DataFrame, Candles ou array de candles"""
+    return scan_patterns(df['open'], df['high'], df['low'], df['close'])
+
 
 class PricePatterns:
     @staticmethod
     def check_engulfing(df: pd.DataFrame, signal_type: str) -> bool:
-        if signal_type == "LONG":
-            return (df['close'].iloc[-1] > df['open'].iloc[-2] and 
-                    df['open'].iloc[-1] < df['open'].iloc[-2] and 
-                    df['close'].iloc[-1] > df['close'].iloc[-2])
-        return (df['close'].iloc[-1] < df['open'].iloc[-2] and 
-                df['open'].iloc[-1] > df['open'].iloc[-2] and 
-                df['close'].iloc[-1] < df['close'].iloc[-2])
+        recent = df.iloc[-2:]
+        name = 'bullish_engulfing' if signal_type == "LONG" else 'bearish_engulfing'
+        return bool(scan_frame(recent)[name][-1])
 
     @staticmethod
     def check_candlestick_pattern(df: pd.DataFrame, signal_type: str) -> float:
-        score = 0
-        body = abs(df['close'].iloc[-1] - df['open'].iloc[-1])
-        upper_shadow = df['high'].iloc[-1] - max(df['open'].iloc[-1], df['close'].iloc[-1])
-        lower_shadow = min(df['open'].iloc[-1], df['close'].iloc[-1]) - df['low'].iloc[-1]
-        
-        # Implementar padrões específicos aqui
-        return score
\ No newline at end of file
+        recent = df.iloc[-2:]
+        return float(pattern_score(scan_frame(recent), signal_type)[-1])
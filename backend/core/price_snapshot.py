@@ -0,0 +1,45 @@
+import threading
+import time
+from typing import Dict, Optional
+from binance.client import Client
+from .weight_governor import get_weight_governor
+
+
+class PriceSnapshot:
+    """Preço atual de todos os pares de futuros obtido com uma única requisição"""
+
+    def __init__(self, client: Client, max_age: float = 5):
+        self.client = client
+        self.max_age = max_age
+        self.weight_governor = get_weight_governor()
+        self._prices: Dict[str, float] = {}
+        self._updated_at = 0.0
+        self._lock = threading.Lock()
+
+    def refresh(self) -> Dict[str, float]:
+        """Atualiza o snapshot com /fapi/v1/ticker/price (sem símbolo = todos os pares)"""
+        cost = self.weight_governor.acquire('ticker/price')
+        try:
+            tickers = self.client.futures_symbol_ticker()
+            prices = {t['symbol']: float(t['price']) for t in tickers}
+            with self._lock:
+                self._prices = prices
+                self._updated_at = time.time()
+            return prices
+        except Exception as e:
+            if getattr(e, 'status_code', None) in (418, 429):
+                self.weight_governor.backoff(60)
+            print(f"❌ Erro ao atualizar snapshot de preços: {e}")
+            return self._prices
+        finally:
+            response = getattr(self.client, 'response', None)
+            self.weight_governor.release(cost, response.headers if response is not None else None)
+
+    def get_prices(self) -> Dict[str, float]:
+        """Retorna o snapshot, atualizando-o se tiver mais de `max_age` segundos"""
+        if time.time() - self._updated_at > self.max_age:
+            return self.refresh()
+        return self._prices
+
+    def get(self, symbol: str) -> Optional[float]:
+        return self.get_prices().get(symbol)
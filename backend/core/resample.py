@@ -0,0 +1,46 @@
+import numpy as np
+from .kline_store import KLINE_DTYPE, INTERVAL_MS
+
+DAY_MS = INTERVAL_MS['1d']
+
+
+def can_resample(base_interval: str, target_interval: str) -> bool:
+    """Indica se o timeframe alvo pode ser montado exatamente a partir do timeframe base"""
+    if base_interval not in INTERVAL_MS or target_interval not in INTERVAL_MS:
+        return False
+    base_ms = INTERVAL_MS[base_interval]
+    target_ms = INTERVAL_MS[target_interval]
+    # Só timeframes alinhados ao dia UTC (3d e 1w seguem outro alinhamento na Binance)
+    return target_ms > base_ms and target_ms % base_ms == 0 and DAY_MS % target_ms == 0
+
+
+def resample_klines(records: np.ndarray, base_interval: str, target_interval: str) -> np.ndarray:
+    """
+    Agrega candles do timeframe base em candles do timeframe alvo alinhados ao UTC.
+    O primeiro grupo é descartado se estiver incompleto; o último pode ser o candle em andamento.
+    """
+    if not can_resample(base_interval, target_interval):
+        raise ValueError(f"Não é possível gerar {target_interval} a partir de {base_interval}")
+    if len(records) == 0:
+        return np.empty(0, dtype=KLINE_DTYPE)
+
+    target_ms = INTERVAL_MS[target_interval]
+    ratio = target_ms // INTERVAL_MS[base_interval]
+
+    bucket = records['open_time'] // target_ms
+    starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+    ends = np.r_[starts[1:], len(records)] - 1
+
+    out = np.empty(len(starts), dtype=KLINE_DTYPE)
+    out['open_time'] = bucket[starts] * target_ms
+    out['open'] = records['open'][starts]
+    out['high'] = np.maximum.reduceat(records['high'], starts)
+    out['low'] = np.minimum.reduceat(records['low'], starts)
+    out['close'] = records['close'][ends]
+    out['volume'] = np.add.reduceat(records['volume'], starts)
+    out['close_time'] = out['open_time'] + target_ms - 1
+
+    # Descartar o grupo inicial se o histórico começar no meio dele
+    if ends[0] - starts[0] + 1 < ratio:
+        out = out[1:]
+    return out
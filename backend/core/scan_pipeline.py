@@ -0,0 +1,110 @@
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, List
+
+# Marca de fim de fila entre os estágios
+_DONE = object()
+
+
+class ScanPipeline:
+    """
+    Scan em estágios ligados por filas limitadas:
+    busca de candles (I/O concorrente) -> análise (pool de threads) -> persistência em lote.
+    Enquanto um lote é analisado o próximo já está sendo buscado.
+    """
+
+    def __init__(self, analyzer: Any, batch_size: int = 20, fetch_workers: int = 2,
+                 analysis_workers: int = 2, queue_size: int = 4, closed_only: bool = False):
+        self.analyzer = analyzer
+        self.closed_only = closed_only
+        self.batch_size = max(1, batch_size)
+        self.fetch_workers = max(1, fetch_workers)
+        self.analysis_workers = max(1, analysis_workers)
+        self.queue_size = max(1, queue_size)
+        self.stats: Dict[str, float] = {}
+        self._stats_lock = threading.Lock()
+
+    def _add_time(self, stage: str, seconds: float) -> None:
+        with self._stats_lock:
+            self.stats[stage] = self.stats.get(stage, 0.0) + seconds
+
+    def _fetch_worker(self, batches: queue.Queue, fetched: queue.Queue) -> None:
+        while True:
+            try:
+                batch = batches.get_nowait()
+            except queue.Empty:
+                return
+            start = time.perf_counter()
+            try:
+                records = self.analyzer.get_records_many(batch, self.analyzer.entry_timeframe)
+            except Exception as e:
+                print(f"❌ Erro ao buscar lote de {len(batch)} pares: {e}")
+                records = {}
+            self._add_time('fetch', time.perf_counter() - start)
+            fetched.put(records)
+
+    def _analysis_worker(self, fetched: queue.Queue, analyzed: queue.Queue) -> None:
+        while True:
+            records = fetched.get()
+            if records is _DONE:
+                return
+            start = time.perf_counter()
+            try:
+                signals = self.analyzer.analyze_universe(records, save_state=False,
+                                                         closed_only=self.closed_only)
+            except Exception as e:
+                print(f"❌ Erro ao analisar lote de {len(records)} pares: {e}")
+                signals = []
+            self._add_time('analysis', time.perf_counter() - start)
+            analyzed.put(signals)
+
+    @staticmethod
+    def _close_after(workers: List[threading.Thread], target: queue.Queue, count: int) -> threading.Thread:
+        """Quando todos os workers de um estágio terminarem, avisa o estágio seguinte"""
+        def wait():
+            for worker in workers:
+                worker.join()
+            for _ in range(count):
+                target.put(_DONE)
+        thread = threading.Thread(target=wait, daemon=True)
+        thread.start()
+        return thread
+
+    @staticmethod
+    def _start(count: int, target: Callable, *args: Any) -> List[threading.Thread]:
+        threads = [threading.Thread(target=target, args=args, daemon=True) for _ in range(count)]
+        for thread in threads:
+            thread.start()
+        return threads
+
+    def run(self, symbols: List[str], persist: Callable[[List[Dict]], List[Dict]]) -> List[Dict]:
+        """Executa o scan e entrega todos os sinais de uma vez a `persist`, que retorna os que foram salvos"""
+        self.stats = {}
+        start = time.perf_counter()
+
+        batches: queue.Queue = queue.Queue()
+        for i in range(0, len(symbols), self.batch_size):
+            batches.put(symbols[i:i + self.batch_size])
+        fetched: queue.Queue = queue.Queue(maxsize=self.queue_size)
+        analyzed: queue.Queue = queue.Queue(maxsize=self.queue_size)
+
+        fetchers = self._start(self.fetch_workers, self._fetch_worker, batches, fetched)
+        self._close_after(fetchers, fetched, self.analysis_workers)
+        analysts = self._start(self.analysis_workers, self._analysis_worker, fetched, analyzed)
+        self._close_after(analysts, analyzed, 1)
+
+        # Estágio final (thread atual): juntar os sinais e persistir em lote
+        signals: List[Dict] = []
+        while True:
+            batch_signals = analyzed.get()
+            if batch_signals is _DONE:
+                break
+            signals.extend(batch_signals)
+
+        persist_start = time.perf_counter()
+        saved = persist(signals)
+        self._add_time('persist', time.perf_counter() - persist_start)
+        self.stats['total'] = time.perf_counter() - start
+        self.stats['symbols'] = len(symbols)
+        return saved
@@ -0,0 +1,130 @@
+import threading
+import time
+from typing import Dict, List, Set
+from .kline_store import INTERVAL_MS
+
+
+class ScanScheduler:
+    """
+    Decide quais pares analisar: quando o candle do timeframe de entrada fecha (evento do stream
+    ou, sem stream, pelo relógio) e, opcionalmente, numa cadência intrabar menor.
+    Cada fechamento (ou disparo intrabar) abre um ciclo de scan; as chamadas seguintes até o próximo
+    disparo só completam o ciclo aberto (pares acima do orçamento, fechamentos atrasados do stream).
+    """
+
+    def __init__(self, interval: str, close_grace: float = 3, intrabar_interval: float = 0):
+        self.interval = interval
+        self.interval_ms = INTERVAL_MS[interval]
+        self.close_grace_ms = int(close_grace * 1000)
+        self.intrabar_interval = intrabar_interval
+        self._pending: Set[str] = set()
+        self._deferred: Set[str] = set()  # em espera: voltam só no próximo ciclo, sem acordar o loop
+        self._cycle_close = -1  # close_time do último fechamento que abriu um ciclo
+        self._stream_cycle = False  # fechamento recebido pelo stream ainda não consumido por due()
+        self.new_cycle = False  # a última chamada a due() abriu um ciclo
+        # O ciclo atual foi aberto por um fechamento (analisar o candle fechado) e não só pelo intrabar
+        self.closed_only = True
+        self._stream_closed: Dict[str, int] = {}  # último close_time recebido do stream por par
+        self._startup = True
+        self._next_close_ms = self._next_boundary(self._now_ms())
+        self._next_intrabar = time.time() + intrabar_interval if intrabar_interval else None
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self.stats = {'stream_closes': 0, 'clock_closes': 0, 'intrabar_runs': 0}
+
+    @staticmethod
+    def _now_ms() -> int:
+        return int(time.time() * 1000)
+
+    def _next_boundary(self, now_ms: int) -> int:
+        """Horário (ms) do próximo fechamento de candle"""
+        return (now_ms // self.interval_ms + 1) * self.interval_ms
+
+    def on_candle_close(self, symbol: str, interval: str, close_time: int) -> None:
+        """Listener do stream de klines: o candle de `symbol` acabou de fechar"""
+        if interval != self.interval:
+            return
+        with self._lock:
+            self._pending.add(symbol)
+            self._stream_closed[symbol] = close_time
+            if close_time > self._cycle_close:
+                self._cycle_close = close_time
+                self._stream_cycle = True
+            self.stats['stream_closes'] += 1
+        self._event.set()
+
+    def has_due(self) -> bool:
+        with self._lock:
+            return bool(
+                self._startup or self._pending or
+                self._now_ms() >= self._next_close_ms + self.close_grace_ms or
+                (self._next_intrabar is not None and time.time() >= self._next_intrabar)
+            )
+
+    def due(self, symbols: List[str]) -> List[str]:
+        """Retorna (e consome) os pares de `symbols` que devem ser analisados agora"""
+        with self._lock:
+            self._event.clear()
+            due = set(self._pending)
+            self._pending.clear()
+            now_ms = self._now_ms()
+            triggered = self._stream_cycle
+            closed = triggered
+            self._stream_cycle = False
+
+            if self._startup:
+                due.update(symbols)
+                # Sem pares ainda (top_pairs vazio), a carga inicial fica para a próxima chamada
+                self._startup = not symbols
+                triggered = triggered or bool(symbols)
+                closed = closed or bool(symbols)
+
+            # Fechamento pelo relógio: pares cujo fechamento não chegou pelo stream
+            if now_ms >= self._next_close_ms + self.close_grace_ms:
+                close_time = self._next_close_ms - 1
+                due.update(s for s in symbols if self._stream_closed.get(s, -1) < close_time)
+                if close_time > self._cycle_close:
+                    self._cycle_close = close_time
+                    triggered = closed = True
+                self._next_close_ms = self._next_boundary(now_ms)
+                self.stats['clock_closes'] += 1
+
+            # Reavaliação intrabar de todos os pares
+            if self._next_intrabar is not None and time.time() >= self._next_intrabar:
+                due.update(symbols)
+                self._next_intrabar = time.time() + self.intrabar_interval
+                self.stats['intrabar_runs'] += 1
+                triggered = True
+
+            # Os pares em espera só acompanham um ciclo novo; nunca disparam um scan sozinhos
+            if triggered:
+                due |= self._deferred
+                self._deferred.clear()
+                self.closed_only = closed
+            self.new_cycle = triggered
+            return [s for s in symbols if s in due]
+
+    def requeue(self, symbols: List[str], wake: bool = True) -> None:
+        """
+        Devolve pares que eram devidos mas não foram analisados neste ciclo.
+        Com `wake` (ex.: fora do orçamento) o ciclo atual continua sem esperar; sem ele
+        (ex.: em espera pela prioridade) os pares só voltam no próximo fechamento ou disparo intrabar.
+        """
+        if not symbols:
+            return
+        with self._lock:
+            (self._pending if wake else self._deferred).update(symbols)
+        if wake:
+            self._event.set()
+
+    def wait(self, timeout: float) -> bool:
+        """Aguarda até `timeout` segundos ou até um evento do stream; retorna True se houver pares a analisar"""
+        with self._lock:
+            deadlines = [(self._next_close_ms + self.close_grace_ms - self._now_ms()) / 1000]
+            if self._next_intrabar is not None:
+                deadlines.append(self._next_intrabar - time.time())
+        self._event.wait(max(0.0, min([timeout] + deadlines)))
+        return self.has_due()
+
+    def seconds_to_next_close(self) -> float:
+        return max(0.0, (self._next_close_ms - self._now_ms()) / 1000)
@@ -0,0 +1,89 @@
+"""
+Regras de entrada do scan, compartilhadas pelo scan ao vivo (TechnicalAnalysis.analyze_universe),
+pelos cálculos de indicadores e pelo backtest. Só numpy: importar não cria cliente nem lê configuração.
+"""
+import numpy as np
+from typing import Dict
+
+Features = Dict[str, np.ndarray]
+
+# Janelas dos indicadores do timeframe de tendência
+TREND_EMA = 20
+TREND_EMA_SLOW = 50
+TREND_EMA_LONG = 200
+
+# Janelas dos indicadores do timeframe de entrada
+ENTRY_EMA_FAST = 8
+ENTRY_EMA_SLOW = 21
+RSI_WINDOW = 14
+ATR_WINDOW = 14
+
+LOOKBACK = 4  # candles usados nas inclinações/direção (último vs. 4 candles atrás)
+MIN_BARS = 50  # candles mínimos em cada timeframe para analisar o par
+
+# Parâmetros padrão das regras
+QUALITY_SCORE_MINIMUM = 90
+TARGET_ATR_MULTIPLIER = 2.0  # alvo em 2 ATR
+MIN_TARGET_PERCENTAGE = 4.0  # variação mínima do alvo
+MIN_VOLUME = 500000
+
+
+def trend_strength(trend: Features) -> np.ndarray:
+    """Tendência: preço acima/abaixo da EMA20 com inclinação no mesmo sentido (2, -2 ou 0)"""
+    with np.errstate(invalid='ignore'):
+        up = (trend['price'] > trend['ema20']) & (trend['ema20_slope'] > 0)
+        down = (trend['price'] < trend['ema20']) & (trend['ema20_slope'] < 0)
+    return np.where(up, 2, np.where(down, -2, 0))
+
+
+def target_variation(entry_price: np.ndarray, atr_value: np.ndarray, is_uptrend: np.ndarray,
+                     atr_multiplier: float = TARGET_ATR_MULTIPLIER) -> np.ndarray:
+    """Variação percentual do alvo em `atr_multiplier` ATR (0 se o preço for zero)"""
+    target_distance = atr_value * atr_multiplier
+    target_price = np.where(is_uptrend, entry_price + target_distance, entry_price - target_distance)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(entry_price != 0, np.abs((target_price - entry_price) / entry_price) * 100, 0.0)
+
+
+def trend_distance(trend: Features, min_target_percentage: float = MIN_TARGET_PERCENTAGE) -> np.ndarray:
+    """
+    Quanto falta para haver tendência: distância do preço à EMA20 mais a inclinação contrária (em %),
+    no sentido mais próximo, como fração da variação mínima do alvo
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        gap = (trend['ema20'] - trend['price']) / trend['price'] * 100
+    slope = trend['ema20_slope']
+    up = np.maximum(0, gap) + np.maximum(0, -slope)
+    down = np.maximum(0, -gap) + np.maximum(0, slope)
+    return np.nan_to_num(np.minimum(up, down) / min_target_percentage, nan=np.inf)
+
+
+def score_universe(trend: Features, entry: Features, min_volume: float = MIN_VOLUME) -> Features:
+    """
+    Versão vetorizada de analyze_trend, check_timeframe_alignment e calculate_market_conditions:
+    cada array tem um valor por símbolo (ou por símbolo × candle).
+    """
+    strength = trend_strength(trend)
+    trend_score = np.abs(strength) * 10
+
+    # Alinhamento entre os timeframes
+    alignment_score = np.where(trend['direction'] == entry['direction'], 30, 0)
+
+    # Condições de mercado: volume (0-25) e volatilidade (0-25)
+    volume_score = np.minimum(25, entry['quote_volume'] / min_volume * 25)
+    volatility = entry['volatility']
+    volatility_score = np.select(
+        [(volatility >= 3.0) & (volatility <= 6.0),
+         (volatility >= 2.0) & (volatility <= 7.0),
+         (volatility >= 1.0) & (volatility <= 8.0)],
+        [25, 15, 5], default=0
+    )
+    market_score = (volume_score + volatility_score).astype(int)
+
+    return {
+        'trend_strength': strength,
+        'trend_score': trend_score,
+        'alignment_score': alignment_score,
+        'market_score': market_score,
+        'quality_score': trend_score + alignment_score + market_score,
+    }
@@ -0,0 +1,469 @@
+import json
+import math
+import os
+import threading
+from collections import deque
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from .signal_rules import (ATR_WINDOW, ENTRY_EMA_FAST, ENTRY_EMA_SLOW, LOOKBACK, RSI_WINDOW,
+                           TREND_EMA, TREND_EMA_LONG, TREND_EMA_SLOW)
+
+# Indicadores incrementais: cada candle fechado atualiza o estado em O(1) (`update`)
+# e o candle em andamento é avaliado sem alterar o estado (`peek`).
+# Seguem a mesma convenção da biblioteca `ta` (NaN/0 enquanto a janela não enche).
+
+NAN = float('nan')
+
+
+class StreamingEMA:
+    """EMA equivalente a pandas `ewm(adjust=False)`; valores NaN são ignorados"""
+
+    def __init__(self, window: int, alpha: Optional[float] = None, value: Optional[float] = None, count: int = 0):
+        self.window = window
+        self.alpha = alpha if alpha is not None else 2.0 / (window + 1)
+        self.value = value
+        self.count = count
+
+    def _next(self, x: float) -> float:
+        return x if self.value is None else self.value + self.alpha * (x - self.value)
+
+    @property
+    def current(self) -> float:
+        return self.value if self.count >= self.window else NAN
+
+    def update(self, x: float) -> float:
+        if not math.isnan(x):
+            self.value = self._next(x)
+            self.count += 1
+        return self.current
+
+    def peek(self, x: float) -> float:
+        if math.isnan(x):
+            return self.current
+        return self._next(x) if self.count + 1 >= self.window else NAN
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'window': self.window, 'alpha': self.alpha, 'value': self.value, 'count': self.count}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'StreamingEMA':
+        return cls(**data)
+
+
+class StreamingRSI:
+    """RSI de Wilder (médias exponenciais com alpha = 1/janela)"""
+
+    def __init__(self, window: int = 14, prev_close: Optional[float] = None,
+                 up: Optional[StreamingEMA] = None, down: Optional[StreamingEMA] = None):
+        self.window = window
+        self.prev_close = prev_close
+        self.up = up or StreamingEMA(window, alpha=1.0 / window)
+        self.down = down or StreamingEMA(window, alpha=1.0 / window)
+
+    @staticmethod
+    def _rsi(emaup: float, emadn: float) -> float:
+        if math.isnan(emadn):
+            return NAN
+        if emadn == 0:
+            return 100.0
+        return 100 - (100 / (1 + emaup / emadn))
+
+    def _moves(self, close: float) -> Tuple[float, float]:
+        diff = 0.0 if self.prev_close is None else close - self.prev_close
+        return max(diff, 0.0), max(-diff, 0.0)
+
+    @property
+    def current(self) -> float:
+        return self._rsi(self.up.current, self.down.current)
+
+    def update(self, close: float) -> float:
+        up, down = self._moves(close)
+        self.up.update(up)
+        self.down.update(down)
+        self.prev_close = close
+        return self.current
+
+    def peek(self, close: float) -> float:
+        up, down = self._moves(close)
+        return self._rsi(self.up.peek(up), self.down.peek(down))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'window': self.window, 'prev_close': self.prev_close,
+                'up': self.up.to_dict(), 'down': self.down.to_dict()}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'StreamingRSI':
+        return cls(data['window'], data['prev_close'],
+                   StreamingEMA.from_dict(data['up']), StreamingEMA.from_dict(data['down']))
+
+
+class StreamingATR:
+    """ATR de Wilder: média simples dos primeiros `window` true ranges e depois suavização"""
+
+    def __init__(self, window: int = 14, prev_close: Optional[float] = None,
+                 value: float = 0.0, count: int = 0, seed_sum: float = 0.0):
+        self.window = window
+        self.prev_close = prev_close
+        self.value = value
+        self.count = count
+        self.seed_sum = seed_sum
+
+    def _true_range(self, high: float, low: float) -> float:
+        if self.prev_close is None:
+            return high - low
+        return max(high - low, abs(high - self.prev_close), abs(low - self.prev_close))
+
+    def _next(self, tr: float) -> Tuple[float, float]:
+        """Retorna (valor, soma inicial) após somar mais um true range"""
+        count = self.count + 1
+        if count < self.window:
+            return 0.0, self.seed_sum + tr
+        if count == self.window:
+            return (self.seed_sum + tr) / self.window, self.seed_sum + tr
+        return (self.value * (self.window - 1) + tr) / self.window, self.seed_sum
+
+    @property
+    def current(self) -> float:
+        return self.value
+
+    def update(self, high: float, low: float, close: float) -> float:
+        self.value, self.seed_sum = self._next(self._true_range(high, low))
+        self.count += 1
+        self.prev_close = close
+        return self.value
+
+    def peek(self, high: float, low: float, close: float) -> float:
+        return self._next(self._true_range(high, low))[0]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'window': self.window, 'prev_close': self.prev_close, 'value': self.value,
+                'count': self.count, 'seed_sum': self.seed_sum}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'StreamingATR':
+        return cls(**data)
+
+
+class StreamingBollinger:
+    """Bandas de Bollinger com média e variância (ddof=0) deslizantes pelo método de Welford"""
+
+    def __init__(self, window: int = 20, window_dev: float = 2, values: Optional[List[float]] = None,
+                 mean: float = 0.0, m2: float = 0.0):
+        self.window = window
+        self.window_dev = window_dev
+        self.values = deque(values or [], maxlen=window)
+        self.mean = mean
+        self.m2 = m2
+
+    def _next(self, x: float) -> Tuple[float, float, int]:
+        """Retorna (média, m2, n) após incluir `x` (e retirar o valor mais antigo, se a janela estiver cheia)"""
+        n = len(self.values)
+        if n < self.window:
+            mean = self.mean + (x - self.mean) / (n + 1)
+            return mean, self.m2 + (x - self.mean) * (x - mean), n + 1
+        old = self.values[0]
+        mean = self.mean + (x - old) / n
+        return mean, self.m2 + (x - old) * (x - mean + old - self.mean), n
+
+    def _bands(self, mean: float, m2: float, n: int) -> Tuple[float, float, float]:
+        if n < self.window:
+            return NAN, NAN, NAN
+        std = math.sqrt(max(m2, 0.0) / n)
+        return mean, mean + self.window_dev * std, mean - self.window_dev * std
+
+    @property
+    def current(self) -> Tuple[float, float, float]:
+        """(média, banda superior, banda inferior)"""
+        return self._bands(self.mean, self.m2, len(self.values))
+
+    def update(self, close: float) -> Tuple[float, float, float]:
+        self.mean, self.m2, _ = self._next(close)
+        self.values.append(close)
+        return self.current
+
+    def peek(self, close: float) -> Tuple[float, float, float]:
+        return self._bands(*self._next(close))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'window': self.window, 'window_dev': self.window_dev, 'values': list(self.values),
+                'mean': self.mean, 'm2': self.m2}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'StreamingBollinger':
+        return cls(**data)
+
+
+class StreamingMACD:
+    """MACD (EMA rápida - EMA lenta) com linha de sinal e histograma"""
+
+    def __init__(self, fast: int = 12, slow: int = 26, signal: int = 9,
+                 ema_fast: Optional[StreamingEMA] = None, ema_slow: Optional[StreamingEMA] = None,
+                 ema_signal: Optional[StreamingEMA] = None):
+        self.ema_fast = ema_fast or StreamingEMA(fast)
+        self.ema_slow = ema_slow or StreamingEMA(slow)
+        self.ema_signal = ema_signal or StreamingEMA(signal)
+
+    @staticmethod
+    def _lines(macd: float, signal: float) -> Tuple[float, float, float]:
+        return macd, signal, macd - signal
+
+    @property
+    def current(self) -> Tuple[float, float, float]:
+        """(macd, sinal, histograma)"""
+        return self._lines(self.ema_fast.current - self.ema_slow.current, self.ema_signal.current)
+
+    def update(self, close: float) -> Tuple[float, float, float]:
+        macd = self.ema_fast.update(close) - self.ema_slow.update(close)
+        return self._lines(macd, self.ema_signal.update(macd))
+
+    def peek(self, close: float) -> Tuple[float, float, float]:
+        macd = self.ema_fast.peek(close) - self.ema_slow.peek(close)
+        return self._lines(macd, self.ema_signal.peek(macd))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'ema_fast': self.ema_fast.to_dict(), 'ema_slow': self.ema_slow.to_dict(),
+                'ema_signal': self.ema_signal.to_dict()}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'StreamingMACD':
+        return cls(ema_fast=StreamingEMA.from_dict(data['ema_fast']),
+                   ema_slow=StreamingEMA.from_dict(data['ema_slow']),
+                   ema_signal=StreamingEMA.from_dict(data['ema_signal']))
+
+
+class FeatureState:
+    """
+    Estado incremental das features de um símbolo/timeframe.
+    Os candles fechados entram no estado; o último candle recebido é sempre tratado como provisório.
+    """
+
+    kind = ''
+    lookback = LOOKBACK
+
+    def __init__(self):
+        self.last_close_time: Optional[int] = None
+        self.history: deque = deque(maxlen=self.lookback)
+
+    def _commit(self, candle: np.void) -> None:
+        raise NotImplementedError
+
+    def _features(self, candle: np.void) -> Dict[str, float]:
+        raise NotImplementedError
+
+    def _state(self) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    def _load(self, data: Dict[str, Any]) -> None:
+        raise NotImplementedError
+
+    def reset(self) -> None:
+        self.__init__()
+
+    def advance(self, records: np.ndarray) -> None:
+        """Aplica os candles fechados ainda não vistos (todos menos o último)"""
+        closed = records[:-1]
+        if len(closed) == 0:
+            return
+        if self.last_close_time is not None:
+            pending = closed[closed['close_time'] > self.last_close_time]
+            in_sequence = (
+                closed['close_time'][-1] >= self.last_close_time and
+                (len(pending) == 0 or pending['open_time'][0] == self.last_close_time + 1)
+            )
+            if in_sequence:
+                closed = pending
+            else:
+                # Buraco no histórico ou dados reiniciados: reconstruir a partir dos candles recebidos
+                self.reset()
+        for candle in closed:
+            self._commit(candle)
+            self.last_close_time = int(candle['close_time'])
+
+    def features(self, records: np.ndarray) -> Dict[str, float]:
+        """Atualiza o estado e retorna as features com o último candle como provisório"""
+        self.advance(records)
+        return self._features(records[-1])
+
+    def _past(self, field: str) -> float:
+        """Valor do candle `lookback` posições antes do provisório (NaN se ainda não houver)"""
+        if len(self.history) < self.lookback:
+            return NAN
+        return self.history[0][field]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'kind': self.kind, 'last_close_time': self.last_close_time,
+                'history': list(self.history), **self._state()}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'FeatureState':
+        state = FEATURE_STATES[data['kind']]()
+        state.last_close_time = data['last_close_time']
+        state.history.extend(data['history'])
+        state._load(data)
+        return state
+
+
+def _slope(current: float, past: float) -> float:
+    if math.isnan(past) or past == 0:
+        return NAN
+    return (current - past) / past * 100
+
+
+class TrendState(FeatureState):
+    """Features do timeframe de tendência (mesmas de indicator_engine.trend_features)"""
+
+    kind = 'trend'
+
+    def __init__(self):
+        super().__init__()
+        self.ema20 = StreamingEMA(TREND_EMA)
+        self.ema50 = StreamingEMA(TREND_EMA_SLOW)
+        self.ema200 = StreamingEMA(TREND_EMA_LONG)
+
+    def _commit(self, candle: np.void) -> None:
+        close = float(candle['close'])
+        self.history.append({
+            'close': close,
+            'ema20': self.ema20.update(close),
+            'ema50': self.ema50.update(close),
+            'ema200': self.ema200.update(close),
+        })
+
+    def _features(self, candle: np.void) -> Dict[str, float]:
+        close = float(candle['close'])
+        ema20 = self.ema20.peek(close)
+        ema50 = self.ema50.peek(close)
+        past_close = self._past('close')
+        return {
+            'price': close,
+            'ema20': ema20,
+            'ema50': ema50,
+            'ema200': self.ema200.peek(close),
+            'ema20_slope': _slope(ema20, self._past('ema20')),
+            'ema50_slope': _slope(ema50, self._past('ema50')),
+            'direction': not math.isnan(past_close) and close > past_close,
+        }
+
+    def _state(self) -> Dict[str, Any]:
+        return {'ema20': self.ema20.to_dict(), 'ema50': self.ema50.to_dict(), 'ema200': self.ema200.to_dict()}
+
+    def _load(self, data: Dict[str, Any]) -> None:
+        self.ema20 = StreamingEMA.from_dict(data['ema20'])
+        self.ema50 = StreamingEMA.from_dict(data['ema50'])
+        self.ema200 = StreamingEMA.from_dict(data['ema200'])
+
+
+class EntryState(FeatureState):
+    """Features do timeframe de entrada (mesmas de indicator_engine.entry_features)"""
+
+    kind = 'entry'
+
+    def __init__(self):
+        super().__init__()
+        self.ema8 = StreamingEMA(ENTRY_EMA_FAST)
+        self.ema21 = StreamingEMA(ENTRY_EMA_SLOW)
+        self.rsi = StreamingRSI(RSI_WINDOW)
+        self.atr = StreamingATR(ATR_WINDOW)
+
+    def _commit(self, candle: np.void) -> None:
+        close = float(candle['close'])
+        self.ema8.update(close)
+        self.ema21.update(close)
+        self.rsi.update(close)
+        self.atr.update(float(candle['high']), float(candle['low']), close)
+        self.history.append({'close': close})
+
+    def _features(self, candle: np.void) -> Dict[str, float]:
+        close = float(candle['close'])
+        atr = self.atr.peek(float(candle['high']), float(candle['low']), close)
+        past_close = self._past('close')
+        return {
+            'price': close,
+            'ema8': self.ema8.peek(close),
+            'ema21': self.ema21.peek(close),
+            'rsi': self.rsi.peek(close),
+            'atr': atr,
+            'volatility': atr / close * 100 if close != 0 else 0.0,
+            'quote_volume': float(candle['volume']) * close,
+            'direction': not math.isnan(past_close) and close > past_close,
+        }
+
+    def _state(self) -> Dict[str, Any]:
+        return {'ema8': self.ema8.to_dict(), 'ema21': self.ema21.to_dict(),
+                'rsi': self.rsi.to_dict(), 'atr': self.atr.to_dict()}
+
+    def _load(self, data: Dict[str, Any]) -> None:
+        self.ema8 = StreamingEMA.from_dict(data['ema8'])
+        self.ema21 = StreamingEMA.from_dict(data['ema21'])
+        self.rsi = StreamingRSI.from_dict(data['rsi'])
+        self.atr = StreamingATR.from_dict(data['atr'])
+
+
+FEATURE_STATES = {state.kind: state for state in (TrendState, EntryState)}
+
+
+class IndicatorStateStore:
+    """Estados incrementais por (símbolo, timeframe, tipo), mantidos em memória e salvos em disco"""
+
+    def __init__(self, base_dir: Optional[str] = None):
+        if base_dir is None:
+            base_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'indicator_state')
+        self.base_dir = base_dir
+        self._states: Dict[Tuple[str, str, str], FeatureState] = {}
+        self._dirty = set()
+        self._lock = threading.Lock()
+
+    def _path(self, symbol: str, interval: str, kind: str) -> str:
+        return os.path.join(self.base_dir, f"{symbol}_{interval}_{kind}.json")
+
+    def get(self, symbol: str, interval: str, kind: str) -> FeatureState:
+        key = (symbol, interval, kind)
+        with self._lock:
+            state = self._states.get(key)
+            if state is None:
+                try:
+                    with open(self._path(*key), 'r') as f:
+                        state = FeatureState.from_dict(json.load(f))
+                except (FileNotFoundError, ValueError, KeyError):
+                    state = FEATURE_STATES[kind]()
+                self._states[key] = state
+            return state
+
+    def features(self, symbol: str, interval: str, kind: str, records: np.ndarray) -> Dict[str, float]:
+        state = self.get(symbol, interval, kind)
+        last_close_time = state.last_close_time
+        features = state.features(records)
+        if state.last_close_time != last_close_time:
+            with self._lock:
+                self._dirty.add((symbol, interval, kind))
+        return features
+
+    def universe(self, records_by_symbol: Dict[str, np.ndarray], interval: str,
+                 kind: str) -> Tuple[List[str], Dict[str, np.ndarray]]:
+        """Mesmo formato de indicator_engine.compute_universe, a partir dos estados incrementais"""
+        symbols = []
+        rows = []
+        for symbol, records in records_by_symbol.items():
+            if records is None or len(records) == 0:
+                continue
+            symbols.append(symbol)
+            rows.append(self.features(symbol, interval, kind, records))
+        if not rows:
+            return [], {}
+        return symbols, {name: np.array([row[name] for row in rows]) for name in rows[0]}
+
+    def save(self) -> None:
+        """Grava em disco os estados alterados desde a última gravação"""
+        with self._lock:
+            dirty, self._dirty = self._dirty, set()
+            states = {key: self._states[key].to_dict() for key in dirty}
+        try:
+            os.makedirs(self.base_dir, exist_ok=True)
+            for key, data in states.items():
+                path = self._path(*key)
+                tmp_path = path + '.tmp'
+                with open(tmp_path, 'w') as f:
+                    json.dump(data, f)
+                os.replace(tmp_path, path)
+        except Exception as e:
+            print(f"❌ Erro ao salvar estado dos indicadores: {e}")
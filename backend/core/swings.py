@@ -0,0 +1,101 @@
+import operator
+import numpy as np
+from collections import deque
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+FIB_RATIOS = (0.236, 0.382, 0.5, 0.618, 0.786)
+
+
+def sliding_argextreme(values: np.ndarray, window: int, mode: str = 'max') -> np.ndarray:
+    """
+    Índice do máximo (ou mínimo) de cada janela de `window` candles terminando em i, em O(n),
+    com uma fila monotônica. Posições sem janela completa recebem -1. Em empates vence o mais recente.
+    """
+    data = np.asarray(values, dtype=np.float64).tolist()
+    result = np.full(len(data), -1, dtype=np.int64)
+    dominated = operator.le if mode == 'max' else operator.ge
+
+    candidates: deque = deque()
+    for i, value in enumerate(data):
+        while candidates and dominated(data[candidates[-1]], value):
+            candidates.pop()
+        candidates.append(i)
+        if candidates[0] <= i - window:
+            candidates.popleft()
+        if i >= window - 1:
+            result[i] = candidates[0]
+    return result
+
+
+def pivots(values: np.ndarray, order: int = 5, mode: str = 'max') -> np.ndarray:
+    """
+    Índices dos pivôs: candles que são o extremo de `order` candles de cada lado.
+    Os últimos `order` candles ainda não podem ser confirmados.
+    """
+    window = 2 * order + 1
+    extreme = sliding_argextreme(values, window, mode)
+    # A janela que termina em i + order é centrada em i
+    centers = np.arange(len(extreme)) - order
+    return centers[(extreme >= 0) & (extreme == centers)]
+
+
+def swing_points(high: np.ndarray, low: np.ndarray, order: int = 5) -> Tuple[np.ndarray, np.ndarray]:
+    """(índices dos topos, índices dos fundos)"""
+    return pivots(high, order, 'max'), pivots(low, order, 'min')
+
+
+def last_swing_leg(high: np.ndarray, low: np.ndarray, is_uptrend: bool,
+                   order: int = 5) -> Optional[Tuple[int, int]]:
+    """
+    Última perna de swing no sentido da tendência: (índice do fundo, índice do topo) numa alta,
+    (índice do topo, índice do fundo) numa baixa. None se não houver pivôs suficientes.
+    """
+    highs, lows = swing_points(high, low, order)
+    if is_uptrend:
+        if len(highs) == 0:
+            return None
+        end = highs[-1]
+        starts = lows[lows < end]
+    else:
+        if len(lows) == 0:
+            return None
+        end = lows[-1]
+        starts = highs[highs < end]
+    if len(starts) == 0:
+        return None
+    return int(starts[-1]), int(end)
+
+
+def fibonacci_levels(swing_low: float, swing_high: float, is_uptrend: bool,
+                     ratios: Sequence[float] = FIB_RATIOS) -> np.ndarray:
+    """Níveis de retração da perna: medidos a partir do topo numa alta e do fundo numa baixa"""
+    move = (swing_high - swing_low) * np.asarray(ratios)
+    return swing_high - move if is_uptrend else swing_low + move
+
+
+def find_divergence(high: np.ndarray, low: np.ndarray, rsi: np.ndarray, is_uptrend: bool,
+                    order: int = 5) -> Dict[str, Any]:
+    """
+    Divergência entre preço e RSI nos dois últimos pivôs:
+    alta -> fundo de preço mais baixo com RSI mais alto; baixa -> topo mais alto com RSI mais baixo.
+    """
+    high = np.asarray(high, dtype=np.float64)
+    low = np.asarray(low, dtype=np.float64)
+    rsi = np.asarray(rsi, dtype=np.float64)
+    if is_uptrend:
+        idx = pivots(low, order, 'min')
+        price = low
+    else:
+        idx = pivots(high, order, 'max')
+        price = high
+    if len(idx) < 2:
+        return {'valid': False, 'pivots': idx[-2:].tolist()}
+
+    prev, last = idx[-2], idx[-1]
+    if np.isnan(rsi[prev]) or np.isnan(rsi[last]):
+        return {'valid': False, 'pivots': [int(prev), int(last)]}
+    if is_uptrend:
+        valid = price[last] < price[prev] and rsi[last] > rsi[prev]
+    else:
+        valid = price[last] > price[prev] and rsi[last] < rsi[prev]
+    return {'valid': bool(valid), 'pivots': [int(prev), int(last)]}
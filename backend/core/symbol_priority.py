@@ -0,0 +1,80 @@
+import math
+import threading
+from typing import Dict, List, Optional, Tuple
+
+
+class SymbolPriority:
+    """
+    Prioriza os pares pela distância até o gatilho medida na última análise.
+    A distância é a fração do limiar que ainda falta (0 = no gatilho, 1 = tão longe quanto o próprio limiar).
+    Pares próximos (distância <= `hot_distance`) entram em todo ciclo; os frios esperam 2, 4, 8... ciclos,
+    até `max_backoff`. Cada ciclo analisa no máximo `budget` pares.
+    """
+
+    def __init__(self, budget: int = 60, hot_distance: float = 0.25, max_backoff: int = 8):
+        self.budget = max(1, budget)
+        self.hot_distance = hot_distance
+        self.max_backoff = max(1, max_backoff)
+        self.cycle = 0
+        self._distance: Dict[str, float] = {}
+        self._cold_streak: Dict[str, int] = {}
+        self._next_cycle: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def record(self, distances: Dict[str, float]) -> None:
+        """Registra as distâncias da última análise e agenda a próxima de cada par"""
+        with self._lock:
+            for symbol, distance in distances.items():
+                distance = float(distance)
+                if math.isnan(distance):
+                    distance = math.inf
+                self._distance[symbol] = distance
+                if distance <= self.hot_distance:
+                    self._cold_streak[symbol] = 0
+                    interval = 1
+                else:
+                    streak = self._cold_streak.get(symbol, 0) + 1
+                    self._cold_streak[symbol] = streak
+                    interval = min(self.max_backoff, 2 ** streak)
+                self._next_cycle[symbol] = self.cycle + interval
+
+    def partition(self, symbols: List[str], advance: bool = True) -> Tuple[List[str], List[str], List[str]]:
+        """
+        Separa `symbols` em (selecionados, fora do orçamento, em espera), avançando um ciclo se `advance`.
+        Só um ciclo de scan novo (fechamento de candle ou disparo intrabar) deve avançar: as esperas
+        de 2, 4, 8... são contadas nesses ciclos.
+        Pares nunca analisados vêm primeiro; os atrasados ganham prioridade a cada ciclo que esperam.
+        Os que ficam fora do orçamento ou em espera não são descartados: cabe a quem chama
+        reapresentá-los nos ciclos seguintes (ScanScheduler.requeue).
+        """
+        with self._lock:
+            if advance:
+                self.cycle += 1
+            due = []
+            waiting = set()
+            for symbol in symbols:
+                overdue = self.cycle - self._next_cycle.get(symbol, self.cycle)
+                if overdue < 0:
+                    waiting.add(symbol)
+                    continue
+                distance = self._distance.get(symbol, 0.0)
+                due.append((distance / (1 + overdue), symbol))
+            due.sort(key=lambda item: item[0])
+            selected = {symbol for _, symbol in due[:self.budget]}
+            return ([s for s in symbols if s in selected],
+                    [s for s in symbols if s not in selected and s not in waiting],
+                    [s for s in symbols if s in waiting])
+
+    def select(self, symbols: List[str]) -> List[str]:
+        """Avança um ciclo e retorna os pares de `symbols` a analisar, dentro do orçamento"""
+        return self.partition(symbols)[0]
+
+    def distance(self, symbol: str) -> Optional[float]:
+        with self._lock:
+            return self._distance.get(symbol)
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            hot = sum(1 for d in self._distance.values() if d <= self.hot_distance)
+            return {'cycle': self.cycle, 'tracked': len(self._distance), 'hot': hot,
+                    'cold': len(self._distance) - hot, 'budget': self.budget}
@@ -1,26 +1,60 @@
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
-from typing import Dict, Optional, List, Any
+from typing import Dict, Optional, List, Any, Tuple
 from binance.client import Client
-from ta.trend import EMAIndicator, MACD
-from ta.momentum import RSIIndicator
-from ta.volatility import AverageTrueRange
 from config import server
-import requests
 import time
+import threading
 import traceback
 from .database import Database
+from .kline_store import KlineStore, closed_klines
+from .rate_limiter import get_rate_limiter
+from .async_fetcher import AsyncKlineFetcher
+from .weight_governor import get_weight_governor
+from .kline_stream import KlineStreamIngester
+from .resample import can_resample, resample_klines
+from .http_transport import get_transport
+from .metadata_cache import MetadataCache
+from .candles import Candles, decode_klines
+from . import kernels
+from . import signal_rules
+from .indicator_engine import compute_universe, entry_features, trend_features
+from .streaming_indicators import IndicatorStateStore
+from .indicator_cache import get_indicator_cache
+from .swings import fibonacci_levels, find_divergence, last_swing_leg
+from .scan_pipeline import ScanPipeline
+from .filter_stats import FilterStats
+from .symbol_priority import SymbolPriority
+from .open_signals import get_open_signal_index
+from .negative_cache import NegativeCache
 from colorama import Fore, Style
 
 class TechnicalAnalysis:
+    # Evita que várias instâncias no mesmo processo atualizem os pares ao mesmo tempo
+    _pairs_refresh_lock = threading.Lock()
+
     def __init__(self):
         self.min_score = 60  # Atualizado para match com novo sistema
-        self.min_volume = 500000
+        self.min_volume = signal_rules.MIN_VOLUME
         # --- Início da Edição ---
         # Aumentar o score mínimo para gerar sinais de maior qualidade
         self.quality_score_minimum = 90 # Aumentado para 90
         # --- Fim da Edição ---
+        self.target_atr_multiplier = signal_rules.TARGET_ATR_MULTIPLIER
+        self.min_target_percentage = signal_rules.MIN_TARGET_PERCENTAGE
+        self.filter_stats = FilterStats()
+        self.open_signals = get_open_signal_index()
+        self._gerenciador = None  # criado na primeira gravação de sinais
+        negative_reasons = server.config['SCAN']['NEGATIVE_CACHE']
+        self.negative_cache = NegativeCache(negative_reasons) if negative_reasons else None
+        priority_config = server.config['SCAN']
+        self.symbol_priority = SymbolPriority(
+            budget=priority_config['CYCLE_BUDGET'],
+            hot_distance=priority_config['HOT_DISTANCE'],
+            max_backoff=priority_config['MAX_BACKOFF']
+        ) if priority_config.get('PRIORITY_SCHEDULER') else None
+        self.scan_scheduler = None  # ScanScheduler do Monitor: recebe de volta os pares adiados
         self.max_daily_signals = 35
         self.trend_timeframe = '4h'
         self.entry_timeframe = '1h'
@@ -28,20 +62,65 @@ class TechnicalAnalysis:
         self.btc_cache_time = 300
         self.futures_api = "https://fapi.binance.com/fapi/v1"
         self.client = Client(server.config.get('API_KEY'), server.config.get('API_SECRET'))
+        self.transport = get_transport()
+        self.transport.attach(self.client.session)
         self.futures_pairs = []
         self.top_pairs = []
         self.pairs_last_update = 0
         self.update_interval = 3600
         self.active_signals = {}
+        self.kline_store = KlineStore()
+        self.kline_max_age = server.config['BINANCE_API']['KLINE_MAX_AGE']
+        self.rate_limiter = get_rate_limiter()
+        self.weight_governor = get_weight_governor()
+        self.async_fetcher = AsyncKlineFetcher(self.rate_limiter)
+        self.kline_stream: Optional[KlineStreamIngester] = None
+        self.metadata_cache = MetadataCache()
+        self.futures_pairs_ttl = server.config['BINANCE_API']['FUTURES_PAIRS_TTL']
+        self._pairs_refresh_thread: Optional[threading.Thread] = None
+        self.indicator_cache = get_indicator_cache()
+        self.indicator_states = IndicatorStateStore() if server.config['TRADING'].get('STREAMING_INDICATORS') else None
 
         # Carregar sinais ativos do arquivo
         self.load_active_signals()
         
-        # Atualizar lista de pares
-        self.update_futures_pairs()
-        
-        # Selecionar os melhores pares
-        self.select_top_pairs()
+        # Carregar pares do cache e atualizar em segundo plano se estiverem vencidos
+        self.load_cached_pairs()
+        self.refresh_pairs_async()
+
+    def load_cached_pairs(self) -> None:
+        """Carrega a lista de pares futuros e os top pares salvos na última execução"""
+        self.futures_pairs = self.metadata_cache.get('futures_pairs') or []
+        self.top_pairs = self.metadata_cache.get('top_pairs') or []
+        self.pairs_last_update = self.metadata_cache.updated_at('top_pairs') if self.top_pairs else 0
+        if self.top_pairs:
+            print(f"✅ {len(self.top_pairs)} top pares carregados do cache")
+
+    def _futures_pairs_stale(self) -> bool:
+        return self.metadata_cache.get('futures_pairs', max_age=self.futures_pairs_ttl) is None
+
+    def _top_pairs_stale(self) -> bool:
+        return time.time() - self.pairs_last_update > self.update_interval
+
+    def refresh_pairs(self) -> None:
+        """Atualiza pares futuros e top pares que estiverem vencidos no cache"""
+        with self._pairs_refresh_lock:
+            # Outra instância pode ter acabado de atualizar o cache
+            self.load_cached_pairs()
+            if self._futures_pairs_stale():
+                self.update_futures_pairs()
+            if self._top_pairs_stale():
+                self.select_top_pairs()
+                self.pairs_last_update = time.time()
+
+    def refresh_pairs_async(self) -> None:
+        """Dispara refresh_pairs em uma thread, se já não houver uma em andamento"""
+        if self._pairs_refresh_thread is not None and self._pairs_refresh_thread.is_alive():
+            return
+        if not self._futures_pairs_stale() and not self._top_pairs_stale():
+            return
+        self._pairs_refresh_thread = threading.Thread(target=self.refresh_pairs, daemon=True)
+        self._pairs_refresh_thread.start()
 
     def load_active_signals(self):
         """Carrega sinais ativos do arquivo"""
@@ -80,24 +159,85 @@ class TechnicalAnalysis:
             print(f"❌ Erro ao salvar sinais ativos: {e}")
             return False
 
-    def get_klines(self, symbol: str, interval: str, limit: int = 500) -> Optional[pd.DataFrame]:
+    def _call_api(self, endpoint: str, method, **params):
+        """Executa uma chamada do client da Binance contabilizando o peso da requisição"""
+        cost = self.weight_governor.acquire(endpoint, params)
         try:
-            # Adicionar um pequeno delay para evitar atingir limites de API
-            time.sleep(0.1)
-            
-            # Adicionar timeout para evitar que a requisição fique presa
-            klines = self.client.futures_klines(symbol=symbol, interval=interval, limit=limit)
-            colunas = ['timestamp', 'open', 'high', 'low', 'close', 'volume',
-                       'close_time', 'quote_volume', 'trades', 'taker_buy_base',
-                       'taker_buy_quote', 'ignore']
-            
-            df = pd.DataFrame(data=klines)
-            df.columns = colunas
-            
-            df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
-            for col in ['open', 'high', 'low', 'close', 'volume']:
-                df[col] = df[col].astype(float)
-            return df
+            return method(**params)
+        except Exception as e:
+            if getattr(e, 'status_code', None) in (418, 429):
+                self.weight_governor.backoff(60)
+            raise
+        finally:
+            response = getattr(self.client, 'response', None)
+            self.weight_governor.release(cost, response.headers if response is not None else None)
+
+    def _fetch_klines(self, symbol: str, interval: str, limit: int, start_time: Optional[int] = None) -> Optional[np.ndarray]:
+        """Busca klines na API de futuros (a partir de start_time, se informado) e decodifica direto para numpy"""
+        params = {'symbol': symbol, 'interval': interval, 'limit': limit}
+        if start_time is not None:
+            params['startTime'] = start_time
+        cost = self.weight_governor.acquire('klines', params)
+        response = None
+        try:
+            response = self.transport.get(f"{self.futures_api}/klines", params=params)
+            if response.status_code in (418, 429):
+                self.weight_governor.backoff(float(response.headers.get('Retry-After', 60)))
+            if response.status_code != 200:
+                print(f"❌ Erro ao obter klines para {symbol}. Status code: {response.status_code}")
+                return None
+            return decode_klines(response.content)
+        finally:
+            self.weight_governor.release(cost, response.headers if response is not None else None)
+
+    def _records_to_frame(self, records: np.ndarray, symbol: Optional[str] = None,
+                          interval: Optional[str] = None) -> pd.DataFrame:
+        df = Candles.from_records(records).to_frame()
+        # Identificação usada pelo cache de indicadores
+        df.attrs['symbol'] = symbol
+        df.attrs['interval'] = interval
+        return df
+
+    def _indicator(self, df: pd.DataFrame, indicator: str, params: tuple, compute) -> Any:
+        """Resultado do indicador reaproveitado do cache quando o DataFrame identifica símbolo e timeframe"""
+        symbol = df.attrs.get('symbol')
+        if symbol is None:
+            return compute()
+        return self.indicator_cache.get_or_compute(symbol, df.attrs.get('interval'), indicator, params, df, compute)
+
+    def start_kline_stream(self) -> None:
+        """Passa a receber os candles dos top_pairs via WebSocket em vez de consultar a API REST"""
+        if self.kline_stream is None:
+            intervals = [self.entry_timeframe]
+            if not can_resample(self.entry_timeframe, self.trend_timeframe):
+                intervals.append(self.trend_timeframe)
+            self.kline_stream = KlineStreamIngester(intervals=intervals)
+        self.kline_stream.start(self.top_pairs)
+
+    def stop_kline_stream(self) -> None:
+        if self.kline_stream is not None:
+            self.kline_stream.stop()
+
+    def get_kline_records(self, symbol: str, interval: str, limit: int = 500) -> Optional[np.ndarray]:
+        """Retorna os últimos `limit` candles como array estruturado (KLINE_DTYPE)"""
+        try:
+            # Usar os candles recebidos pelo stream, quando disponíveis
+            if self.kline_stream is not None:
+                records = self.kline_stream.get(symbol, interval, limit)
+                if records is not None:
+                    return records
+
+            def fetch(start_time, n):
+                self.rate_limiter.acquire()
+                return self._fetch_klines(symbol, interval, n, start_time)
+
+            # Servir do armazenamento local, buscando na API apenas os candles novos
+            records = self.kline_store.sync(symbol, interval, limit, fetch, max_age=self.kline_max_age)
+            if records is None or len(records) == 0:
+                return None
+            if self.kline_stream is not None:
+                self.kline_stream.seed(symbol, interval, records)
+            return records
             
         except KeyboardInterrupt:
             print(f"\n{Fore.YELLOW}⚠️ Operação interrompida pelo usuário{Style.RESET_ALL}")
@@ -106,22 +246,98 @@ class TechnicalAnalysis:
             print(f"❌ Erro ao obter klines para {symbol}: {e}")
             return None
 
+    def get_candles(self, symbol: str, interval: str, limit: int = 500) -> Optional[Candles]:
+        """Candles em arrays numpy, sem montar DataFrame"""
+        records = self.get_kline_records(symbol, interval, limit)
+        if records is None:
+            return None
+        return Candles.from_records(records)
+
+    def get_klines(self, symbol: str, interval: str, limit: int = 500) -> Optional[pd.DataFrame]:
+        records = self.get_kline_records(symbol, interval, limit)
+        if records is None:
+            return None
+        return self._records_to_frame(records, symbol, interval)
+
+    def get_records_many(self, symbols: List[str], interval: str, limit: int = 500) -> Dict[str, np.ndarray]:
+        """Obtém klines de vários símbolos em paralelo (apenas os que não estão atualizados localmente)"""
+        result = {}
+        try:
+            plans = {}
+            for symbol in symbols:
+                if self.kline_stream is not None:
+                    records = self.kline_stream.get(symbol, interval, limit)
+                    if records is not None:
+                        result[symbol] = records
+                        continue
+                if self.kline_store.is_fresh(symbol, interval, self.kline_max_age):
+                    records = self.kline_store.load(symbol, interval, limit)
+                    if len(records) >= limit:
+                        # Aquecer o buffer do stream também a partir do armazenamento local
+                        if self.kline_stream is not None:
+                            self.kline_stream.seed(symbol, interval, records)
+                        result[symbol] = records
+                        continue
+                plans[symbol] = self.kline_store.plan(symbol, interval, limit)
+
+            results = self.async_fetcher.fetch_many([
+                (symbol, interval, fetch_limit, start_time)
+                for symbol, (start_time, fetch_limit) in plans.items()
+            ])
+
+            for symbol, (start_time, _) in plans.items():
+                klines = results.get((symbol, interval))
+                if klines is None:
+                    continue
+                records = self.kline_store.apply(symbol, interval, limit, start_time, klines)
+                if len(records):
+                    if self.kline_stream is not None:
+                        self.kline_stream.seed(symbol, interval, records)
+                    result[symbol] = records
+            return result
+
+        except KeyboardInterrupt:
+            print(f"\n{Fore.YELLOW}⚠️ Operação interrompida pelo usuário{Style.RESET_ALL}")
+            raise
+        except Exception as e:
+            print(f"❌ Erro ao obter klines em lote ({interval}): {e}")
+            return result
+
+    def get_klines_many(self, symbols: List[str], interval: str, limit: int = 500) -> Dict[str, pd.DataFrame]:
+        records = self.get_records_many(symbols, interval, limit)
+        return {symbol: self._records_to_frame(r, symbol, interval) for symbol, r in records.items()}
+
+    def get_trend_records(self, entry_records: Dict[str, np.ndarray], min_bars: int = signal_rules.MIN_BARS) -> Dict[str, np.ndarray]:
+        """Candles do timeframe de tendência, derivados dos de entrada sempre que possível"""
+        if not can_resample(self.entry_timeframe, self.trend_timeframe):
+            return self.get_records_many(list(entry_records), self.trend_timeframe)
+
+        result = {}
+        for symbol, records in entry_records.items():
+            trend_records = resample_klines(records, self.entry_timeframe, self.trend_timeframe)
+            if len(trend_records) < min_bars:
+                # Histórico de entrada curto demais: buscar o timeframe maior diretamente
+                trend_records = self.get_kline_records(symbol, self.trend_timeframe)
+            if trend_records is not None:
+                result[symbol] = trend_records
+        return result
+
     def analyze_trend(self, df: pd.DataFrame) -> Dict[str, Any]:
         """Analisa tendência no timeframe maior (4h)"""
         try:
-            close = pd.Series(df['close'].values)
-            ema20 = EMAIndicator(close=close, window=20).ema_indicator()
-            ema50 = EMAIndicator(close=close, window=50).ema_indicator()
-            ema200 = EMAIndicator(close=close, window=200).ema_indicator()
+            close = df['close'].to_numpy(dtype=float)
+            ema20 = self._indicator(df, 'ema', (20,), lambda: kernels.ema(close, 20))
+            ema50 = self._indicator(df, 'ema', (50,), lambda: kernels.ema(close, 50))
+            ema200 = self._indicator(df, 'ema', (200,), lambda: kernels.ema(close, 200))
             
-            current_price = float(df['close'].iloc[-1])
-            ema20_val = float(ema20.iloc[-1])
-            ema50_val = float(ema50.iloc[-1])
-            ema200_val = float(ema200.iloc[-1])
+            current_price = float(close[-1])
+            ema20_val = float(ema20[-1])
+            ema50_val = float(ema50[-1])
+            ema200_val = float(ema200[-1])
             
             # Verificar inclinação das EMAs
-            ema20_slope = (ema20.iloc[-1] - ema20.iloc[-5]) / ema20.iloc[-5] * 100
-            ema50_slope = (ema50.iloc[-1] - ema50.iloc[-5]) / ema50.iloc[-5] * 100
+            ema20_slope = (ema20[-1] - ema20[-5]) / ema20[-5] * 100
+            ema50_slope = (ema50[-1] - ema50[-5]) / ema50[-5] * 100
             
             trend_strength = 0
             
@@ -149,15 +365,15 @@ class TechnicalAnalysis:
     def check_pullback(self, df: pd.DataFrame, is_uptrend: bool) -> Dict[str, Any]:
         """Verifica pullback no timeframe menor (1h)"""
         try:
-            close = pd.Series(df['close'].values)
-            ema8 = EMAIndicator(close=close, window=8).ema_indicator()
-            ema21 = EMAIndicator(close=close, window=21).ema_indicator()
-            rsi = RSIIndicator(close=close, window=14).rsi()
+            close = df['close'].to_numpy(dtype=float)
+            ema8 = self._indicator(df, 'ema', (8,), lambda: kernels.ema(close, 8))
+            ema21 = self._indicator(df, 'ema', (21,), lambda: kernels.ema(close, 21))
+            rsi = self._indicator(df, 'rsi', (14,), lambda: kernels.rsi(close, 14))
             
-            current_price = float(df['close'].iloc[-1])
-            ema8_val = float(ema8.iloc[-1])
-            ema21_val = float(ema21.iloc[-1])
-            rsi_val = float(rsi.iloc[-1])
+            current_price = float(close[-1])
+            ema8_val = float(ema8[-1])
+            ema21_val = float(ema21[-1])
+            rsi_val = float(rsi[-1])
             
             # Verificar direção do preço recente
             price_direction = df['close'].iloc[-3:].pct_change().mean()
@@ -196,11 +412,10 @@ class TechnicalAnalysis:
             recent_df = df.iloc[-20:]
             
             # Calcular bandas de Bollinger para identificar consolidação
-            from ta.volatility import BollingerBands
-            bollinger = BollingerBands(close=pd.Series(recent_df['close']), window=20, window_dev=2)
+            mavg, upper, lower = kernels.bollinger(recent_df['close'].to_numpy(dtype=float), window=20, window_dev=2)
             
             # Largura das bandas (indicador de consolidação)
-            bb_width = (bollinger.bollinger_hband() - bollinger.bollinger_lband()) / bollinger.bollinger_mavg()
+            bb_width = pd.Series((upper - lower) / mavg)
             
             # Verificar se houve consolidação recente (bandas estreitas) seguida de expansão
             was_consolidating = bb_width.iloc[-5:-2].mean() < 0.05
@@ -246,107 +461,206 @@ class TechnicalAnalysis:
         try:
             print(f"\nIniciando análise de {symbol}")
 
-            # Análise de tendência em 4h
-            trend_df = self.get_klines(symbol, self.trend_timeframe)
-            if trend_df is None or len(trend_df) < 50:
-                return None
-
             # Obter dados do timeframe de entrada
-            entry_df = self.get_klines(symbol, self.entry_timeframe)
-            if entry_df is None or len(entry_df) < 50:
+            entry_records = self.get_kline_records(symbol, self.entry_timeframe)
+            if entry_records is None:
                 return None
 
-            print(f"\nAnalisando {symbol}:")
+            signals = self.analyze_universe({symbol: entry_records})
+            return signals[0] if signals else None
 
-            # Análise de tendência
-            trend = self.analyze_trend(trend_df)
-            if trend['trend_strength'] == 0:
-                print(f"❌ {symbol}: Sem tendência definida")
-                return None
+        except Exception as e:
+            print(f"❌ Erro detalhado na análise de {symbol}: {str(e)}")
+            traceback.print_exc()
+            return None
 
-            # Calcular scores
-            trend_score = abs(trend['trend_strength']) * 10
-            alignment_score = self.check_timeframe_alignment(trend_df, entry_df)
-            market_score = self.calculate_market_conditions(entry_df)
-            quality_score = trend_score + alignment_score + market_score
+    def _trend_strength(self, trend: Dict[str, np.ndarray]) -> np.ndarray:
+        return signal_rules.trend_strength(trend)
 
-            # Verificar se o quality_score atinge o mínimo configurado
-            if quality_score < self.quality_score_minimum:
-                print(f"❌ {symbol}: Score baixo ({quality_score:.1f}) - Mínimo: {self.quality_score_minimum}") # Adicionado .1f para formatar
-                return None
-            # --- Fim da Edição ---
+    def _target_variation(self, entry_price: np.ndarray, atr_value: np.ndarray, is_uptrend: np.ndarray) -> np.ndarray:
+        return signal_rules.target_variation(entry_price, atr_value, is_uptrend, self.target_atr_multiplier)
 
-            # Calcular preços e tempos
-            entry_price = float(entry_df['close'].iloc[-1])
-            entry_time = datetime.now()
+    def _trend_distance(self, trend: Dict[str, np.ndarray]) -> np.ndarray:
+        return signal_rules.trend_distance(trend, self.min_target_percentage)
 
-            # Calcular ATR para definir o alvo
-            atr_value = AverageTrueRange(
-                high=pd.Series(entry_df['high'].values),
-                low=pd.Series(entry_df['low'].values),
-                close=pd.Series(entry_df['close'].values),
-                window=14 # Usar a mesma janela que em calculate_volatility
-            ).average_true_range().iloc[-1]
+    def score_universe(self, trend: Dict[str, np.ndarray], entry: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        """Regras de pontuação (signal_rules.score_universe) com o volume mínimo deste analisador"""
+        return signal_rules.score_universe(trend, entry, self.min_volume)
 
-            # Definir multiplicador do ATR para o alvo (ex: 2 * ATR)
-            atr_multiplier = 2.0
-            target_distance = atr_value * atr_multiplier
+    def _universe_features(self, records: Dict[str, np.ndarray], interval: str, kind: str,
+                           save_state: bool) -> Tuple[List[str], Dict[str, np.ndarray]]:
+        """Features de um timeframe para os símbolos de `records` (estado incremental ou cálculo em lote)"""
+        if self.indicator_states is not None:
+            # Estado incremental: só os candles novos são processados
+            result = self.indicator_states.universe(records, interval, kind)
+            if save_state:
+                self.indicator_states.save()
+            return result
+        features = trend_features if kind == 'trend' else entry_features
+        return compute_universe(records, features, interval, self.indicator_cache)
 
-            # Calcular preço alvo baseado no tipo de sinal e ATR
-            if trend['is_uptrend']: # Sinal LONG
-                target_price = entry_price + target_distance
-            else: # Sinal SHORT
-                target_price = entry_price - target_distance
+    @staticmethod
+    def _take(symbols: List[str], features: Dict[str, np.ndarray],
+              wanted: List[str]) -> Dict[str, np.ndarray]:
+        """Linhas de `features` na ordem de `wanted`"""
+        index = {symbol: i for i, symbol in enumerate(symbols)}
+        rows = np.array([index[s] for s in wanted], dtype=int)
+        return {name: values[rows] for name, values in features.items()}
 
-            # --- Início da Edição ---
-            # Calcular a variação percentual do alvo
-            if entry_price != 0: # Evitar divisão por zero
-                target_variation = ((target_price - entry_price) / entry_price) * 100
-                # Para sinais SHORT, a variação é negativa, queremos o valor absoluto
-                if not trend['is_uptrend']:
-                    target_variation = abs(target_variation)
-            else:
-                target_variation = 0 # Se entry_price for zero, variação é zero
+    def analyze_universe(self, entry_records: Dict[str, np.ndarray], save_state: bool = True,
+                         closed_only: bool = False) -> List[Dict]:
+        """
+        Analisa vários símbolos de uma vez, em estágios do mais barato ao mais caro. Cada estágio
+        só recebe (e só calcula features para) os candidatos que passaram pelo anterior.
+        Com `closed_only` (scan disparado pelo fechamento) o candle em andamento, com poucos segundos
+        de volume, é descartado e a análise é feita sobre o candle que acabou de fechar, como no backtest.
+        """
+        if closed_only:
+            now_ms = int(time.time() * 1000)
+            entry_records = {s: closed_klines(r, now_ms) if r is not None else None
+                             for s, r in entry_records.items()}
+        evaluated = len(entry_records)
+        # Distância até o gatilho de cada par (0 = sinal), para o agendamento por prioridade
+        distances = {symbol: np.inf for symbol in entry_records}
+        # Rejeições para o cache negativo: (razão, timeframe, abertura do candle de que dependem)
+        verdicts: Dict[str, Tuple[str, str, Optional[int]]] = {}
 
-            # Definir o mínimo de variação percentual desejado
-            min_target_percentage = 4.0
+        # 1. Histórico mínimo no timeframe de entrada
+        for symbol, records in entry_records.items():
+            if records is None or len(records) < signal_rules.MIN_BARS:
+                last_open = int(records['open_time'][-1]) if records is not None and len(records) else None
+                verdicts[symbol] = ('history', self.entry_timeframe, last_open)
+        entry_records = {s: r for s, r in entry_records.items() if r is not None and len(r) >= signal_rules.MIN_BARS}
+        rejected = {'history': evaluated - len(entry_records)}
+        signals: List[Dict] = []
+        try:
+            if not entry_records:
+                return signals
 
-            # Verificar se a variação do alvo atinge o mínimo
-            if target_variation < min_target_percentage:
-                print(f"❌ {symbol}: Variação do alvo ({target_variation:.2f}%) abaixo do mínimo ({min_target_percentage}%)")
-                return None
-            # --- Fim da Edição ---
+            # 2. Candles do timeframe de tendência (reamostrados; busca direta só para quem sobrou)
+            fetched_trend = self.get_trend_records(entry_records)
+            trend_records = {s: r for s, r in fetched_trend.items() if len(r) >= signal_rules.MIN_BARS}
+            rejected['data'] = len(entry_records) - len(trend_records)
+            # Só histórico curto de verdade vai para o cache; falha de busca é tentada de novo no próximo ciclo
+            for symbol in fetched_trend.keys() - trend_records.keys():
+                verdicts[symbol] = ('data', self.trend_timeframe, None)
 
-            # Gerar sinal com todos os campos necessários
-            signal = {
-                'symbol': symbol,
-                'type': 'LONG' if trend['is_uptrend'] else 'SHORT',
-                'entry_price': round(entry_price, 8),
-                'entry_time': entry_time.strftime('%Y-%m-%d %H:%M:%S'),
-                'target_price': round(target_price, 8),
-                'target_exit_time': (entry_time + timedelta(days=7)).strftime('%Y-%m-%d %H:%M:%S'),
-                'status': 'OPEN',
-                'exit_price': '',
-                'variation': '',
-                'result': '',
-                'quality_score': int(quality_score),
-                'signal_class': self._get_signal_class(quality_score),
-                'trend_score': int(trend_score),
-                'alignment_score': int(alignment_score),
-                'market_score': int(market_score),
-                'strategy_info': trend['description'],
-                'trend_timeframe': self.trend_timeframe,
-                'entry_timeframe': self.entry_timeframe
-            }
+            # 3. Tendência: só as features do timeframe maior, com menos candles
+            trend_symbols, trend = self._universe_features(trend_records, self.trend_timeframe, 'trend', save_state)
+            if not trend_symbols:
+                return signals
+            trend_strength = self._trend_strength(trend)
+            no_trend = trend_strength == 0
+            for symbol, distance in zip(np.array(trend_symbols)[no_trend], self._trend_distance(trend)[no_trend]):
+                print(f"❌ {symbol}: Sem tendência definida")
+                distances[symbol] = distance
+                verdicts[symbol] = ('trend', self.trend_timeframe, int(trend_records[symbol]['open_time'][-1]))
+            candidates = [s for s, strength in zip(trend_symbols, trend_strength) if strength != 0]
+            rejected['trend'] = len(trend_symbols) - len(candidates)
+            if not candidates:
+                return signals
 
-            print(f"Sinal gerado: {signal}")
-            return signal
+            # 4. Alvo mínimo: features de entrada apenas para os pares com tendência
+            entry_symbols, entry = self._universe_features(
+                {s: entry_records[s] for s in candidates}, self.entry_timeframe, 'entry', save_state
+            )
+            trend = self._take(trend_symbols, trend, entry_symbols)
+            is_uptrend = self._trend_strength(trend) > 0
+            target_variation = self._target_variation(entry['price'], entry['atr'], is_uptrend)
+            reaches_target = target_variation >= self.min_target_percentage
+            for i in np.flatnonzero(~reaches_target):
+                print(f"❌ {entry_symbols[i]}: Variação do alvo ({target_variation[i]:.2f}%) "
+                      f"abaixo do mínimo ({self.min_target_percentage}%)")
+                distances[entry_symbols[i]] = 1 - target_variation[i] / self.min_target_percentage
+                verdicts[entry_symbols[i]] = ('target', self.entry_timeframe,
+                                              int(entry_records[entry_symbols[i]]['open_time'][-1]))
+            rejected['target'] = int(np.count_nonzero(~reaches_target))
+            if not reaches_target.any():
+                return signals
+            symbols = [s for s, ok in zip(entry_symbols, reaches_target) if ok]
+            entry = {name: values[reaches_target] for name, values in entry.items()}
+            trend = {name: values[reaches_target] for name, values in trend.items()}
 
-        except Exception as e:
-            print(f"❌ Erro detalhado na análise de {symbol}: {str(e)}")
-            traceback.print_exc()
+            # 5. Pontuação completa e score mínimo
+            scores = self.score_universe(trend, entry)
+            rejected['quality'] = 0
+            for i, symbol in enumerate(symbols):
+                quality_score = scores['quality_score'][i]
+                if quality_score < self.quality_score_minimum:
+                    print(f"❌ {symbol}: Score baixo ({quality_score:.1f}) - Mínimo: {self.quality_score_minimum}")
+                    rejected['quality'] += 1
+                    distances[symbol] = 1 - quality_score / self.quality_score_minimum
+                    verdicts[symbol] = ('quality', self.entry_timeframe, int(entry_records[symbol]['open_time'][-1]))
+                    continue
+                distances[symbol] = 0.0
+                signal = self._build_signal(
+                    symbol,
+                    is_uptrend=bool(scores['trend_strength'][i] > 0),
+                    entry_price=float(entry['price'][i]),
+                    atr_value=float(entry['atr'][i]),
+                    scores={name: values[i] for name, values in scores.items()}
+                )
+                if signal:
+                    signals.append(signal)
+            return signals
+        finally:
+            self.filter_stats.add(evaluated=evaluated, accepted=len(signals), **rejected)
+            if self.symbol_priority is not None:
+                self.symbol_priority.record(distances)
+            if self.negative_cache is not None:
+                for symbol, (reason, interval, last_open) in verdicts.items():
+                    self.negative_cache.reject(symbol, reason, interval, last_open)
+
+    def _build_signal(self, symbol: str, is_uptrend: bool, entry_price: float,
+                      atr_value: float, scores: Dict[str, Any]) -> Optional[Dict]:
+        """Monta o sinal com alvo em 2 ATR, descartando alvos abaixo da variação mínima"""
+        entry_time = datetime.now()
+
+        # Multiplicador do ATR para o alvo (ex: 2 * ATR)
+        target_distance = atr_value * self.target_atr_multiplier
+
+        # Calcular preço alvo baseado no tipo de sinal e ATR
+        if is_uptrend: # Sinal LONG
+            target_price = entry_price + target_distance
+        else: # Sinal SHORT
+            target_price = entry_price - target_distance
+
+        # Calcular a variação percentual do alvo
+        if entry_price != 0: # Evitar divisão por zero
+            target_variation = abs((target_price - entry_price) / entry_price) * 100
+        else:
+            target_variation = 0 # Se entry_price for zero, variação é zero
+
+        # Verificar se a variação do alvo atinge o mínimo
+        if target_variation < self.min_target_percentage:
+            print(f"❌ {symbol}: Variação do alvo ({target_variation:.2f}%) abaixo do mínimo ({self.min_target_percentage}%)")
             return None
 
+        quality_score = scores['quality_score']
+        signal = {
+            'symbol': symbol,
+            'type': 'LONG' if is_uptrend else 'SHORT',
+            'entry_price': round(entry_price, 8),
+            'entry_time': entry_time.strftime('%Y-%m-%d %H:%M:%S'),
+            'target_price': round(target_price, 8),
+            'target_exit_time': (entry_time + timedelta(days=7)).strftime('%Y-%m-%d %H:%M:%S'),
+            'status': 'OPEN',
+            'exit_price': '',
+            'variation': '',
+            'result': '',
+            'quality_score': int(quality_score),
+            'signal_class': self._get_signal_class(quality_score),
+            'trend_score': int(scores['trend_score']),
+            'alignment_score': int(scores['alignment_score']),
+            'market_score': int(scores['market_score']),
+            'strategy_info': 'Alta' if is_uptrend else 'Baixa',
+            'trend_timeframe': self.trend_timeframe,
+            'entry_timeframe': self.entry_timeframe
+        }
+
+        print(f"Sinal gerado: {signal}")
+        return signal
+
     def _get_signal_class(self, quality_score: float) -> str:
         """Retorna a classificação do sinal baseado no quality_score"""
         # --- Início da Edição ---
@@ -390,14 +704,17 @@ class TechnicalAnalysis:
             print(f"❌ Erro ao calcular condições de mercado: {e}")
             return 0
 
+    def _atr(self, df: pd.DataFrame, window: int = 14) -> np.ndarray:
+        return self._indicator(df, 'atr', (window,), lambda: kernels.atr(
+            df['high'].to_numpy(dtype=float),
+            df['low'].to_numpy(dtype=float),
+            df['close'].to_numpy(dtype=float),
+            window
+        ))
+
     def calculate_volatility(self, df: pd.DataFrame) -> float:
         try:
-            atr = AverageTrueRange(
-                high=pd.Series(df['high'].values),
-                low=pd.Series(df['low'].values),
-                close=pd.Series(df['close'].values),
-                window=14
-            ).average_true_range().iloc[-1]
+            atr = self._atr(df)[-1]
             
             return (atr / df['close'].iloc[-1]) * 100
         except Exception as e:
@@ -429,37 +746,60 @@ class TechnicalAnalysis:
             print(f"❌ Erro ao calcular pontuação: {e}")
             return 0
 
-    def scan_market(self, verbose: bool = True) -> List[Dict[str, Any]]:
+    def scan_market(self, verbose: bool = True, symbols: Optional[List[str]] = None,
+                    new_cycle: bool = True, closed_only: bool = False) -> List[Dict[str, Any]]:
+        """
+        Analisa `symbols` (por padrão todos os top_pairs) e salva os sinais encontrados.
+        `new_cycle` é falso quando o scan só completa um ciclo já aberto (ScanScheduler.new_cycle);
+        `closed_only` analisa o último candle fechado em vez do em andamento (ScanScheduler.closed_only).
+        """
         signals = []
+        if symbols is None:
+            symbols = self.top_pairs
         try:
             if verbose:
                 print("\n📡 Iniciando scan de mercado...")
+
+            # Pares com sinal aberto não geram outro: nem buscar os candles
+            open_symbols = self.open_signals.symbols()
+            candidates = [s for s in symbols if s not in open_symbols]
+            if verbose and len(candidates) < len(symbols):
+                print(f"⏭️ {len(symbols) - len(candidates)} pares com sinal aberto ignorados")
+            symbols = candidates
+            if self.negative_cache is not None:
+                # Rejeitados cujo candle ainda não fechou: o resultado seria o mesmo
+                symbols = self.negative_cache.filter(symbols)
+            if self.symbol_priority is not None:
+                symbols = self._prioritize(symbols, verbose, new_cycle)
             
-            # Verificar atualização dos pares
-            current_time = time.time()
-            if current_time - self.pairs_last_update > self.update_interval:
-                self.select_top_pairs()
-                self.pairs_last_update = current_time
-            
-            # Obter gerenciador de sinais
-            from .gerenciar_sinais import GerenciadorSinais
-            gerenciador = GerenciadorSinais()
+            # Verificar atualização dos pares (em segundo plano, sem bloquear o scan)
+            if self._top_pairs_stale():
+                self.refresh_pairs_async()
             
-            # Analisar pares
-            for idx, symbol in enumerate(self.top_pairs):
-                try:
-                    signal = self.analyze_symbol(symbol)
-                    if signal:
-                        if gerenciador.save_signal(signal):
-                            signals.append(signal)
-                            print(f"✅ Sinal encontrado: {symbol}")
-                        else:
-                            print(f"❌ Erro ao salvar sinal: {symbol}")
-                except Exception as e:
-                    print(f"❌ Erro ao analisar {symbol}: {e}")
-                    continue
-            
-            if verbose:        
+            # Buscar, analisar e persistir em estágios paralelos
+            self.filter_stats.reset()
+            config = server.config['SCAN']
+            pipeline = ScanPipeline(
+                self,
+                batch_size=config['BATCH_SIZE'],
+                fetch_workers=config['FETCH_WORKERS'],
+                analysis_workers=config['ANALYSIS_WORKERS'],
+                queue_size=config['QUEUE_SIZE'],
+                closed_only=closed_only
+            )
+            signals = pipeline.run(symbols, self.persist_signals)
+            if verbose:
+                stats = pipeline.stats
+                print(f"\n⏱️ Scan de {stats['symbols']} pares em {stats['total']:.1f}s "
+                      f"(busca {stats.get('fetch', 0):.1f}s, análise {stats.get('analysis', 0):.1f}s, "
+                      f"gravação {stats.get('persist', 0):.1f}s)")
+                print(f"🔎 Filtros: {self.filter_stats.summary()}")
+                if self.negative_cache is not None:
+                    cache_stats = self.negative_cache.stats()
+                    if cache_stats:
+                        print("🗃️ Cache negativo: " + ", ".join(
+                            f"{reason} {s['hits']} hits ({s['hit_rate']:.0%})" for reason, s in cache_stats.items()
+                        ))
                 print(f"\n✨ {len(signals)} sinais encontrados")
             return signals
             
@@ -469,15 +809,44 @@ class TechnicalAnalysis:
                 traceback.print_exc()
             return signals
 
+    def _prioritize(self, symbols: List[str], verbose: bool = True, new_cycle: bool = True) -> List[str]:
+        """
+        Pares perto do gatilho a cada ciclo, os distantes com espera crescente.
+        Os que sobram do orçamento ou estão em espera voltam ao agendador para os próximos ciclos.
+        """
+        selected, over_budget, waiting = self.symbol_priority.partition(symbols, advance=new_cycle)
+        if self.scan_scheduler is not None:
+            self.scan_scheduler.requeue(over_budget, wake=True)
+            self.scan_scheduler.requeue(waiting, wake=False)
+        if verbose and (over_budget or waiting):
+            print(f"⏭️ {len(over_budget)} pares acima do orçamento e {len(waiting)} em espera "
+                  f"adiados para os próximos ciclos")
+        return selected
+
+    def persist_signals(self, signals: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Grava os sinais de um scan numa única escrita e o estado dos indicadores; retorna os sinais salvos"""
+        if self._gerenciador is None:
+            from .gerenciar_sinais import GerenciadorSinais
+            self._gerenciador = GerenciadorSinais()
+        batch = self._gerenciador.batch()
+        for signal in signals:
+            batch.add(signal)
+        saved = batch.commit()
+        for signal in saved:
+            print(f"✅ Sinal encontrado: {signal['symbol']}")
+        if self.indicator_states is not None:
+            self.indicator_states.save()
+        return saved
+
     def update_futures_pairs(self):
         """Atualiza a lista de pares futuros"""
         try:
             print("\n🔄 Atualizando lista de pares...")
-            exchange_info = self.client.futures_exchange_info()
+            exchange_info = self._call_api('exchangeInfo', self.client.futures_exchange_info)
             
             # --- Início da Edição ---
             # Obter informações de alavancagem
-            leverage_info = self.client.futures_leverage_bracket()
+            leverage_info = self._call_api('leverageBracket', self.client.futures_leverage_bracket)
             leverage_map = {item['symbol']: item['brackets'][0]['initialLeverage'] for item in leverage_info}
 
             # Filtrar pares com base no status, tipo de contrato, quoteAsset e alavancagem mínima
@@ -491,6 +860,7 @@ class TechnicalAnalysis:
             # --- Fim da Edição ---
 
             print(f"✅ {len(self.futures_pairs)} pares atualizados (>= 50x alavancagem)")
+            self.metadata_cache.set('futures_pairs', self.futures_pairs)
             return True
         except Exception as e:
             print(f"❌ Erro ao atualizar pares: {e}")
@@ -500,66 +870,66 @@ class TechnicalAnalysis:
     def get_24h_volume(self, symbol: str) -> float:
         """Retorna o volume em USDT das últimas 24h"""
         try:
-            ticker = self.client.futures_ticker(symbol=symbol)
+            ticker = self._call_api('ticker/24hr', self.client.futures_ticker, symbol=symbol)
             return float(ticker['quoteVolume'])
         except Exception as e:
             print(f"❌ Erro ao obter volume de {symbol}: {e}")
             return 0
 
     def check_divergence(self, df: pd.DataFrame, trend: Dict) -> Dict[str, Any]:
-        """Check for RSI divergence"""
+        """Divergência entre preço e RSI nos dois últimos pivôs de swing"""
         try:
             if len(df) < 14:
                 return {'valid': False, 'description': 'Insufficient data'}
             
-            # Convert df['close'] to Series explicitly to satisfy type checker
-            close_series = pd.Series(df['close'].values)
-            rsi = RSIIndicator(close=close_series).rsi()
-            is_valid = False
-            description = ''
+            rsi = self._indicator(df, 'rsi', (14,), lambda: kernels.rsi(df['close'].to_numpy(dtype=float), 14))
+            divergence = find_divergence(df['high'].to_numpy(dtype=float), df['low'].to_numpy(dtype=float),
+                                         rsi, trend['is_uptrend'])
+            is_valid = divergence['valid']
             
             if trend['is_uptrend']:
-                is_valid = rsi.iloc[-1] < 30
                 description = 'Bullish RSI divergence'
             else:
-                is_valid = rsi.iloc[-1] > 70
                 description = 'Bearish RSI divergence'
                 
             return {
                 'valid': is_valid,
                 'description': description,
-                'strength': 2 if is_valid else 0
+                'strength': 2 if is_valid else 0,
+                'pivots': divergence['pivots']
             }
         except Exception as e:
             print(f"❌ Erro ao verificar divergência: {e}")
             return {'valid': False, 'description': 'Error', 'strength': 0}
 
     def check_fibonacci_levels(self, df: pd.DataFrame, trend: Dict) -> Dict[str, Any]:
-        """Check Fibonacci retracement levels"""
+        """Retrações de Fibonacci da última perna de swing no sentido da tendência"""
         try:
             if len(df) < 20:
                 return {'valid': False, 'description': 'Insufficient data'}
             
-            high = df['high'].max()
-            low = df['low'].min()
-            current = df['close'].iloc[-1]
+            high = df['high'].to_numpy(dtype=float)
+            low = df['low'].to_numpy(dtype=float)
+            current = float(df['close'].iloc[-1])
             
-            fib_levels = [0.236, 0.382, 0.5, 0.618, 0.786]
-            is_valid = False
+            leg = last_swing_leg(high, low, trend['is_uptrend'])
+            if leg is None:
+                return {'valid': False, 'description': 'No swing leg', 'strength': 0}
+            start, end = leg
             
             if trend['is_uptrend']:
-                retracement = high - (high - low) * np.array(fib_levels)
-                is_valid = any(abs(current - level) / current < 0.01 for level in retracement)
+                retracement = fibonacci_levels(low[start], high[end], is_uptrend=True)
                 description = 'Bullish Fibonacci support'
             else:
-                retracement = low + (high - low) * np.array(fib_levels)
-                is_valid = any(abs(current - level) / current < 0.01 for level in retracement)
+                retracement = fibonacci_levels(low[end], high[start], is_uptrend=False)
                 description = 'Bearish Fibonacci resistance'
+            is_valid = bool((np.abs(current - retracement) / current < 0.01).any())
                 
             return {
                 'valid': is_valid,
                 'description': description,
-                'strength': 2 if is_valid else 0
+                'strength': 2 if is_valid else 0,
+                'levels': retracement.tolist()
             }
         except Exception as e:
             print(f"❌ Erro ao verificar níveis de Fibonacci: {e}")
@@ -578,6 +948,104 @@ class TechnicalAnalysis:
             print(f"❌ Erro na análise de mercado: {e}")
             return signals
 
+    def _score_pairs_by_klines(self, symbols: List[str]) -> pd.DataFrame:
+        """Score de volume/volatilidade calculado a partir de 100 candles de 1h de cada par"""
+        pairs_data = []
+        total_pairs = len(symbols)
+        
+        print(f"🔄 Obtendo candles de {total_pairs} pares...")
+        frames = self.get_klines_many(symbols, self.entry_timeframe, limit=100)
+        
+        for i, symbol in enumerate(symbols):
+            try:
+                print(f"\r🔄 Analisando {symbol}... ({i+1}/{total_pairs})", end="")
+                
+                df = frames.get(symbol)
+                if df is None or len(df) < 20:
+                    continue
+                    
+                # Calcular volume médio diário (em USD)
+                avg_volume = df['volume'].mean() * df['close'].mean()
+                
+                # Calcular volatilidade (ATR como % do preço)
+                atr = self._atr(df)
+                
+                volatility = (atr[-1] / df['close'].iloc[-1]) * 100
+                
+                # Calcular score (combinação de volume e volatilidade)
+                volume_score = min(avg_volume / 1000000, 10)
+                volatility_score = min(volatility, 10)
+                
+                # Score final (50% volume, 50% volatilidade)
+                final_score = (volume_score * 0.5 + volatility_score * 0.5) * 10
+                
+                pairs_data.append({
+                    'symbol': symbol,
+                    'volume': avg_volume,
+                    'volatility': volatility,
+                    'score': final_score
+                })
+                
+            except KeyboardInterrupt:
+                print(f"\n{Fore.YELLOW}⚠️ Seleção de pares interrompida pelo usuário{Style.RESET_ALL}")
+                raise
+            except Exception as e:
+                continue
+        
+        return pd.DataFrame(pairs_data, columns=['symbol', 'volume', 'volatility', 'score'])
+
+    def _score_pairs_by_ticker(self) -> pd.DataFrame:
+        """
+        Score de todos os pares com uma única chamada a /fapi/v1/ticker/24hr.
+        Volume médio por hora = quoteVolume / 24; volatilidade aproximada pelo range de 24h
+        convertido para a escala do ATR de 1h (range / sqrt(24)).
+        """
+        tickers = self._call_api('ticker/24hr', self.client.futures_ticker)
+        eligible = set(self.futures_pairs)
+        tickers = [t for t in tickers if t['symbol'] in eligible]
+        if not tickers:
+            return pd.DataFrame(columns=['symbol', 'volume', 'volatility', 'score'])
+        
+        quote_volume = np.array([float(t['quoteVolume']) for t in tickers])
+        high = np.array([float(t['highPrice']) for t in tickers])
+        low = np.array([float(t['lowPrice']) for t in tickers])
+        last = np.array([float(t['lastPrice']) for t in tickers])
+        
+        avg_volume = quote_volume / 24
+        with np.errstate(divide='ignore', invalid='ignore'):
+            volatility = np.where(last > 0, (high - low) / last * 100 / np.sqrt(24), 0.0)
+        
+        volume_score = np.minimum(avg_volume / 1000000, 10)
+        volatility_score = np.minimum(volatility, 10)
+        score = (volume_score * 0.5 + volatility_score * 0.5) * 10
+        
+        return pd.DataFrame({
+            'symbol': [t['symbol'] for t in tickers],
+            'volume': avg_volume,
+            'volatility': volatility,
+            'score': score
+        })
+
+    def _rank_pairs_by_ticker(self, top_n: int, refine_margin: int) -> pd.DataFrame:
+        """Ranking pelo ticker de 24h, refinando com ATR de candles apenas os pares na fronteira do corte"""
+        pairs_df = self._score_pairs_by_ticker().sort_values('score', ascending=False)
+        if refine_margin <= 0 or len(pairs_df) <= top_n - refine_margin:
+            return pairs_df
+        
+        lower = max(0, top_n - refine_margin)
+        shortlist = pairs_df.iloc[lower:top_n + refine_margin]['symbol'].tolist()
+        refined = self._score_pairs_by_klines(shortlist)
+        if refined.empty:
+            return pairs_df
+        
+        pairs_df = pairs_df.set_index('symbol')
+        pairs_df.update(refined.set_index('symbol'))
+        pairs_df = pairs_df.reset_index()
+        # Pares acima da faixa refinada mantêm a posição; a faixa é reordenada pelo score de candles
+        head = pairs_df.iloc[:lower]
+        tail = pairs_df.iloc[lower:].sort_values('score', ascending=False)
+        return pd.concat([head, tail], ignore_index=True)
+
     def select_top_pairs(self):
         """Seleciona os melhores pares com base em volume e volatilidade"""
         try:
@@ -587,61 +1055,28 @@ class TechnicalAnalysis:
             if not self.futures_pairs:
                 self.update_futures_pairs()
             
-            pairs_data = []
-            total_pairs = len(self.futures_pairs)
+            selection = server.config['TRADING']['PAIR_SELECTION']
+            top_n = selection['top_pairs']
             
-            for i, symbol in enumerate(self.futures_pairs):
+            pairs_df = None
+            if selection['mode'] == 'ticker':
                 try:
-                    print(f"\r🔄 Analisando {symbol}... ({i+1}/{total_pairs})", end="")
-                    
-                    # Adicionar um pequeno delay para evitar atingir limites de API
-                    time.sleep(0.1)
-                    
-                    df = self.get_klines(symbol, self.entry_timeframe, limit=100)
-                    if df is None or len(df) < 20:
-                        continue
-                        
-                    # Calcular volume médio diário (em USD)
-                    avg_volume = df['volume'].mean() * df['close'].mean()
-                    
-                    # Calcular volatilidade (ATR como % do preço)
-                    atr = AverageTrueRange(
-                        high=pd.Series(df['high'].values),
-                        low=pd.Series(df['low'].values),
-                        close=pd.Series(df['close'].values),
-                        window=14
-                    ).average_true_range()
-                    
-                    volatility = (atr.iloc[-1] / df['close'].iloc[-1]) * 100
-                    
-                    # Calcular score (combinação de volume e volatilidade)
-                    volume_score = min(avg_volume / 1000000, 10)
-                    volatility_score = min(volatility, 10)
-                    
-                    # Score final (50% volume, 50% volatilidade)
-                    final_score = (volume_score * 0.5 + volatility_score * 0.5) * 10
-                    
-                    pairs_data.append({
-                        'symbol': symbol,
-                        'volume': avg_volume,
-                        'volatility': volatility,
-                        'score': final_score
-                    })
-                    
-                except KeyboardInterrupt:
-                    print(f"\n{Fore.YELLOW}⚠️ Seleção de pares interrompida pelo usuário{Style.RESET_ALL}")
-                    raise
+                    pairs_df = self._rank_pairs_by_ticker(top_n, selection['refine_margin'])
                 except Exception as e:
-                    continue
+                    print(f"\n⚠️ Erro no ranking por ticker 24h, usando candles: {e}")
+            if pairs_df is None or pairs_df.empty:
+                pairs_df = self._score_pairs_by_klines(self.futures_pairs)
             
             # Ordenar por score e selecionar os melhores
-            pairs_df = pd.DataFrame(pairs_data)
             if len(pairs_df) > 0:
                 # --- Início da Edição ---
                 # Selecionar os 100 melhores pares
-                pairs_df = pairs_df.sort_values('score', ascending=False).head(100)
+                pairs_df = pairs_df.sort_values('score', ascending=False, kind='stable').head(top_n)
                 # --- Fim da Edição ---
                 self.top_pairs = pairs_df['symbol'].tolist()
+                self.metadata_cache.set('top_pairs', self.top_pairs)
+                if self.kline_stream is not None:
+                    self.kline_stream.start(self.top_pairs)
                 
                 # Exibir os pares selecionados
                 print("\n\n✅ Top pares selecionados:")
@@ -657,4 +1092,4 @@ class TechnicalAnalysis:
             self.top_pairs = ['BTCUSDT', 'ETHUSDT', 'BNBUSDT', 'SOLUSDT', 'XRPUSDT']
         except Exception as e:
             print(f"\n❌ Erro ao selecionar pares: {e}")
-            self.top_pairs = ['BTCUSDT', 'ETHUSDT', 'BNBUSDT', 'SOLUSDT', 'XRPUSDT']
\ No newline at end of file
+            self.top_pairs = ['BTCUSDT', 'ETHUSDT', 'BNBUSDT', 'SOLUSDT', 'XRPUSDT']
@@ -1,8 +1,8 @@
-import requests
 import json
 from typing import Optional
 from datetime import datetime
 from .database import Database
+from .http_transport import get_transport
 
 class TelegramNotifier:
     def __init__(self, token: Optional[str] = None, chat_id: Optional[str] = None):
@@ -10,6 +10,7 @@ class TelegramNotifier:
         self.token = token or self.db.get_config('telegram_token')
         self.chat_id = chat_id or self.db.get_config('telegram_chat_id')
         self.base_url = f"https://api.telegram.org/bot{self.token}"
+        self.transport = get_transport()
         
     def setup_credentials(self, token: str, chat_id: str) -> bool:
         """Configura as credenciais do Telegram no banco de dados"""
@@ -42,7 +43,7 @@ class TelegramNotifier:
             }
             
             print(f"📤 Tentando enviar mensagem para {self.chat_id}")
-            response = requests.post(url, json=data)
+            response = self.transport.post(url, json=data)
             
             if response.status_code == 200:
                 print("✅ Mensagem enviada com sucesso")
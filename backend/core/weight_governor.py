@@ -0,0 +1,135 @@
+import asyncio
+import threading
+import time
+from typing import Any, Dict, Mapping, Optional
+from config import server
+
+WEIGHT_HEADER = 'X-MBX-USED-WEIGHT-1m'
+
+
+def endpoint_weight(endpoint: str, params: Optional[Mapping[str, Any]] = None) -> int:
+    """Peso de uma requisição na API de futuros (conforme documentação da Binance)"""
+    params = params or {}
+    if endpoint == 'klines':
+        limit = int(params.get('limit', 500))
+        if limit < 100:
+            return 1
+        if limit < 500:
+            return 2
+        if limit <= 1000:
+            return 5
+        return 10
+    if endpoint == 'ticker/price':
+        return 1 if params.get('symbol') else 2
+    if endpoint == 'ticker/24hr':
+        return 1 if params.get('symbol') else 40
+    if endpoint == 'premiumIndex':
+        return 1 if params.get('symbol') else 10
+    # exchangeInfo, leverageBracket, ping, etc.
+    return 1
+
+
+class WeightGovernor:
+    """Controla o peso consumido por minuto na API de futuros por todo o processo"""
+
+    def __init__(self, limit: int, ceiling: int):
+        self.limit = limit
+        self.ceiling = ceiling
+        self._lock = threading.Lock()
+        self._window = self._current_window()
+        self._used = 0
+        self._pending = 0
+        self._blocked_until = 0.0
+
+    @staticmethod
+    def _current_window() -> int:
+        # A Binance zera o peso a cada minuto cheio
+        return int(time.time() // 60)
+
+    def _roll(self) -> None:
+        window = self._current_window()
+        if window != self._window:
+            self._window = window
+            self._used = self._pending
+
+    def _reserve(self, cost: int) -> float:
+        """Reserva `cost` de peso e retorna 0, ou quantos segundos aguardar antes de tentar de novo"""
+        with self._lock:
+            now = time.time()
+            if now < self._blocked_until:
+                return self._blocked_until - now
+            self._roll()
+            if self._used + cost <= self.ceiling:
+                self._used += cost
+                self._pending += cost
+                return 0.0
+            return (self._window + 1) * 60 - now + 0.05
+
+    def acquire(self, endpoint: str, params: Optional[Mapping[str, Any]] = None) -> int:
+        """Bloqueia até haver peso disponível e retorna o custo reservado"""
+        cost = endpoint_weight(endpoint, params)
+        while True:
+            wait = self._reserve(cost)
+            if wait <= 0:
+                return cost
+            print(f"⏳ Limite de peso da API próximo ({self._used}/{self.ceiling}), aguardando {wait:.1f}s")
+            time.sleep(wait)
+
+    async def acquire_async(self, endpoint: str, params: Optional[Mapping[str, Any]] = None) -> int:
+        cost = endpoint_weight(endpoint, params)
+        while True:
+            wait = self._reserve(cost)
+            if wait <= 0:
+                return cost
+            await asyncio.sleep(wait)
+
+    def release(self, cost: int, headers: Optional[Mapping[str, str]] = None) -> None:
+        """Conclui uma requisição, corrigindo o consumo com o header X-MBX-USED-WEIGHT-1m"""
+        with self._lock:
+            self._roll()
+            self._pending = max(0, self._pending - cost)
+            if headers is None:
+                return
+            used = headers.get(WEIGHT_HEADER) or headers.get(WEIGHT_HEADER.lower())
+            if used is not None:
+                try:
+                    self._used = int(used) + self._pending
+                except ValueError:
+                    pass
+
+    def backoff(self, seconds: float) -> None:
+        """Suspende novas requisições após 429/418 (Retry-After)"""
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, time.time() + seconds)
+        print(f"⚠️ API da Binance limitou as requisições, pausando por {seconds:.0f}s")
+
+    @property
+    def used_weight(self) -> int:
+        with self._lock:
+            self._roll()
+            return self._used
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Gauge do consumo atual de peso"""
+        used = self.used_weight
+        return {
+            'used_weight': used,
+            'ceiling': self.ceiling,
+            'limit': self.limit,
+            'utilization': round(used / self.limit, 4) if self.limit else 0,
+            'blocked': time.time() < self._blocked_until
+        }
+
+
+_weight_governor: Optional[WeightGovernor] = None
+_weight_governor_lock = threading.Lock()
+
+
+def get_weight_governor() -> WeightGovernor:
+    """Retorna o controlador de peso da API de futuros usado por todo o processo"""
+    global _weight_governor
+    with _weight_governor_lock:
+        if _weight_governor is None:
+            config = server.config['BINANCE_API']
+            _weight_governor = WeightGovernor(config['WEIGHT_LIMIT'], config['WEIGHT_CEILING'])
+        return _weight_governor
@@ -0,0 +1,231 @@
+"""
+Confere os kernels numpy (core/kernels.py) contra a biblioteca `ta` e mede o ganho de cada um.
+
+Uso: python kernel_benchmark.py [--trials N] [--seed S] [--save-fixtures]
+
+Os candles de tests/fixtures/klines (e os gravados pelo KlineStore em data/klines, se houver) são
+usados como fixtures; séries aleatórias de tamanho, escala e janela variados completam a verificação.
+Sai com código 1 se algum kernel divergir. Com --save-fixtures, os últimos candles de data/klines
+substituem as fixtures versionadas. A mesma verificação roda no pytest (tests/test_kernels.py).
+"""
+import argparse
+import glob
+import os
+import shutil
+import sys
+import time
+import numpy as np
+import pandas as pd
+from ta.momentum import RSIIndicator
+from ta.trend import EMAIndicator, MACD
+from ta.volatility import AverageTrueRange, BollingerBands
+from core import kernels
+from core.kline_store import KLINE_DTYPE
+
+RTOL = 1e-9
+WINDOWS = (8, 14, 20, 50)
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), 'tests', 'fixtures', 'klines')
+RECORDED_DIR = os.path.join(os.path.dirname(__file__), 'data', 'klines')
+
+
+def recorded_fixtures(limit: int = 20, dirs: tuple = (FIXTURES_DIR, RECORDED_DIR)):
+    """Candles no formato do KlineStore (*.ohlcv): as fixtures versionadas e os gravados localmente"""
+    paths = []
+    for base_dir in dirs:
+        paths.extend(sorted(glob.glob(os.path.join(base_dir, '*.ohlcv'))))
+    for path in paths[:limit]:
+        records = np.fromfile(path, dtype=KLINE_DTYPE)
+        if len(records) >= 50:
+            yield os.path.basename(path), records
+
+
+def save_fixtures(limit: int = 6, candles: int = 250) -> int:
+    """Substitui as fixtures versionadas pelos últimos `candles` de até `limit` arquivos de data/klines"""
+    paths = sorted(glob.glob(os.path.join(RECORDED_DIR, '*.ohlcv')))[:limit]
+    if not paths:
+        return 0
+    shutil.rmtree(FIXTURES_DIR, ignore_errors=True)
+    os.makedirs(FIXTURES_DIR)
+    for path in paths:
+        records = np.fromfile(path, dtype=KLINE_DTYPE)[-candles:]
+        records.tofile(os.path.join(FIXTURES_DIR, os.path.basename(path)))
+    return len(paths)
+
+
+def random_candles(rng: np.random.Generator, n: int) -> np.ndarray:
+    """Passeio aleatório com escala e volatilidade sorteadas"""
+    scale = 10 ** rng.uniform(-6, 5)
+    close = scale * np.exp(np.cumsum(rng.normal(0, rng.uniform(0.001, 0.05), n)))
+    if rng.random() < 0.1:
+        close[rng.integers(0, n):] = close[0]  # trechos sem variação (RSI com perdas zeradas)
+    records = np.zeros(n, dtype=KLINE_DTYPE)
+    records['open'] = np.r_[close[0], close[:-1]]
+    records['close'] = close
+    records['high'] = np.maximum(records['open'], close) * (1 + rng.uniform(0, 0.02, n))
+    records['low'] = np.minimum(records['open'], close) * (1 - rng.uniform(0, 0.02, n))
+    records['volume'] = rng.uniform(1, 1e6, n)
+    return records
+
+
+def reference(records: np.ndarray, window: int) -> dict:
+    """Valores calculados pela biblioteca `ta`"""
+    close = pd.Series(records['close'])
+    high = pd.Series(records['high'])
+    low = pd.Series(records['low'])
+    bollinger = BollingerBands(close, window=window, window_dev=2)
+    macd = MACD(close)
+    result = {
+        'ema': EMAIndicator(close, window=window).ema_indicator().values,
+        'rsi': RSIIndicator(close, window=window).rsi().values,
+        'bollinger': np.vstack([bollinger.bollinger_mavg(), bollinger.bollinger_hband(), bollinger.bollinger_lband()]),
+        'macd': np.vstack([macd.macd(), macd.macd_signal(), macd.macd_diff()]),
+    }
+    if len(records) >= window:  # `ta` não calcula ATR com menos candles que a janela
+        result['atr'] = AverageTrueRange(high, low, close, window=window).average_true_range().values
+    return result
+
+
+def native(records: np.ndarray, window: int) -> dict:
+    close, high, low = records['close'], records['high'], records['low']
+    return {
+        'ema': kernels.ema(close, window),
+        'rsi': kernels.rsi(close, window),
+        'bollinger': np.vstack(kernels.bollinger(close, window, 2)),
+        'macd': np.vstack(kernels.macd(close)),
+        'atr': kernels.atr(high, low, close, window),
+    }
+
+
+def compare(name: str, records: np.ndarray, window: int, failures: list) -> None:
+    expected = reference(records, window)
+    actual = native(records, window)
+    scale = float(np.abs(records['close']).max())
+    for kernel, values in expected.items():
+        got = actual[kernel]
+        atol = scale * RTOL
+        if kernel == 'bollinger':
+            # A variância móvel do pandas acumula erro ~eps·preço² (em trechos planos o desvio
+            # sai como √erro em vez de 0); comparar a média e a variância, não o desvio
+            values = np.vstack([values[0], ((values[1] - values[0]) / 2) ** 2])
+            got = np.vstack([got[0], ((got[1] - got[0]) / 2) ** 2])
+            atol = scale ** 2 * RTOL
+        if not np.allclose(got, values, rtol=RTOL, atol=atol, equal_nan=True):
+            failures.append(f"{kernel} (janela {window}) em {name}")
+
+
+def check_random(trials: int, seed: int) -> list:
+    failures = []
+    rng = np.random.default_rng(seed)
+    for trial in range(trials):
+        n = int(rng.integers(30, 800))
+        window = int(rng.choice([2, 5, 8, 14, 20, 21, 50, 200]))
+        compare(f"série aleatória #{trial} ({n} candles)", random_candles(rng, n), window, failures)
+    return failures
+
+
+def check_matrix(seed: int) -> list:
+    """Matriz (símbolos × candles) deve dar o mesmo resultado que cada linha isolada"""
+    failures = []
+    rng = np.random.default_rng(seed)
+    matrix = np.stack([random_candles(rng, 300) for _ in range(16)])
+    rows = [native(row, 14) for row in matrix]
+    by_matrix = {
+        'ema': kernels.ema(matrix['close'], 14),
+        'rsi': kernels.rsi(matrix['close'], 14),
+        'atr': kernels.atr(matrix['high'], matrix['low'], matrix['close'], 14),
+    }
+    for kernel, values in by_matrix.items():
+        if not all(np.allclose(values[i], rows[i][kernel], rtol=RTOL, equal_nan=True) for i in range(len(rows))):
+            failures.append(f"{kernel} em matriz difere do cálculo por linha")
+    return failures
+
+
+def check_equivalence(trials: int, seed: int) -> list:
+    failures = []
+    for name, records in recorded_fixtures():
+        for window in WINDOWS:
+            compare(name, records, window, failures)
+    return failures + check_random(trials, seed) + check_matrix(seed)
+
+
+def timeit(func, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat
+
+
+def benchmark(seed: int, repeat: int = 50) -> None:
+    rng = np.random.default_rng(seed)
+    records = random_candles(rng, 500)
+    close, high, low = records['close'], records['high'], records['low']
+    s_close, s_high, s_low = pd.Series(close), pd.Series(high), pd.Series(low)
+
+    cases = [
+        ('EMA(20)', lambda: EMAIndicator(s_close, window=20).ema_indicator(), lambda: kernels.ema(close, 20)),
+        ('RSI(14)', lambda: RSIIndicator(s_close, window=14).rsi(), lambda: kernels.rsi(close, 14)),
+        ('ATR(14)', lambda: AverageTrueRange(s_high, s_low, s_close, window=14).average_true_range(),
+         lambda: kernels.atr(high, low, close, 14)),
+        ('Bollinger(20, 2)', lambda: BollingerBands(s_close, window=20, window_dev=2).bollinger_hband(),
+         lambda: kernels.bollinger(close, 20, 2)),
+        ('MACD(12, 26, 9)', lambda: MACD(s_close).macd_signal(), lambda: kernels.macd(close)),
+    ]
+
+    print(f"\n⏱️  Série única de {len(records)} candles (média de {repeat} execuções)")
+    print(f"{'kernel':<18}{'ta (ms)':>10}{'numpy (ms)':>12}{'ganho':>9}")
+    for name, with_ta, with_numpy in cases:
+        t_ta = timeit(with_ta, repeat) * 1000
+        t_np = timeit(with_numpy, repeat) * 1000
+        print(f"{name:<18}{t_ta:>10.3f}{t_np:>12.3f}{t_ta / t_np:>8.1f}x")
+
+    # Universo inteiro: um laço de `ta` por símbolo contra uma passada sobre a matriz
+    matrix = np.stack([random_candles(rng, 500) for _ in range(200)])
+    m_close, m_high, m_low = matrix['close'], matrix['high'], matrix['low']
+
+    def ta_loop():
+        for row in matrix:
+            c, h, l = pd.Series(row['close']), pd.Series(row['high']), pd.Series(row['low'])
+            EMAIndicator(c, window=20).ema_indicator()
+            RSIIndicator(c, window=14).rsi()
+            AverageTrueRange(h, l, c, window=14).average_true_range()
+
+    def numpy_matrix():
+        kernels.ema(m_close, 20)
+        kernels.rsi(m_close, 14)
+        kernels.atr(m_high, m_low, m_close, 14)
+
+    t_ta = timeit(ta_loop, 3) * 1000
+    t_np = timeit(numpy_matrix, 3) * 1000
+    print(f"\n⏱️  Universo de {len(matrix)} pares × 500 candles (EMA20 + RSI14 + ATR14)")
+    print(f"ta por par: {t_ta:.1f} ms | matriz numpy: {t_np:.1f} ms | ganho: {t_ta / t_np:.1f}x")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--trials', type=int, default=300)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--save-fixtures', action='store_true')
+    args = parser.parse_args()
+
+    if args.save_fixtures:
+        saved = save_fixtures()
+        if not saved:
+            print(f"❌ Nenhum candle gravado em {RECORDED_DIR}")
+            return 1
+        print(f"✅ {saved} fixtures salvas em {FIXTURES_DIR}")
+
+    print(f"🔍 Conferindo kernels contra `ta` ({args.trials} séries aleatórias + candles gravados)...")
+    failures = check_equivalence(args.trials, args.seed)
+    if failures:
+        print(f"❌ {len(failures)} divergências:")
+        for failure in failures[:20]:
+            print(f"   - {failure}")
+    else:
+        print("✅ Todos os kernels equivalentes à biblioteca `ta`")
+
+    benchmark(args.seed)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
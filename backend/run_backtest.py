@@ -0,0 +1,115 @@
+"""
+Backtest das regras de entrada do scan (core/backtest.py) sobre candles de 1h gravados pelo KlineStore.
+
+Uso: python run_backtest.py [--data-dir DIR] [--symbols S ...] [--download DIAS]
+                            [--min-score N ...] [--atr-mult X ...] [--min-target P ...]
+                            [--expiry-bars N] [--trades ARQUIVO.csv]
+
+Vários valores em --min-score / --atr-mult / --min-target testam todas as combinações, reaproveitando
+os indicadores já calculados. Com --download o histórico é baixado da API para --data-dir antes do teste.
+"""
+import argparse
+import glob
+import itertools
+import os
+import sys
+import time
+import numpy as np
+from core.backtest import Backtester
+from core.kline_store import INTERVAL_MS, MAX_FETCH_LIMIT, KlineStore
+
+DEFAULT_DATA_DIR = os.path.join(os.path.dirname(__file__), 'data', 'backtest')
+
+
+def download_history(store: KlineStore, symbols: list, interval: str, days: int) -> None:
+    """Baixa `days` dias de candles fechados de cada par, em páginas de MAX_FETCH_LIMIT"""
+    from core.technical_analysis import TechnicalAnalysis
+    analyzer = TechnicalAnalysis()
+    symbols = symbols or analyzer.top_pairs
+    now_ms = int(time.time() * 1000)
+    for symbol in symbols:
+        pages = []
+        start_time = now_ms - days * INTERVAL_MS['1d']
+        while start_time < now_ms:
+            analyzer.rate_limiter.acquire()
+            page = analyzer._fetch_klines(symbol, interval, MAX_FETCH_LIMIT, start_time)
+            if page is None or not len(page):
+                break
+            pages.append(page)
+            start_time = int(page['close_time'][-1]) + 1
+        if pages:
+            records = np.concatenate(pages)
+            records = records[records['close_time'] < now_ms]
+            store.apply(symbol, interval, len(records), None, records)
+            print(f"✅ {symbol}: {len(records)} candles")
+        else:
+            print(f"❌ {symbol}: histórico não disponível")
+
+
+def load_history(store: KlineStore, symbols: list, interval: str) -> dict:
+    """Candles fechados de cada par gravados no diretório"""
+    if not symbols:
+        suffix = f"_{interval}.ohlcv"
+        symbols = sorted(os.path.basename(p)[:-len(suffix)]
+                         for p in glob.glob(os.path.join(store.base_dir, f"*{suffix}")))
+    now_ms = int(time.time() * 1000)
+    history = {}
+    for symbol in symbols:
+        records = store.load(symbol, interval)
+        records = records[records['close_time'] < now_ms]
+        if len(records):
+            history[symbol] = records
+    return history
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--data-dir', default=DEFAULT_DATA_DIR)
+    parser.add_argument('--symbols', nargs='*', default=[])
+    parser.add_argument('--download', type=int, default=0, metavar='DIAS')
+    parser.add_argument('--min-score', type=float, nargs='+', default=[90])
+    parser.add_argument('--atr-mult', type=float, nargs='+', default=[2.0])
+    parser.add_argument('--min-target', type=float, nargs='+', default=[4.0])
+    parser.add_argument('--expiry-bars', type=int, default=168)
+    parser.add_argument('--trades', default=None, metavar='ARQUIVO.csv')
+    args = parser.parse_args()
+
+    backtester = Backtester(expiry_bars=args.expiry_bars)
+    interval = backtester.entry_timeframe
+    store = KlineStore(args.data_dir, max_candles=max(MAX_FETCH_LIMIT, args.download * 24 + MAX_FETCH_LIMIT))
+    if args.download:
+        download_history(store, args.symbols, interval, args.download)
+
+    history = load_history(store, args.symbols, interval)
+    if not history:
+        print(f"❌ Nenhum candle {interval} encontrado em {args.data_dir}")
+        return 1
+    bars = sum(len(r) for r in history.values())
+    print(f"📂 {len(history)} pares, {bars} candles de {interval}")
+
+    start = time.perf_counter()
+    prepared = backtester.prepare(history)
+    print(f"⏱️ Indicadores em {time.perf_counter() - start:.2f}s")
+
+    for min_score, atr_mult, min_target in itertools.product(args.min_score, args.atr_mult, args.min_target):
+        backtester.quality_score_minimum = min_score
+        backtester.target_atr_multiplier = atr_mult
+        backtester.min_target_percentage = min_target
+        start = time.perf_counter()
+        trades, stats = backtester.run(prepared=prepared)
+        print(f"\n🔎 score >= {min_score:g}, alvo {atr_mult:g} ATR, mínimo {min_target:g}% "
+              f"({time.perf_counter() - start:.2f}s)")
+        for name, value in stats.items():
+            print(f"   {name}: {value}")
+        if args.trades:
+            path = args.trades
+            if len(args.min_score) * len(args.atr_mult) * len(args.min_target) > 1:
+                root, ext = os.path.splitext(path)
+                path = f"{root}_{min_score:g}_{atr_mult:g}_{min_target:g}{ext}"
+            trades.to_csv(path, index=False)
+            print(f"   operações salvas em {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,25 @@
+import pytest
+import kernel_benchmark as kb
+
+# Só as fixtures versionadas: o resultado não depende do que estiver gravado em data/klines
+FIXTURES = list(kb.recorded_fixtures(dirs=(kb.FIXTURES_DIR,)))
+
+
+def test_fixtures_found():
+    assert FIXTURES, f"nenhuma fixture de candles em {kb.FIXTURES_DIR}"
+
+
+@pytest.mark.parametrize('window', kb.WINDOWS)
+@pytest.mark.parametrize('name, records', FIXTURES, ids=[name for name, _ in FIXTURES])
+def test_kernels_match_ta_on_fixtures(name, records, window):
+    failures = []
+    kb.compare(name, records, window, failures)
+    assert not failures
+
+
+def test_kernels_match_ta_on_random_series():
+    assert not kb.check_random(trials=100, seed=42)
+
+
+def test_matrix_matches_rows():
+    assert not kb.check_matrix(seed=42)
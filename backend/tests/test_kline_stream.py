@@ -0,0 +1,54 @@
+import json
+import time
+import numpy as np
+from core.kline_stream import KlineStreamIngester
+from core.kline_store import KLINE_DTYPE
+
+
+def message(symbol: str, open_time: int) -> str:
+    kline = {'s': symbol, 'i': '1h', 't': open_time, 'o': '1', 'h': '1', 'l': '1', 'c': '1', 'v': '1',
+             'T': open_time + 3_599_999, 'x': False}
+    return json.dumps({'data': {'k': kline}})
+
+
+def test_silent_shard_falls_back_while_others_stay_live(monkeypatch):
+    stream = KlineStreamIngester(intervals=('1h',), max_silence=90)
+    stream.MAX_STREAMS_PER_CONNECTION = 1  # um par por conexão
+    monkeypatch.setattr(stream, '_run_shard', lambda *args: None)
+    stream.start(['BTCUSDT', 'ETHUSDT'])
+
+    records = np.zeros(10, dtype=KLINE_DTYPE)
+    records['open_time'] = np.arange(10) * 3_600_000
+    for symbol in ('BTCUSDT', 'ETHUSDT'):
+        stream.seed(symbol, '1h', records)
+        stream._on_message(None, message(symbol, 9 * 3_600_000))
+    assert stream.get('BTCUSDT', '1h', 10) is not None
+    assert stream.get('ETHUSDT', '1h', 10) is not None
+
+    # A conexão do ETH fica em silêncio; a do BTC continua recebendo
+    stream._shard_last_message[stream._shard_of[('ETHUSDT', '1h')]] = time.time() - 120
+    stream._on_message(None, message('BTCUSDT', 9 * 3_600_000))
+    assert stream.is_live('BTCUSDT', '1h') and stream.get('BTCUSDT', '1h', 10) is not None
+    assert not stream.is_live('ETHUSDT', '1h') and stream.get('ETHUSDT', '1h', 10) is None
+    assert stream.is_live()
+
+
+def test_fresh_store_seeds_stream_buffer(monkeypatch, tmp_path):
+    from core.kline_store import KlineStore
+    from core.technical_analysis import TechnicalAnalysis
+
+    stream = KlineStreamIngester(intervals=('1h',))
+    monkeypatch.setattr(stream, '_run_shard', lambda *args: None)
+    stream.start(['BTCUSDT'])
+    records = np.zeros(10, dtype=KLINE_DTYPE)
+    records['open_time'] = np.arange(10) * 3_600_000
+
+    analyzer = object.__new__(TechnicalAnalysis)
+    analyzer.kline_stream = stream
+    analyzer.kline_store = KlineStore(str(tmp_path))
+    analyzer.kline_store.apply('BTCUSDT', '1h', 10, None, records)  # sincronizado agora: fresco
+    analyzer.kline_max_age = 60
+    analyzer.async_fetcher = type('NoFetch', (), {'fetch_many': staticmethod(lambda requests: {})})()
+
+    assert len(analyzer.get_records_many(['BTCUSDT'], '1h', limit=10)['BTCUSDT']) == 10
+    assert len(stream.buffers[('BTCUSDT', '1h')]) == 10
@@ -0,0 +1,30 @@
+import numpy as np
+from core.filter_stats import FilterStats
+from core.kline_store import KLINE_DTYPE
+from core.negative_cache import NegativeCache
+from core.technical_analysis import TechnicalAnalysis
+
+
+def candles(n: int) -> np.ndarray:
+    records = np.zeros(n, dtype=KLINE_DTYPE)
+    records['open_time'] = np.arange(n) * 3_600_000
+    records['close_time'] = records['open_time'] + 3_599_999
+    records['close'] = 1.0
+    return records
+
+
+def test_data_rejection_cached_only_for_short_history():
+    analyzer = object.__new__(TechnicalAnalysis)
+    analyzer.entry_timeframe, analyzer.trend_timeframe = '1h', '4h'
+    analyzer.filter_stats = FilterStats()
+    analyzer.symbol_priority = None
+    analyzer.indicator_states = None
+    analyzer.indicator_cache = None
+    analyzer.negative_cache = NegativeCache(['history', 'data'])
+    # SHORTUSDT: histórico de 4h curto; FAILUSDT: a busca do 4h falhou
+    analyzer.get_trend_records = lambda records: {'SHORTUSDT': candles(10)}
+
+    analyzer.analyze_universe({'SHORTUSDT': candles(200), 'FAILUSDT': candles(200)})
+
+    assert analyzer.filter_stats.stats()['rejected']['data'] == 2
+    assert analyzer.negative_cache.filter(['SHORTUSDT', 'FAILUSDT']) == ['FAILUSDT']
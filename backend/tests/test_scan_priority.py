@@ -0,0 +1,94 @@
+import time
+import numpy as np
+from core.kline_store import KLINE_DTYPE, closed_klines
+from core.scan_scheduler import ScanScheduler
+from core.symbol_priority import SymbolPriority
+from core.technical_analysis import TechnicalAnalysis
+
+
+def make_analyzer(budget: int, scheduler: ScanScheduler) -> TechnicalAnalysis:
+    """Só o necessário para TechnicalAnalysis._prioritize, sem cliente da Binance"""
+    analyzer = object.__new__(TechnicalAnalysis)
+    analyzer.symbol_priority = SymbolPriority(budget=budget)
+    analyzer.scan_scheduler = scheduler
+    return analyzer
+
+
+def test_over_budget_pair_is_scanned_next_cycle():
+    symbols = [f"PAR{i}USDT" for i in range(5)]
+    scheduler = ScanScheduler('1h')
+    analyzer = make_analyzer(budget=3, scheduler=scheduler)
+
+    first = scan(analyzer, scheduler, symbols)
+    assert len(first) == 3
+    left_out = [s for s in symbols if s not in first]
+
+    # Os que sobraram acordam o loop e entram no ciclo seguinte
+    assert scheduler.has_due()
+    second = scan(analyzer, scheduler, symbols)
+    assert set(left_out) <= set(second)
+    # Completar o ciclo não conta como um ciclo novo
+    assert analyzer.symbol_priority.cycle == 1
+
+
+def scan(analyzer: TechnicalAnalysis, scheduler: ScanScheduler, symbols: list) -> list:
+    """Uma iteração do Monitor: pares devidos agora, filtrados pela prioridade"""
+    due = scheduler.due(symbols)
+    if not due:
+        return []
+    return analyzer._prioritize(due, verbose=False, new_cycle=scheduler.new_cycle)
+
+
+def test_backoff_is_counted_in_candle_cycles():
+    symbols = ['BTCUSDT', 'ETHUSDT']
+    scheduler = ScanScheduler('1h')
+    analyzer = make_analyzer(budget=10, scheduler=scheduler)
+    hour = 3_600_000
+    scanned = {symbol: [] for symbol in symbols}
+
+    for candle in range(1, 17):
+        if candle > 1:
+            for symbol in symbols:
+                scheduler.on_candle_close(symbol, '1h', candle * hour - 1)
+        # Várias iterações do Monitor dentro do mesmo candle: só a primeira tem o que analisar
+        for iteration in range(30):
+            selected = scan(analyzer, scheduler, symbols)
+            assert iteration == 0 or not selected
+            for symbol in selected:
+                scanned[symbol].append(analyzer.symbol_priority.cycle)
+            # BTC no gatilho; ETH distante
+            analyzer.symbol_priority.record({s: {'BTCUSDT': 0.0, 'ETHUSDT': 0.9}[s] for s in selected})
+            assert not scheduler.has_due()
+
+    assert analyzer.symbol_priority.cycle == 16
+    assert scanned['BTCUSDT'] == list(range(1, 17))
+    # Espera de 2, 4 e 8 ciclos (MAX_BACKOFF) para o par distante
+    assert scanned['ETHUSDT'] == [1, 3, 7, 15]
+
+
+def test_startup_waits_for_symbols():
+    scheduler = ScanScheduler('1h')
+    assert scheduler.due([]) == []
+    assert scheduler.has_due()
+    assert scheduler.due(['BTCUSDT']) == ['BTCUSDT']
+
+
+def test_close_cycle_analyzes_closed_candle():
+    scheduler = ScanScheduler('1h', intrabar_interval=0.01)
+    assert scheduler.due(['BTCUSDT']) == ['BTCUSDT']
+    assert scheduler.new_cycle and scheduler.closed_only
+
+    time.sleep(0.02)
+    assert scheduler.due(['BTCUSDT']) == ['BTCUSDT']
+    assert scheduler.new_cycle and not scheduler.closed_only
+
+    scheduler.on_candle_close('BTCUSDT', '1h', 3_600_000 - 1)
+    assert scheduler.due(['BTCUSDT']) == ['BTCUSDT']
+    assert scheduler.new_cycle and scheduler.closed_only
+
+
+def test_closed_klines_drops_candle_in_progress():
+    records = np.zeros(3, dtype=KLINE_DTYPE)
+    records['close_time'] = [999, 1999, 2999]
+    assert len(closed_klines(records, now_ms=2500)) == 2
+    assert len(closed_klines(records, now_ms=3000)) == 3